@@ -0,0 +1,76 @@
+"""add contact search indexes
+
+Revision ID: 7a2e5c9d4b18
+Revises: 3c1f9a7b2d40
+Create Date: 2026-10-18 11:02:47.503916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2e5c9d4b18'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a7b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_DOCUMENT = (
+    "coalesce(first_name, '') || ' ' || "
+    "coalesce(last_name, '') || ' ' || "
+    "coalesce(email, '')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            'CREATE INDEX ix_contacts_search_tsv ON contacts '
+            f"USING gin (to_tsvector('simple', {SEARCH_DOCUMENT}))"
+        )
+        op.execute(
+            'CREATE INDEX ix_contacts_search_trgm ON contacts '
+            f'USING gin (lower({SEARCH_DOCUMENT}) gin_trgm_ops)'
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            'CREATE VIRTUAL TABLE contacts_fts USING fts5('
+            "first_name, last_name, email, content='contacts', content_rowid='id')"
+        )
+        op.execute(
+            'CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN '
+            'INSERT INTO contacts_fts(rowid, first_name, last_name, email) '
+            'VALUES (new.id, new.first_name, new.last_name, new.email); END'
+        )
+        op.execute(
+            'CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN '
+            'INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) '
+            "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END"
+        )
+        op.execute(
+            'CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN '
+            'INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) '
+            "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+            'INSERT INTO contacts_fts(rowid, first_name, last_name, email) '
+            'VALUES (new.id, new.first_name, new.last_name, new.email); END'
+        )
+        op.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_contacts_search_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_contacts_search_tsv')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS contacts_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS contacts_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS contacts_fts_ai')
+        op.execute('DROP TABLE IF EXISTS contacts_fts')
@@ -0,0 +1,29 @@
+"""drop user refresh token
+
+Revision ID: ab09aa6ae362
+Revises: f3a7c2e9b1d5
+Create Date: 2026-10-18 17:05:41.218309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ab09aa6ae362'
+down_revision: Union[str, Sequence[str], None] = 'f3a7c2e9b1d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Refresh tokens live in the Redis session registry
+    op.drop_column('users', 'refresh_token')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('users', sa.Column('refresh_token', sa.String(length=255), nullable=True))
@@ -0,0 +1,44 @@
+"""add contact birthday_md
+
+Revision ID: b54d0e8f6a21
+Revises: 7a2e5c9d4b18
+Create Date: 2026-10-18 11:48:20.731554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b54d0e8f6a21'
+down_revision: Union[str, Sequence[str], None] = '7a2e5c9d4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('birthday_md', sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "UPDATE contacts SET birthday_md = "
+            "CAST(strftime('%m', birthday) AS INTEGER) * 100 "
+            "+ CAST(strftime('%d', birthday) AS INTEGER) "
+            "WHERE birthday IS NOT NULL"
+        )
+    else:
+        op.execute(
+            "UPDATE contacts SET birthday_md = "
+            "CAST(EXTRACT(MONTH FROM birthday) AS INTEGER) * 100 "
+            "+ CAST(EXTRACT(DAY FROM birthday) AS INTEGER) "
+            "WHERE birthday IS NOT NULL"
+        )
+    op.create_index('ix_contacts_user_id_birthday_md', 'contacts', ['user_id', 'birthday_md'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_id_birthday_md', table_name='contacts')
+    op.drop_column('contacts', 'birthday_md')
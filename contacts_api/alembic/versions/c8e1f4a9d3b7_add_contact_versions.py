@@ -0,0 +1,35 @@
+"""add contact versions
+
+Revision ID: c8e1f4a9d3b7
+Revises: b54d0e8f6a21
+Create Date: 2026-10-18 15:02:41.118307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1f4a9d3b7'
+down_revision: Union[str, Sequence[str], None] = 'b54d0e8f6a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    now = sa.text("(now() AT TIME ZONE 'utc')")
+    op.add_column('contacts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('contacts', sa.Column('updated_at', sa.DateTime(), server_default=now, nullable=False))
+    op.add_column('users', sa.Column('contacts_version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('users', sa.Column('contacts_updated_at', sa.DateTime(), server_default=now, nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'contacts_updated_at')
+    op.drop_column('users', 'contacts_version')
+    op.drop_column('contacts', 'updated_at')
+    op.drop_column('contacts', 'version')
@@ -0,0 +1,43 @@
+"""add contact tombstones
+
+Revision ID: f3a7c2e9b1d5
+Revises: c8e1f4a9d3b7
+Create Date: 2026-10-18 16:20:09.542871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7c2e9b1d5'
+down_revision: Union[str, Sequence[str], None] = 'c8e1f4a9d3b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'contact_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('contact_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_contact_tombstones_user_id_version', 'contact_tombstones', ['user_id', 'version'], unique=False)
+    op.create_index('ix_contacts_user_id_version', 'contacts', ['user_id', 'version'], unique=False)
+    op.add_column('users', sa.Column('contacts_pruned_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'contacts_pruned_version')
+    op.drop_index('ix_contacts_user_id_version', table_name='contacts')
+    op.drop_index('ix_contact_tombstones_user_id_version', table_name='contact_tombstones')
+    op.drop_table('contact_tombstones')
@@ -0,0 +1,118 @@
+"""
+Benchmark command line.
+
+    python -m benchmarks --contacts 100000 --users 100
+    python -m benchmarks --update-baseline      # store the results as baseline
+    python -m benchmarks --only search,birthdays
+
+Generates (or reuses) the dataset, runs the scenarios in-process and prints
+p50 / p95 / p99 latency and req/s per scenario. Exits with status 1 when a
+scenario regressed past the stored baseline by more than ``--tolerance``, or
+when requests failed. Baselines are machine specific: record one on the
+machine that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Settings the application requires; real values are not needed in-process
+ENV_DEFAULTS = {
+    "SECRET_KEY": "benchmark-secret",
+    "EMAIL_SECRET_KEY": "benchmark-email-secret",
+    "MAIL_USERNAME": "bench@example.com",
+    "MAIL_PASSWORD": "unused",
+    "MAIL_FROM": "bench@example.com",
+    "MAIL_PORT": "587",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM_NAME": "Benchmark",
+    "BASE_URL": "http://localhost:8000",
+    "CLOUDINARY_NAME": "unused",
+    "CLOUDINARY_API_KEY": "unused",
+    "CLOUDINARY_API_SECRET": "unused",
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10, help="users in the dataset")
+    parser.add_argument("--contacts", type=int, default=10_000, help="contacts in the dataset (10k to 10M)")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=20, help="measured login requests (bcrypt-bound)")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight at once")
+    parser.add_argument("--only", default="", help="comma-separated scenario names")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default=os.path.join(HERE, "data", "bench-{users}-{contacts}.db"),
+                        help="dataset file; {users} and {contacts} are filled in")
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative p95 / req/s change before failing")
+    parser.add_argument("--update-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--json", dest="json_out", help="also write results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    db_path = os.path.abspath(args.db.format(users=args.users, contacts=args.contacts))
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    # The application reads its database URL at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    for key, value in ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    from benchmarks.dataset import build_dataset
+    from benchmarks.suite import compare, format_table, run_suite
+
+    if build_dataset(db_path, users=args.users, contacts=args.contacts, seed=args.seed):
+        print(f"Generated dataset {db_path}")
+
+    only = {name.strip() for name in args.only.split(",") if name.strip()} or None
+    results = asyncio.run(run_suite(
+        users=args.users,
+        contacts=args.contacts,
+        requests=args.requests,
+        login_requests=args.login_requests,
+        concurrency=args.concurrency,
+        only=only,
+        seed=args.seed,
+    ))
+    print(format_table(results))
+
+    report = {
+        "dataset": {"users": args.users, "contacts": args.contacts},
+        "concurrency": args.concurrency,
+        "results": {result.scenario: vars(result) for result in results},
+    }
+    if args.json_out:
+        with open(args.json_out, "w") as out:
+            json.dump(report, out, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as out:
+            json.dump(report, out, indent=2)
+            out.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline stored; run with --update-baseline to record one")
+        return 1 if any(result.errors for result in results) else 0
+    with open(args.baseline) as stored:
+        baseline = json.load(stored)
+    if baseline.get("dataset") != report["dataset"]:
+        print(f"Baseline was recorded for dataset {baseline.get('dataset')}; not comparing")
+        return 1 if any(result.errors for result in results) else 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
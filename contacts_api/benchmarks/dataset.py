@@ -0,0 +1,119 @@
+"""
+Benchmark dataset generation.
+
+Builds a SQLite database with ``users`` users and ``contacts`` contacts
+spread evenly across them, deterministically from a seed. The parameters and
+a fingerprint of the schema are stored next to the database, so a matching
+dataset is reused instead of being generated again.
+"""
+
+import hashlib
+import json
+import os
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from src.database.models import Base, Contact, User, birthday_key
+from src.services.hashing import password_hasher
+
+PASSWORD = "benchmark-pass"
+
+FIRST_NAMES = (
+    "Anna", "Bohdan", "Chloe", "Dmytro", "Emma", "Farid", "Galyna", "Hugo", "Iryna",
+    "Jonas", "Kateryna", "Liam", "Maria", "Nazar", "Olena", "Petro", "Quinn", "Roman",
+    "Sofia", "Taras", "Uliana", "Viktor", "Wanda", "Yaroslav", "Zoe",
+)
+LAST_NAMES = (
+    "Bondar", "Chen", "Diaz", "Evans", "Franko", "Garcia", "Hrytsenko", "Ivanova",
+    "Johnson", "Kovalenko", "Lysenko", "Melnyk", "Novak", "Olson", "Petrenko", "Quint",
+    "Rudenko", "Shevchenko", "Tkachenko", "Usyk", "Vovk", "Wilson", "Yakovenko", "Zhuk",
+)
+
+FIRST_BIRTHDAY = date(1950, 1, 1)
+BIRTHDAY_SPAN = (date(2005, 12, 31) - FIRST_BIRTHDAY).days
+
+
+def schema_fingerprint() -> str:
+    """Short hash of the tables, columns and indexes of the application models."""
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts.extend(f"{column.name}:{column.type}" for column in table.columns)
+        parts.extend(sorted(index.name for index in table.indexes))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def user_email(index: int) -> str:
+    """Email of the ``index``-th generated user (starting at 1)."""
+    return f"bench{index}@example.com"
+
+
+def _contact_rows(start: int, stop: int, users: int, rng: random.Random) -> list[dict]:
+    rows = []
+    for i in range(start, stop):
+        birthday = FIRST_BIRTHDAY + timedelta(days=rng.randrange(BIRTHDAY_SPAN))
+        rows.append({
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "email": f"contact{i}@example.com",
+            "phone": f"+380{rng.randrange(10**9):09d}",
+            "birthday": birthday,
+            "birthday_md": birthday_key(birthday),
+            "additional_info": None,
+            "user_id": i % users + 1,
+        })
+    return rows
+
+
+def build_dataset(path: str, users: int = 10, contacts: int = 10_000, seed: int = 42, chunk: int = 50_000) -> bool:
+    """
+    Create the benchmark database unless a matching one already exists.
+
+    Args:
+        path (str): SQLite database file.
+        users (int): Number of users.
+        contacts (int): Number of contacts, spread round-robin across users.
+        seed (int): Random seed.
+        chunk (int): Contacts inserted per statement batch.
+
+    Returns:
+        bool: True when the database was (re)generated.
+    """
+    params = {"users": users, "contacts": contacts, "seed": seed, "schema": schema_fingerprint()}
+    meta_path = f"{path}.json"
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as meta:
+            if json.load(meta) == params:
+                return False
+    for stale in (path, meta_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed)
+    password = password_hasher.policy.context().hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        conn.execute(
+            insert(User),
+            [
+                {"email": user_email(i), "password": password, "confirmed": True}
+                for i in range(1, users + 1)
+            ],
+        )
+    for start in range(0, contacts, chunk):
+        with engine.begin() as conn:
+            conn.execute(
+                insert(Contact),
+                _contact_rows(start, min(start + chunk, contacts), users, rng),
+            )
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+    with open(meta_path, "w") as meta:
+        json.dump(params, meta)
+    return True
@@ -0,0 +1,294 @@
+"""
+Benchmark scenarios and runner.
+
+Drives the real application in-process through an ASGI client, with
+fakeredis in place of Redis and rate limiting switched off, against a
+generated SQLite dataset (see ``benchmarks.dataset``). Each scenario reports
+latency percentiles and throughput; results can be compared to a stored
+baseline.
+"""
+
+import asyncio
+import math
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+import fakeredis
+import httpx
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from fastapi.security import HTTPAuthorizationCredentials
+from redis.asyncio import ConnectionPool
+from sqlalchemy import delete
+
+from benchmarks.dataset import FIRST_NAMES, PASSWORD, user_email
+from src.database.db import SessionLocal, engine
+from src.database.models import Contact
+from src.main import app, attach_redis
+from src.services.auth import auth_service
+from src.services.metrics import InstrumentedRedis
+from src.services.rate_limit import limiter
+
+# Regression checks use these metrics: latency may not grow, throughput may not drop
+CHECKS = (("p95_ms", 1), ("rps", -1))
+
+
+@dataclass
+class Result:
+    """Measurements of one scenario."""
+
+    scenario: str
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    rps: float
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+async def measure(
+    name: str,
+    call: Callable[[int], Awaitable[bool]],
+    requests: int,
+    concurrency: int,
+    warmup: int = 5,
+) -> Result:
+    """
+    Run ``call`` ``requests`` times from ``concurrency`` concurrent workers.
+
+    Args:
+        name (str): Scenario name.
+        call: Coroutine function taking the request number and returning
+            whether the response was the expected one.
+        requests (int): Measured calls.
+        concurrency (int): Calls in flight at once.
+        warmup (int): Unmeasured calls made first.
+
+    Returns:
+        Result: Latency percentiles in milliseconds and requests per second.
+    """
+    for i in range(warmup):
+        await call(-1 - i)
+
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            ok = await call(i)
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return Result(
+        scenario=name,
+        requests=requests,
+        errors=errors,
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p95_ms=round(percentile(latencies, 95) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+        rps=round(requests / elapsed, 1) if elapsed else 0.0,
+    )
+
+
+def fake_redis() -> InstrumentedRedis:
+    """The application's Redis client class, backed by an in-memory fakeredis server."""
+    pool = ConnectionPool(
+        connection_class=FakeAsyncRedisConnection,
+        server=fakeredis.FakeServer(),
+        decode_responses=True,
+    )
+    return InstrumentedRedis(connection_pool=pool)
+
+
+def _contact_body(rng: random.Random, email: str) -> dict:
+    return {
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": "Bench",
+        "email": email,
+        "phone": "+380000000000",
+        "birthday": (date(1980, 1, 1) + timedelta(days=rng.randrange(9000))).isoformat(),
+    }
+
+
+async def run_suite(
+    users: int,
+    contacts: int,
+    requests: int = 500,
+    login_requests: int = 20,
+    concurrency: int = 10,
+    only: set[str] | None = None,
+    seed: int = 42,
+) -> list[Result]:
+    """
+    Run every scenario against the dataset the application is configured with.
+
+    Args:
+        users (int): Users in the dataset.
+        contacts (int): Contacts in the dataset.
+        requests (int): Measured requests per scenario.
+        login_requests (int): Measured requests for login, which is bcrypt-bound.
+        concurrency (int): Requests in flight at once.
+        only (set[str] | None): Scenario names to run; all when None.
+        seed (int): Random seed for request parameters.
+
+    Returns:
+        list[Result]: One result per scenario, in run order.
+    """
+    rng = random.Random(seed)
+    run = uuid.uuid4().hex[:8]
+    # Drop contacts an interrupted earlier run created, restoring the dataset
+    async with SessionLocal() as db:
+        await db.execute(delete(Contact).where(Contact.id > contacts))
+        await db.commit()
+
+    redis_client = fake_redis()
+    attach_redis(redis_client)
+    limiter.enabled = False
+
+    email = user_email(1)
+    token = await auth_service.create_access_token({"sub": email})
+    headers = {"Authorization": f"Bearer {token}"}
+    # Contacts are assigned round-robin, so user 1 owns ids 1, 1 + users, ...
+    own_ids = range(1, contacts + 1, users)
+    created: list[int] = []
+
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers)
+
+    async def users_me(i):
+        return (await client.get("/api/users/me")).status_code == 200
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    async def get_current_user(i):
+        async with SessionLocal() as db:
+            user = await auth_service.get_current_user(credentials, db)
+        return user.email == email
+
+    async def login(i):
+        response = await client.post(
+            "/api/auth/login", data={"username": email, "password": PASSWORD}
+        )
+        return response.status_code == 200
+
+    async def contacts_list(i):
+        return (await client.get("/api/contacts/", params={"limit": 50})).status_code == 200
+
+    async def contacts_read(i):
+        contact_id = own_ids[rng.randrange(len(own_ids))]
+        return (await client.get(f"/api/contacts/{contact_id}")).status_code == 200
+
+    async def contacts_create(i):
+        body = _contact_body(rng, f"bench-new-{run}-{i}@example.com")
+        response = await client.post("/api/contacts/", json=body)
+        if response.status_code != 201:
+            return False
+        if i >= 0:
+            created.append(response.json()["id"])
+        return True
+
+    async def contacts_update(i):
+        contact_id = created[i % len(created)]
+        body = _contact_body(rng, f"bench-upd-{run}-{contact_id}@example.com")
+        return (await client.put(f"/api/contacts/{contact_id}", json=body)).status_code == 200
+
+    async def contacts_delete(i):
+        if i < 0:
+            return True
+        return (await client.delete(f"/api/contacts/{created[i]}")).status_code == 200
+
+    async def search(i):
+        prefix = rng.choice(FIRST_NAMES)[: rng.randint(2, 5)]
+        return (await client.get(f"/api/contacts/search/{prefix}")).status_code == 200
+
+    async def birthdays(i):
+        response = await client.get("/api/contacts/birthdays/upcoming", params={"days": 7})
+        return response.status_code == 200
+
+    scenarios = [
+        ("get_current_user", get_current_user, requests),
+        ("users_me", users_me, requests),
+        ("login", login, login_requests),
+        ("contacts_list", contacts_list, requests),
+        ("contacts_read", contacts_read, requests),
+        ("contacts_create", contacts_create, requests),
+        ("contacts_update", contacts_update, requests),
+        ("contacts_delete", contacts_delete, requests),
+        ("search", search, requests),
+        ("birthdays", birthdays, requests),
+    ]
+    results = []
+    try:
+        for name, call, count in scenarios:
+            if only and name not in only:
+                continue
+            if name in ("contacts_update", "contacts_delete") and not created:
+                continue
+            count = min(count, len(created)) if name == "contacts_delete" else count
+            results.append(await measure(name, call, count, concurrency))
+    finally:
+        await client.aclose()
+        await redis_client.aclose()
+        await engine.dispose()
+    return results
+
+
+def compare(results: list[Result], baseline: dict, tolerance: float) -> list[str]:
+    """
+    Find scenarios that regressed against a baseline.
+
+    Args:
+        results (list[Result]): Current measurements.
+        baseline (dict): Stored ``{"results": {scenario: Result fields}}``.
+        tolerance (float): Allowed relative change, e.g. 0.25 for 25 %.
+
+    Returns:
+        list[str]: One message per regression; empty when none.
+    """
+    regressions = []
+    stored = baseline.get("results", {})
+    for result in results:
+        reference = stored.get(result.scenario)
+        if reference is None:
+            continue
+        current = asdict(result)
+        for metric, direction in CHECKS:
+            before, now = reference[metric], current[metric]
+            if direction > 0 and now > before * (1 + tolerance):
+                regressions.append(f"{result.scenario}: {metric} {now} > {before} (+{tolerance:.0%})")
+            if direction < 0 and now < before * (1 - tolerance):
+                regressions.append(f"{result.scenario}: {metric} {now} < {before} (-{tolerance:.0%})")
+        if result.errors:
+            regressions.append(f"{result.scenario}: {result.errors} failed requests")
+    return regressions
+
+
+def format_table(results: list[Result]) -> str:
+    """Results as a fixed-width text table."""
+    header = f"{'scenario':<18}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.scenario:<18}{r.requests:>9}{r.errors:>8}{r.p50_ms:>10.2f}"
+            f"{r.p95_ms:>10.2f}{r.p99_ms:>10.2f}{r.rps:>10.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,74 @@
+"""
+Token codec micro-benchmark.
+
+    python -m benchmarks.tokens
+    python -m benchmarks.tokens --seconds 2
+
+Measures encode and decode throughput of access-token sized claims with
+python-jose (the previous backend) and with ``src.services.tokens`` for
+HS256, EdDSA and ES256. Runs without the application or a dataset, but
+needs the dev dependencies (python-jose).
+"""
+
+import argparse
+import time
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jose import jwt
+
+from src.services.tokens import EdDSAKey, ES256Key, HMACKey, TokenCodec
+
+SECRET = "benchmark-secret"
+
+
+def claims() -> dict:
+    return {
+        "sub": "bench-user-0001@example.com",
+        "sid": "0Jd3m2fT6cQGQ6wq1nRrVA",
+        "jti": "p8w3ZbJ1kH2sTq9yXc4LmA",
+        "exp": int(time.time()) + 900,
+        "scope": "access_token",
+    }
+
+
+def rate(func, seconds: float) -> float:
+    """Calls per second of ``func`` over roughly ``seconds``."""
+    calls, started = 0, time.perf_counter()
+    deadline = started + seconds
+    while True:
+        for _ in range(100):
+            func()
+        calls += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            return calls / (now - started)
+
+
+def cases():
+    payload = claims()
+    hs256 = TokenCodec([HMACKey(SECRET, kid="hs")])
+    eddsa = TokenCodec([EdDSAKey(ed25519.Ed25519PrivateKey.generate(), kid="ed")])
+    es256 = TokenCodec([ES256Key(ec.generate_private_key(ec.SECP256R1()), kid="ec")])
+
+    jose_token = jwt.encode(payload, SECRET, algorithm="HS256")
+    yield "python-jose HS256", (
+        lambda: jwt.encode(payload, SECRET, algorithm="HS256"),
+        lambda: jwt.decode(jose_token, SECRET, algorithms=["HS256"]),
+    )
+    for name, codec in (("codec HS256", hs256), ("codec EdDSA", eddsa), ("codec ES256", es256)):
+        token = codec.encode(payload)
+        yield name, (lambda c=codec: c.encode(payload), lambda c=codec, t=token: c.decode(t))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.tokens", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="measuring time per operation")
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<20} {'encode/s':>12} {'decode/s':>12}")
+    for name, (encode, decode) in cases():
+        print(f"{name:<20} {rate(encode, args.seconds):>12,.0f} {rate(decode, args.seconds):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
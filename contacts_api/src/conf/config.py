@@ -16,6 +16,11 @@ class Settings(BaseSettings):
 
     Attributes:
         database_url (str): PostgreSQL database connection URL
+        db_pool_size (int): Connections kept open per worker process
+        db_max_overflow (int): Extra connections allowed above db_pool_size
+        db_pool_timeout (float): Seconds to wait for a free connection
+        db_pool_recycle (int): Seconds after which a connection is replaced
+        db_pool_pre_ping (bool): Test connections on checkout (survives DB restarts)
         secret_key (str): Secret key for JWT token generation
         algorithm (str): JWT signing algorithm (default: HS256)
         mail_username (EmailStr): Email username for SMTP
@@ -24,18 +29,100 @@ class Settings(BaseSettings):
         mail_port (int): SMTP port
         mail_server (str): SMTP server address
         mail_from_name (str): Display name for sender
+        mail_queue_max_attempts (int): Delivery attempts before an email is
+            moved to the dead-letter list
+        mail_queue_backoff_base (float): Seconds before the first retry,
+            doubled on each further attempt
+        mail_queue_backoff_max (float): Longest delay between retries
+        mail_batch_size (int): Emails the mail worker sends per batch
+        mail_worker_name (str): Mail worker name, stable across restarts
         email_secret_key (str): Secret key for email verification tokens
         base_url (str): Base URL of the frontend application
         cloudinary_name (str): Cloudinary account name
         cloudinary_api_key (str): Cloudinary API key
         cloudinary_api_secret (str): Cloudinary API secret
+        avatar_storage (str): Avatar storage backend, "cloudinary" or "local"
+        avatar_local_dir (str): Directory of the local avatar storage
+        avatar_base_url (str): URL prefix of locally stored avatars; a path
+            is served by the app itself
+        avatar_max_bytes (int): Largest accepted avatar upload
+        avatar_size (int): Edge length of stored avatars in pixels
+        avatar_workers (int): Threads decoding and resizing avatars
         redis_host (str): Redis server hostname (default: localhost)
         redis_port (int): Redis server port (default: 6379)
+        rate_limit_enabled (bool): Enforce route rate limits
+        rate_limits (dict): Per limit name, quotas replacing the route
+            defaults, e.g. {"contacts:create": {"user": "10/60", "ip": "50/60"}}
+        login_guard_enabled (bool): Track failed logins and lock out attackers
+        login_email_threshold (int): Failed logins per email before it is locked
+        login_ip_threshold (int): Failed logins per client IP before it is locked
+        login_failure_window (int): Seconds a failed login is remembered
+        login_lockout_base (float): First lockout in seconds; doubles per further failure
+        login_lockout_max (float): Longest lockout in seconds
+        login_unknown_ttl (int): Seconds an email without account is remembered
+        internal_api_key (str | None): Key required in X-Internal-Key for
+            /internal endpoints and /metrics; they answer 404 when unset
+        internal_api_open (bool): Serve /internal endpoints and /metrics
+            without a key when none is configured (development only)
+        server_timing_public (bool): Send the Server-Timing header on every
+            response; otherwise only requests with a valid X-Internal-Key get
+            it (development only)
+        password_hash_pool (str): Worker pool for password hashing, "thread" or "process"
+        password_hash_workers (int): Number of hashing workers
+        password_hash_max_pending (int): Hashing jobs allowed in flight before
+            new ones are rejected with 503
+        password_hash_scheme (str): Scheme of new hashes, "argon2" (argon2id) or
+            "bcrypt"; hashes of the other scheme are upgraded at login
+        password_hash_target_ms (float): Hashing time per login the costs are
+            tuned to at startup, never below the scheme's safe minimum
+        password_hash_memory_kib (int): argon2 memory cost
+        password_hash_parallelism (int): argon2 lanes
+        password_hash_params (dict[str, int]): Fixed costs instead of tuning, e.g.
+            {"time_cost": 3} or {"rounds": 12}; set it when servers differ, so
+            they all hash at the same cost (hashes are only upgraded, never
+            rehashed to a lower cost)
+        jwt_keys (list[dict]): Signing keys for access and refresh tokens, each
+            with ``kid``, ``alg`` (HS256/384/512, EdDSA or ES256) and ``secret``
+            or PEM ``private_key``/``public_key`` (or ``*_file`` paths); keys
+            with only a public half verify. Empty means HS tokens from secret_key
+        jwt_active_kid (str | None): Key that signs new tokens (default: the first);
+            the others keep verifying, so a retired key stays listed until its
+            tokens have expired
+        jwt_accept_legacy_secret (bool): Keep verifying kid-less tokens signed
+            with secret_key next to jwt_keys; turn off once they have expired
+        token_cache_size (int): Verified access tokens cached per process
+        token_revocation_sync_interval (float): Seconds between refreshes of each
+            worker's filter of revoked access tokens
+        token_revocation_capacity (int): Revoked tokens the filter is sized for
+        token_revocation_error_rate (float): Filter false-positive rate; each
+            false positive costs one Redis lookup
+        user_cache_size (int): Users kept in each process's local cache tier
+        user_cache_local_ttl (int): Seconds a local user cache entry stays valid
+        response_cache_size (int): Contact responses kept in each process's local tier
+        response_cache_local_ttl (int): Seconds a local response entry stays valid
+        response_cache_ttl (int): Seconds a response stays in Redis
+        contacts_tombstone_retention_days (int): Days deleted contacts are
+            remembered for delta sync; older sync tokens must resync
+        sql_profiler_enabled (bool): Profile the SQL of each request (development only)
+        sql_profiler_slow_ms (float): Statements at least this slow get a query plan
+        sql_profiler_repeat_threshold (int): Identical statements in one request
+            reported as a possible N+1
+        sql_profiler_record_parameters (bool): Keep statement parameter values
+            in profiles; otherwise only their count and types
     """
 
     database_url: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
     secret_key: str
     algorithm: str = "HS256"
+    jwt_keys: list[dict[str, str]] = []
+    jwt_active_kid: str | None = None
+    jwt_accept_legacy_secret: bool = True
 
     mail_username: EmailStr
     mail_password: str
@@ -43,6 +130,11 @@ class Settings(BaseSettings):
     mail_port: int
     mail_server: str
     mail_from_name: str
+    mail_queue_max_attempts: int = 5
+    mail_queue_backoff_base: float = 2
+    mail_queue_backoff_max: float = 600
+    mail_batch_size: int = 50
+    mail_worker_name: str = "default"
     email_secret_key: str
     base_url: str
 
@@ -50,9 +142,57 @@ class Settings(BaseSettings):
     cloudinary_api_key: str
     cloudinary_api_secret: str
 
+    avatar_storage: str = "cloudinary"
+    avatar_local_dir: str = "media"
+    avatar_base_url: str = "/media"
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_size: int = 250
+    avatar_workers: int = 2
+
     redis_host: str = "localhost"
     redis_port: int = 6379
 
+    rate_limit_enabled: bool = True
+    rate_limits: dict[str, dict[str, str | None]] = {}
+
+    login_guard_enabled: bool = True
+    login_email_threshold: int = 5
+    login_ip_threshold: int = 20
+    login_failure_window: int = 900
+    login_lockout_base: float = 1
+    login_lockout_max: float = 900
+    login_unknown_ttl: int = 300
+
+    internal_api_key: str | None = None
+    internal_api_open: bool = False
+    server_timing_public: bool = False
+
+    password_hash_pool: str = "thread"
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+    password_hash_scheme: str = "argon2"
+    password_hash_target_ms: float = 250
+    password_hash_memory_kib: int = 64 * 1024
+    password_hash_parallelism: int = 1
+    password_hash_params: dict[str, int] = {}
+
+    token_cache_size: int = 10_000
+    token_revocation_sync_interval: float = 5
+    token_revocation_capacity: int = 100_000
+    token_revocation_error_rate: float = 0.001
+    user_cache_size: int = 10_000
+    user_cache_local_ttl: int = 60
+    response_cache_size: int = 2_000
+    response_cache_local_ttl: int = 30
+    response_cache_ttl: int = 300
+
+    contacts_tombstone_retention_days: int = 30
+
+    sql_profiler_enabled: bool = False
+    sql_profiler_slow_ms: float = 50
+    sql_profiler_repeat_threshold: int = 3
+    sql_profiler_record_parameters: bool = False
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
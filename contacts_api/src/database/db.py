@@ -1,25 +1,83 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
 import os
 
+from src.conf.config import settings
+from src.database.pool import InstrumentedQueuePool
+
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
+
+def to_async_url(url: str) -> str:
+    """
+    Map a synchronous database URL onto its asyncio driver.
+
+    Alembic keeps using the plain URL (psycopg2 / pysqlite), while the
+    application talks to the same database through asyncpg / aiosqlite.
+
+    Args:
+        url (str): Database URL as configured in ``DATABASE_URL``.
+
+    Returns:
+        str: URL with an async driver in its scheme.
+    """
+    scheme, _, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def pool_options(url: str) -> dict:
+    """
+    Connection pool arguments for ``create_async_engine`` taken from Settings.
+
+    In-memory SQLite needs its single shared connection, so it keeps the
+    dialect's default pool.
+
+    Args:
+        url (str): Async database URL.
+
+    Returns:
+        dict: Keyword arguments for the engine.
+    """
+    if url.startswith("sqlite") and (":memory:" in url or url.endswith("://")):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL))
+SessionLocal = async_sessionmaker(
     bind=engine,
+    autoflush=False,
+    expire_on_commit=False,
 )
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def get_sessionmaker():
+    """
+    Session factory for work that outlives the request's ``get_db`` session,
+    such as streaming response bodies.
+    """
+    return SessionLocal
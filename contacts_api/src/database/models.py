@@ -1,6 +1,21 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Date, func
+from datetime import datetime, timezone
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Date, func
 from src.database.db import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+
+
+def birthday_key(birthday):
+    """Month-day key of a birthday (e.g. 229 for Feb 29), ignoring the year."""
+    if birthday is None:
+        return None
+    return birthday.month * 100 + birthday.day
+
+
+def utcnow():
+    """Current UTC time without tzinfo, as stored in change timestamps."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class Contact(Base):
     __tablename__ = "contacts"
@@ -11,17 +26,57 @@ class Contact(Base):
     email = Column(String(100), unique=True, index=True)
     phone = Column(String(20))
     birthday = Column(Date)
+    birthday_md = Column(Integer, nullable=True)  # kept in sync with birthday
     additional_info = Column(String(250), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    # Owner's contacts_version at the contact's last change (its ETag)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=False, default=utcnow)
     user = relationship("User", back_populates="contacts")
 
+    # Per-user indexes: keyset pagination (one per sort order of GET /contacts/),
+    # upcoming-birthday lookups by month-day and changes since a version
+    __table_args__ = (
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_last_name_id", "user_id", "last_name", "id"),
+        Index("ix_contacts_user_id_birthday_id", "user_id", "birthday", "id"),
+        Index("ix_contacts_user_id_birthday_md", "user_id", "birthday_md"),
+        Index("ix_contacts_user_id_version", "user_id", "version"),
+    )
+
+    @validates("birthday")
+    def _sync_birthday_md(self, key, value):
+        self.birthday_md = birthday_key(value)
+        return value
+
+
+class ContactTombstone(Base):
+    """Record of a deleted contact, kept for delta sync (GET /contacts/changes)."""
+
+    __tablename__ = "contact_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    contact_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    version = Column(Integer, nullable=False)  # owner's contacts_version of the delete
+    deleted_at = Column(DateTime, nullable=False, default=utcnow)
+
+    __table_args__ = (
+        Index("ix_contact_tombstones_user_id_version", "user_id", "version"),
+    )
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     password = Column(String(255), nullable=False)
-    refresh_token = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=func.now())
     confirmed = Column(Boolean, default=False)
     avatar = Column(String(512), nullable=True)
+    # Bumped on every change to the user's contacts (collection ETag)
+    contacts_version = Column(Integer, nullable=False, default=1, server_default="1")
+    contacts_updated_at = Column(DateTime, nullable=False, default=utcnow)
+    # Highest version of a pruned tombstone: older sync tokens cannot be served
+    contacts_pruned_version = Column(Integer, nullable=False, default=0, server_default="0")
     contacts = relationship("Contact", back_populates="user")
@@ -0,0 +1,121 @@
+"""
+pool.py — connection pool instrumentation.
+
+This module:
+- Provides InstrumentedQueuePool, the engine's queue pool with checkout wait
+  timing
+- Keeps a per-process histogram of checkout waits and a count of timeouts
+- Reports live pool statistics for the internal pool endpoint
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# QueuePool._do_get retries by calling itself; only the outermost call is timed
+_in_checkout: ContextVar[bool] = ContextVar("_in_checkout", default=False)
+
+
+class WaitHistogram:
+    """
+    Cumulative histogram of connection checkout waits.
+
+    Attributes:
+        buckets (tuple[float, ...]): Upper bounds of the buckets in seconds.
+    """
+
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._timeouts = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Record one checkout wait."""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    def timeout(self):
+        """Record a checkout that gave up after pool_timeout."""
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self) -> dict:
+        """
+        Return the histogram as cumulative counts per upper bound.
+
+        Returns:
+            dict: ``buckets`` (``{"0.001": n, ..., "+Inf": total}``), ``count``,
+            ``sum`` and ``timeouts``.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            timeouts = self._timeouts
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "buckets": cumulative,
+            "count": running,
+            "sum": total_sum,
+            "timeouts": timeouts,
+        }
+
+
+checkout_wait = WaitHistogram()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        if _in_checkout.get():
+            return super()._do_get()
+        token = _in_checkout.set(True)
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            checkout_wait.timeout()
+            raise
+        finally:
+            checkout_wait.observe(time.perf_counter() - started)
+            _in_checkout.reset(token)
+
+
+def pool_stats(engine) -> dict:
+    """
+    Live statistics of an engine's connection pool in this process.
+
+    Args:
+        engine: SQLAlchemy (async) engine.
+
+    Returns:
+        dict: Pool class, configured size, checked-in / checked-out
+        connections, current overflow and the checkout wait histogram.
+    """
+    pool = engine.pool
+    stats = {"pid": os.getpid(), "pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if max_overflow is not None:
+        stats["max_overflow"] = max_overflow
+    stats["checkout_wait"] = checkout_wait.snapshot()
+    return stats
@@ -0,0 +1,157 @@
+"""
+search.py — index-backed full-text search over contacts.
+
+This module:
+- Builds the contact search statement for the database dialect in use
+- PostgreSQL: ``tsvector`` prefix matching plus ``pg_trgm`` substring matching,
+  both served by GIN expression indexes (see the Alembic revision
+  ``7a2e5c9d4b18``)
+- SQLite: an FTS5 external-content table kept in sync by triggers, created
+  together with the ``contacts`` table so test databases get it too
+- Any other dialect falls back to plain ``ILIKE``
+"""
+
+import re
+
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, table
+
+from src.database.models import Contact
+
+# Text both PostgreSQL indexes are built on. It is rendered as literal SQL so
+# the planner can match it against the expression indexes.
+SEARCH_DOCUMENT = (
+    "coalesce(contacts.first_name, '') || ' ' || "
+    "coalesce(contacts.last_name, '') || ' ' || "
+    "coalesce(contacts.email, '')"
+)
+SEARCH_VECTOR = literal_column(f"to_tsvector('simple', {SEARCH_DOCUMENT})")
+SEARCH_TEXT = literal_column(f"lower({SEARCH_DOCUMENT})")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+contacts_fts = table("contacts_fts", column("rowid"))
+
+_SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+        first_name, last_name, email, content='contacts', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+]
+
+for statement in _SQLITE_FTS_DDL:
+    event.listen(
+        Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Contact.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"),
+)
+
+
+def tokenize(query: str) -> list[str]:
+    """
+    Split a raw search string into word tokens safe for tsquery / FTS5 syntax.
+
+    Args:
+        query (str): Raw search string from the client.
+
+    Returns:
+        list[str]: Lower-cased word tokens.
+    """
+    return [token.lower() for token in _TOKEN_RE.findall(query)]
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _postgresql_statement(query: str, tokens: list[str], user_id: int, limit: int):
+    tsquery = func.to_tsquery(
+        literal_column("'simple'"), " & ".join(f"{token}:*" for token in tokens)
+    )
+    needle = query.lower()
+    rank = func.ts_rank(SEARCH_VECTOR, tsquery) + func.similarity(SEARCH_TEXT, needle)
+    return (
+        select(Contact)
+        .where(Contact.user_id == user_id)
+        .where(
+            or_(
+                SEARCH_VECTOR.op("@@")(tsquery),
+                SEARCH_TEXT.like(f"%{_escape_like(needle)}%", escape="\\"),
+            )
+        )
+        .order_by(rank.desc(), Contact.id)
+        .limit(limit)
+    )
+
+
+def _sqlite_statement(tokens: list[str], user_id: int, limit: int):
+    match = " ".join(f'"{token}"*' for token in tokens)
+    return (
+        select(Contact)
+        .join(contacts_fts, contacts_fts.c.rowid == Contact.id)
+        .where(Contact.user_id == user_id)
+        .where(literal_column("contacts_fts").op("MATCH")(match))
+        .order_by(func.bm25(literal_column("contacts_fts")), Contact.id)
+        .limit(limit)
+    )
+
+
+def _fallback_statement(query: str, user_id: int, limit: int):
+    return (
+        select(Contact)
+        .where(Contact.user_id == user_id)
+        .where(
+            (Contact.first_name.ilike(f"%{query}%"))
+            | (Contact.last_name.ilike(f"%{query}%"))
+            | (Contact.email.ilike(f"%{query}%"))
+        )
+        .order_by(Contact.id)
+        .limit(limit)
+    )
+
+
+def build_search_statement(dialect: str, query: str, user_id: int, limit: int):
+    """
+    Build the ranked contact search statement for a database dialect.
+
+    Args:
+        dialect (str): SQLAlchemy dialect name, e.g. ``postgresql`` or ``sqlite``.
+        query (str): Raw search string from the client.
+        user_id (int): Owner of the contacts to search.
+        limit (int): Maximum number of results.
+
+    Returns:
+        Select | None: Statement returning matching contacts best first, or
+        None when the query contains no searchable words.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    if dialect == "postgresql":
+        return _postgresql_statement(query, tokens, user_id, limit)
+    if dialect == "sqlite":
+        return _sqlite_statement(tokens, user_id, limit)
+    return _fallback_statement(query, user_id, limit)
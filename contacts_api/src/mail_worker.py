@@ -0,0 +1,58 @@
+"""
+mail_worker.py — entry point of the outbound mail worker.
+
+Run with ``python -m src.mail_worker``. The worker:
+- Connects to Redis and the SMTP server from the application settings
+- Requeues jobs a previous run left unacknowledged
+- Sends queued verification / password reset emails in batches until
+  SIGINT or SIGTERM
+"""
+
+import asyncio
+import logging
+import signal
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.services.mail_queue import MailWorker, SMTPSender, mail_queue
+
+
+async def main():
+    """Run the mail worker until interrupted."""
+    redis_client = redis.Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=0,
+        encoding="utf-8",
+        decode_responses=True,
+    )
+    mail_queue.init(redis_client)
+    sender = SMTPSender(
+        hostname=settings.mail_server,
+        port=settings.mail_port,
+        username=settings.mail_username,
+        password=settings.mail_password,
+        start_tls=True,
+        validate_certs=False,
+    )
+    worker = MailWorker(
+        mail_queue,
+        sender,
+        name=settings.mail_worker_name,
+        batch_size=settings.mail_batch_size,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await worker.run(stop)
+    finally:
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -3,18 +3,29 @@ main.py — the main entry point for the Contacts API FastAPI application.
 
 This module:
 - Initializes the FastAPI app
-- Registers routes (contacts, auth, users)
-- Configures CORS middleware
-- Connects to Redis for rate limiting
+- Registers routes (contacts, auth, users, internal, metrics)
+- Installs request, SQL and Redis metrics
+- Installs the SQL profiler (active only when enabled in settings)
+- Configures CORS middleware and serves locally stored avatars
+- Connects to Redis for rate limiting, caching, mail and login sessions
 """
 
-import redis.asyncio as redis
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
+from fastapi.staticfiles import StaticFiles
 
-from src.routes import contacts, auth, users
+from src.routes import contacts, auth, users, internal, metrics
 from src.conf.config import settings
+from src.services.hashing import password_hasher
+from src.services.cache import response_cache, user_cache
+from src.services.mail_queue import mail_queue
+from src.services.avatars import avatar_pipeline
+from src.services.login_guard import login_guard
+from src.services.rate_limit import limiter
+from src.services.revocation import token_revocations
+from src.services.sessions import session_registry
+from src.services.metrics import InstrumentedRedis, MetricsMiddleware, instrument_sqlalchemy
+from src.services.sql_profiler import SQLProfilerMiddleware, sql_profiler
 
 app = FastAPI()
 
@@ -34,24 +45,87 @@ app.add_middleware(
 app.include_router(contacts.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(internal.router)
+app.include_router(metrics.router)
+
+# Request, SQL and Redis metrics for /metrics
+app.add_middleware(MetricsMiddleware, public_server_timing=settings.server_timing_public)
+instrument_sqlalchemy()
+
+# Per-request SQL profile (X-SQL-Profile header, /internal/sql-profiles)
+app.add_middleware(SQLProfilerMiddleware)
+sql_profiler.install()
+
+# Serve avatars kept in local storage
+if settings.avatar_storage == "local" and settings.avatar_base_url.startswith("/"):
+    app.mount(
+        settings.avatar_base_url,
+        StaticFiles(directory=settings.avatar_local_dir, check_dir=False),
+        name="avatars",
+    )
+
+
+def attach_redis(redis_client):
+    """
+    Hands the shared Redis client to every component that uses it.
+
+    Args:
+        redis_client: Async Redis client (``decode_responses=True``).
+    """
+    limiter.init(redis_client)
+    app.state.redis = redis_client
+    user_cache.init(redis_client)
+    response_cache.init(redis_client)
+    mail_queue.init(redis_client)
+    session_registry.init(redis_client)
+    token_revocations.init(redis_client)
+    login_guard.init(redis_client)
 
 
 @app.on_event("startup")
 async def startup():
     """
-    Initializes Redis on application startup.
+    Initializes Redis and tunes the password hashing policy on application
+    startup.
 
-    Redis is used for request rate limiting via FastAPILimiter.
+    Redis backs:
+    - request rate limiting
+    - the shared tier of the user cache (its invalidation listener starts here)
+    - the shared tier of the contact response cache
+    - the outbound mail queue
+    - the refresh-token session registry
+    - the access token revocation list (its filter sync starts here)
+    - failed login tracking
     """
-    redis_client = redis.Redis(
+    redis_client = InstrumentedRedis(
         host=settings.redis_host,
         port=settings.redis_port,
         db=0,
         encoding="utf-8",
         decode_responses=True,
     )
-    await FastAPILimiter.init(redis_client)
-    app.state.redis = redis_client
+    attach_redis(redis_client)
+    user_cache.start_listener()
+    token_revocations.start_sync()
+    await password_hasher.tune(
+        settings.password_hash_scheme,
+        settings.password_hash_target_ms,
+        settings.password_hash_memory_kib,
+        settings.password_hash_parallelism,
+        settings.password_hash_params,
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Stops the user cache listener, the revocation filter sync and the
+    password hashing and avatar worker pools.
+    """
+    await user_cache.stop_listener()
+    await token_revocations.stop_sync()
+    password_hasher.shutdown()
+    avatar_pipeline.shutdown()
 
 
 @app.get("/")
@@ -1,142 +1,699 @@
-from sqlalchemy.orm import Session
-from src.database.models import Contact, User
-from src.schemas.contacts import ContactCreate, ContactUpdate
-from datetime import datetime, timedelta
+import base64
+import json
+from sqlalchemy import and_, case, delete, false, or_, select, text, true, tuple_, union_all, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.conf.config import settings
+from src.database.models import Contact, ContactTombstone, User, birthday_key, utcnow
+from src.database.search import build_search_statement
+from src.schemas.contacts import ContactCreate, ContactPatch, ContactUpdate
+from src.services.cache import response_cache
+from calendar import isleap
+from datetime import date, datetime, timedelta
 
 
-def create_contact(db: Session, contact: ContactCreate, user: User):
+# Sort orders accepted by get_contacts; "id" is the plain insertion order.
+SORT_COLUMNS = {
+    "id": None,
+    "last_name": Contact.last_name,
+    "birthday": Contact.birthday,
+}
+
+
+def encode_cursor(sort: str, contact: Contact) -> str:
+    """
+    Build an opaque keyset cursor pointing just after the given contact.
+
+    Args:
+        sort (str): Sort order the cursor belongs to.
+        contact (Contact): Last contact of the current page.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    value = getattr(contact, sort)
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, contact.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor (str): Cursor received from the client.
+        sort (str): Sort order of the current request.
+
+    Returns:
+        tuple: ``(sort value, contact id)`` of the last seen contact; the sort
+        value is None when that contact had none.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, contact_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort == "birthday" and value is not None:
+            value = date.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if cursor_sort != sort or not isinstance(contact_id, int):
+        raise ValueError("Cursor does not match sort order")
+    return value, contact_id
+
+
+def encode_sync_token(version: int) -> str:
+    """
+    Build an opaque delta-sync token for a collection version.
+
+    Args:
+        version (int): Version of the user's contacts the client has seen.
+
+    Returns:
+        str: URL-safe token string.
+    """
+    raw = json.dumps(["sync", version], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> int:
+    """
+    Decode a token produced by ``encode_sync_token``.
+
+    Args:
+        token (str): Token received from the client.
+
+    Returns:
+        int: Collection version the token stands for.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        kind, version = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed sync token")
+    if kind != "sync" or not isinstance(version, int) or version < 0:
+        raise ValueError("Malformed sync token")
+    return version
+
+
+# Changes between tombstone pruning runs of a user (on versions divisible by it)
+TOMBSTONE_PRUNE_EVERY = 100
+
+
+async def prune_tombstones(db: AsyncSession, user: User, before: datetime):
+    """
+    Forget a user's tombstones older than ``before``.
+
+    Records the highest pruned version on the user, so sync tokens that
+    predate it are refused instead of silently missing deletes. Runs inside
+    the caller's transaction, from ``bump_contacts_version`` once it has
+    locked the user.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user (User): Owner of the tombstones.
+        before (datetime): Tombstones deleted before this time (UTC) go.
+    """
+    result = await db.execute(
+        delete(ContactTombstone)
+        .where(ContactTombstone.user_id == user.id, ContactTombstone.deleted_at < before)
+        .returning(ContactTombstone.version)
+    )
+    pruned = result.scalars().all()
+    if pruned:
+        # Tombstones are pruned oldest first, so this only ever grows
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(contacts_pruned_version=max(pruned))
+        )
+
+
+async def bump_contacts_version(db: AsyncSession, user: User):
+    """
+    Start a change to a user's contacts by bumping their collection version.
+
+    Must run first in the writing transaction: the row lock on the user
+    serializes concurrent writers, so every change gets its own version and
+    versions are committed in order. Every ``TOMBSTONE_PRUNE_EVERY``th
+    version also prunes tombstones past the retention period, whichever
+    kind of write it is.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user (User): Owner of the contacts being changed.
+
+    Returns:
+        tuple[int, datetime]: New version and the change time (UTC).
+    """
+    now = utcnow()
+    result = await db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(contacts_version=User.contacts_version + 1, contacts_updated_at=now)
+        .returning(User.contacts_version)
+    )
+    version = result.scalar_one()
+    if version % TOMBSTONE_PRUNE_EVERY == 0:
+        retention = timedelta(days=settings.contacts_tombstone_retention_days)
+        await prune_tombstones(db, user, now - retention)
+    return version, now
+
+
+async def get_contacts_version(db: AsyncSession, user: User):
+    """
+    Current version of a user's contact collection, without loading contacts.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user (User): Owner of the contacts.
+
+    Returns:
+        tuple[int, datetime]: Collection version and time of the last change.
+    """
+    result = await db.execute(
+        select(User.contacts_version, User.contacts_updated_at).where(User.id == user.id)
+    )
+    return tuple(result.one())
+
+
+async def create_contact(db: AsyncSession, contact: ContactCreate, user: User):
     """
     Create a new contact for a specific user.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         contact (ContactCreate): Pydantic model with contact data.
         user (User): The user who owns the contact.
 
     Returns:
         Contact: The newly created contact object.
     """
-    new_contact = Contact(**contact.model_dump(), user_id=user.id)
+    version, now = await bump_contacts_version(db, user)
+    new_contact = Contact(
+        **contact.model_dump(), user_id=user.id, version=version, updated_at=now
+    )
     db.add(new_contact)
-    db.commit()
-    db.refresh(new_contact)
+    await db.commit()
+    await response_cache.set_version(user.id, version, now)
+    await db.refresh(new_contact)
     return new_contact
 
 
-def get_contacts(db: Session, user: User):
+# Columns written by bulk_create_contacts, in COPY order
+BULK_COLUMNS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "birthday",
+    "additional_info",
+    "user_id",
+    "birthday_md",
+    "version",
+    "updated_at",
+)
+
+_CREATE_IMPORT_TABLE = text(
+    """
+    CREATE TEMP TABLE IF NOT EXISTS contacts_import (
+        first_name VARCHAR(50),
+        last_name VARCHAR(50),
+        email VARCHAR(100),
+        phone VARCHAR(20),
+        birthday DATE,
+        additional_info VARCHAR(250),
+        user_id INTEGER,
+        birthday_md INTEGER,
+        version INTEGER,
+        updated_at TIMESTAMP
+    ) ON COMMIT DELETE ROWS
+    """
+)
+
+_MOVE_IMPORTED = text(
+    f"""
+    INSERT INTO contacts ({", ".join(BULK_COLUMNS)})
+    SELECT {", ".join(BULK_COLUMNS)} FROM contacts_import
+    ON CONFLICT (email) DO NOTHING
+    RETURNING email
+    """
+)
+
+
+async def _copy_contacts(db: AsyncSession, rows: list[dict]):
+    # Runs inside the session's transaction: the temp table is created through
+    # SQLAlchemy first so asyncpg's COPY joins the same transaction.
+    await db.execute(_CREATE_IMPORT_TABLE)
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        "contacts_import",
+        records=[tuple(row[name] for name in BULK_COLUMNS) for row in rows],
+        columns=BULK_COLUMNS,
+    )
+    return await db.execute(_MOVE_IMPORTED)
+
+
+async def bulk_create_contacts(
+    db: AsyncSession, contacts: list[ContactCreate], user: User
+) -> set[str]:
     """
-    Retrieve all contacts belonging to a specific user.
+    Insert many contacts for a user in one batch, skipping existing emails.
+
+    PostgreSQL loads the batch with COPY into a temporary table and moves it
+    with a single ``INSERT ... SELECT ... ON CONFLICT DO NOTHING``; other
+    databases use a multi-row ``INSERT ... ON CONFLICT DO NOTHING``.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
+        contacts (list[ContactCreate]): Validated contacts, unique by email.
+        user (User): The user who owns the contacts.
+
+    Returns:
+        set[str]: Emails of the contacts actually inserted.
+    """
+    if not contacts:
+        return set()
+    version, now = await bump_contacts_version(db, user)
+    rows = [
+        contact.model_dump()
+        | {
+            "user_id": user.id,
+            "birthday_md": birthday_key(contact.birthday),
+            "version": version,
+            "updated_at": now,
+        }
+        for contact in contacts
+    ]
+    if db.get_bind().dialect.name == "postgresql":
+        result = await _copy_contacts(db, rows)
+    else:
+        stmt = (
+            sqlite_insert(Contact)
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(Contact.email)
+        )
+        result = await db.execute(stmt, rows)
+    inserted = set(result.scalars().all())
+    if inserted:
+        await db.commit()
+        await response_cache.set_version(user.id, version, now)
+    else:
+        await db.rollback()  # nothing changed; keep the collection version
+    return inserted
+
+
+async def get_contacts(
+    db: AsyncSession,
+    user: User,
+    limit: int = 50,
+    cursor: str | None = None,
+    sort: str = "id",
+):
+    """
+    Retrieve one page of contacts belonging to a specific user.
+
+    Pages are keyset-based on ``(user_id, <sort>, id)``, so every page costs
+    a single index range scan regardless of how deep the client has paged.
+    Contacts without a sort value come last on every database (Postgres
+    already orders NULLs last, so its indexes still match).
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
         user (User): The user whose contacts to retrieve.
+        limit (int): Maximum number of contacts in the page.
+        cursor (str | None): Cursor returned with the previous page.
+        sort (str): One of ``SORT_COLUMNS``.
 
     Returns:
-        List[Contact]: List of contact objects.
+        tuple[List[Contact], str | None]: Contacts of the page and the cursor
+        of the next page, or None when this is the last page.
+
+    Raises:
+        ValueError: If the cursor is invalid for the requested sort.
     """
-    return db.query(Contact).filter(Contact.user_id == user.id).all()
+    column = SORT_COLUMNS[sort]
+    stmt = select(Contact).where(Contact.user_id == user.id)
+    if column is None:
+        order_by = (Contact.id,)
+    else:
+        order_by = (column.asc().nulls_last(), Contact.id)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        if column is None:
+            stmt = stmt.where(Contact.id > last_id)
+        elif value is None:
+            # Already among the trailing NULLs
+            stmt = stmt.where(column.is_(None), Contact.id > last_id)
+        else:
+            # A row comparison with NULL is NULL, so the NULLs are added explicitly
+            stmt = stmt.where(or_(tuple_(column, Contact.id) > tuple_(value, last_id), column.is_(None)))
+
+    result = await db.execute(stmt.order_by(*order_by).limit(limit + 1))
+    contacts = result.scalars().all()
+
+    next_cursor = None
+    if len(contacts) > limit:
+        contacts = contacts[:limit]
+        next_cursor = encode_cursor(sort, contacts[-1])
+    return contacts, next_cursor
+
 
+# Columns of an exported contact, in export order
+EXPORT_COLUMNS = (
+    Contact.id,
+    Contact.first_name,
+    Contact.last_name,
+    Contact.email,
+    Contact.phone,
+    Contact.birthday,
+    Contact.additional_info,
+)
 
-def get_contact_by_id(db: Session, contact_id: int, user: User):
+
+async def stream_contact_rows(db: AsyncSession, user_id: int, batch_size: int = 1000):
+    """
+    Stream all contacts of a user as plain rows, one batch at a time.
+
+    Uses a server-side cursor (``yield_per``) and selects columns rather than
+    ORM objects, so memory stays flat however many contacts there are.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (int): Owner of the contacts.
+        batch_size (int): Rows fetched from the cursor per batch.
+
+    Yields:
+        list[Row]: Up to ``batch_size`` rows with the ``EXPORT_COLUMNS`` fields.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(Contact.user_id == user_id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+def _owned(contact_id: int, user: User, versions: list[int] | None = None):
+    # Conditions selecting a user's contact, optionally only at given versions
+    conditions = [Contact.id == contact_id, Contact.user_id == user.id]
+    if versions is not None:
+        conditions.append(Contact.version.in_(versions))
+    return conditions
+
+
+async def get_contact_by_id(
+    db: AsyncSession, contact_id: int, user: User, versions: list[int] | None = None
+):
     """
     Retrieve a single contact by its ID and user.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         contact_id (int): ID of the contact to retrieve.
         user (User): The user who owns the contact.
+        versions (list[int] | None): Only return the contact at one of these
+            versions (If-Match); any version when None.
 
     Returns:
         Contact | None: Contact object if found, otherwise None.
     """
-    return (
-        db.query(Contact)
-        .filter(Contact.id == contact_id, Contact.user_id == user.id)
-        .first()
+    result = await db.execute(select(Contact).where(*_owned(contact_id, user, versions)))
+    return result.scalar_one_or_none()
+
+
+async def get_contact_version(db: AsyncSession, contact_id: int, user: User):
+    """
+    Version and change time of a contact, without loading the contact.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        contact_id (int): ID of the contact.
+        user (User): The user who owns the contact.
+
+    Returns:
+        tuple[int, datetime] | None: Version and time of the last change, or
+        None if the contact does not exist.
+    """
+    result = await db.execute(
+        select(Contact.version, Contact.updated_at).where(*_owned(contact_id, user))
     )
+    row = result.one_or_none()
+    return tuple(row) if row else None
 
 
-def update_contact(db: Session, contact_id: int, data: ContactUpdate, user: User):
+async def update_contact(
+    db: AsyncSession,
+    contact_id: int,
+    data: ContactUpdate | ContactPatch,
+    user: User,
+    versions: list[int] | None = None,
+):
     """
     Update an existing contact by ID for a specific user.
 
+    Runs a single ``UPDATE ... WHERE id = :id AND user_id = :uid RETURNING``
+    instead of loading the contact first (after bumping the collection
+    version). A ``ContactUpdate`` replaces every field; a ``ContactPatch``
+    writes only the fields the client sent.
+
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         contact_id (int): ID of the contact to update.
-        data (ContactUpdate): New contact data.
+        data (ContactUpdate | ContactPatch): New contact data.
         user (User): The user who owns the contact.
+        versions (list[int] | None): Only update the contact at one of these
+            versions (If-Match); any version when None.
 
     Returns:
         Contact | None: Updated contact object if found and updated, otherwise None.
     """
-    contact = get_contact_by_id(db, contact_id, user)
-    if contact:
-        for key, value in data.model_dump().items():
-            setattr(contact, key, value)
-        db.commit()
-        db.refresh(contact)
+    values = data.model_dump(exclude_unset=isinstance(data, ContactPatch))
+    if not values:
+        return await get_contact_by_id(db, contact_id, user, versions)
+    if "birthday" in values:
+        # The validator keeping birthday_md in sync does not run for bulk UPDATEs
+        values["birthday_md"] = birthday_key(values["birthday"])
+    version, now = await bump_contacts_version(db, user)
+    result = await db.execute(
+        update(Contact)
+        .where(*_owned(contact_id, user, versions))
+        .values(**values, version=version, updated_at=now)
+        .returning(Contact)
+    )
+    contact = result.scalar_one_or_none()
+    if contact is None:
+        await db.rollback()
+        return None
+    await db.commit()
+    await response_cache.set_version(user.id, version, now)
     return contact
 
 
-def delete_contact(db: Session, contact_id: int, user: User):
+async def delete_contact(
+    db: AsyncSession, contact_id: int, user: User, versions: list[int] | None = None
+):
     """
     Delete a contact by ID for a specific user.
 
+    Runs a single ``DELETE ... RETURNING`` (after bumping the collection
+    version), so the deleted row is returned without being selected first,
+    and leaves a tombstone for delta sync in the same transaction.
+
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         contact_id (int): ID of the contact to delete.
         user (User): The user who owns the contact.
+        versions (list[int] | None): Only delete the contact at one of these
+            versions (If-Match); any version when None.
 
     Returns:
         Contact | None: Deleted contact object if found and removed, otherwise None.
     """
-    contact = get_contact_by_id(db, contact_id, user)
-    if contact:
-        db.delete(contact)
-        db.commit()
+    version, now = await bump_contacts_version(db, user)
+    result = await db.execute(
+        delete(Contact)
+        .where(*_owned(contact_id, user, versions))
+        .returning(Contact)
+    )
+    contact = result.scalar_one_or_none()
+    if contact is None:
+        await db.rollback()
+        return None
+    db.add(ContactTombstone(contact_id=contact.id, user_id=user.id, version=version, deleted_at=now))
+    await db.commit()
+    await response_cache.set_version(user.id, version, now)
     return contact
 
 
-def search_contacts(query: str, db: Session, user: User):
+async def get_changes(db: AsyncSession, user: User, since: int | None, limit: int = 500):
+    """
+    Contacts created, updated or deleted after a collection version.
+
+    Changed contacts and tombstones are found through the ``(user_id,
+    version)`` indexes, so the cost grows with the number of changes, not
+    with the size of the address book. A page never splits the changes of
+    one version (a bulk import is one version), so it may exceed ``limit``
+    when a single version holds more changes.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user (User): Owner of the contacts.
+        since (int | None): Version the client has seen; None for a full sync.
+        limit (int): Changes per page.
+
+    Returns:
+        tuple[List[Contact], List[int], int, bool]: Changed contacts in change
+        order, ids of deleted contacts, the version the client has seen after
+        applying the page, and whether more changes follow.
+
+    Raises:
+        ValueError: If tombstones after ``since`` were already pruned.
+    """
+    result = await db.execute(
+        select(User.contacts_version, User.contacts_pruned_version).where(User.id == user.id)
+    )
+    current, pruned = result.one()
+    if since is not None and since < pruned:
+        raise ValueError("Sync token expired")
+    since = since or 0
+
+    # Only changes up to the version read above: later ones come next time
+    def changes(version_filter):
+        live = select(
+            Contact.id, Contact.version, false().label("deleted")
+        ).where(Contact.user_id == user.id, version_filter(Contact.version))
+        if since == 0:
+            return live  # a full sync has nothing to delete
+        gone = select(
+            ContactTombstone.contact_id, ContactTombstone.version, true().label("deleted")
+        ).where(ContactTombstone.user_id == user.id, version_filter(ContactTombstone.version))
+        return union_all(live, gone)
+
+    stmt = changes(lambda column: column.between(since + 1, current))
+    rows = (await db.execute(stmt.order_by("version").limit(limit + 1))).all()
+
+    has_more = len(rows) > limit
+    if has_more:
+        boundary = rows[limit].version
+        if rows[0].version == boundary:
+            # One version holds more than a page: return all of it
+            stmt = changes(lambda column: column == boundary)
+            rows = (await db.execute(stmt)).all()
+            seen = boundary
+        else:
+            rows = [row for row in rows[:limit] if row.version < boundary]
+            seen = boundary - 1
+        has_more = seen < current
+    else:
+        seen = current
+
+    deleted = [row.id for row in rows if row.deleted]
+    changed_ids = [row.id for row in rows if not row.deleted]
+    contacts = []
+    if changed_ids:
+        result = await db.execute(
+            select(Contact)
+            .where(Contact.user_id == user.id, Contact.id.in_(changed_ids))
+            .order_by(Contact.version, Contact.id)
+        )
+        contacts = result.scalars().all()
+    return contacts, deleted, max(seen, since), has_more
+
+
+async def search_contacts(query: str, db: AsyncSession, user: User, limit: int = 20):
     """
     Search contacts by name or email for a specific user.
 
+    Words in the query are prefix-matched against the full-text index of the
+    current database (see ``src.database.search``) and results are ranked by
+    relevance.
+
     Args:
         query (str): Search string for first name, last name, or email.
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         user (User): The user whose contacts to search.
+        limit (int): Maximum number of contacts to return.
 
     Returns:
-        List[Contact]: Matching contact objects.
+        List[Contact]: Matching contact objects, best match first.
     """
-    return (
-        db.query(Contact)
-        .filter(Contact.user_id == user.id)
-        .filter(
-            (Contact.first_name.ilike(f"%{query}%"))
-            | (Contact.last_name.ilike(f"%{query}%"))
-            | (Contact.email.ilike(f"%{query}%"))
-        )
-        .all()
-    )
+    stmt = build_search_statement(db.get_bind().dialect.name, query, user.id, limit)
+    if stmt is None:
+        return []
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+def birthday_window(today: date, days: int):
+    """
+    Translate ``[today, today + days]`` into a range of month-day keys.
+
+    Feb 29 birthdays are celebrated on Feb 28 in non-leap years, so a window
+    ending on Feb 28 of a non-leap year is stretched to include them.
 
+    Args:
+        today (date): First day of the window.
+        days (int): Length of the window in days.
 
-def upcoming_birthdays(db: Session, user: User):
+    Returns:
+        tuple[int, int, bool]: Start key, end key and whether the window wraps
+        over the end of the year (start key > end key).
     """
-    Get contacts with birthdays in the next 7 days.
+    end = today + timedelta(days=days)
+    start_md = birthday_key(today)
+    end_md = birthday_key(end)
+    if end_md == 228 and not isleap(end.year):
+        end_md = 229
+    wraps = end.year > today.year
+    return start_md, end_md, wraps
+
+
+async def upcoming_birthdays(
+    db: AsyncSession, user: User, days: int = 7, today: date | None = None
+):
+    """
+    Get contacts with birthdays in the next ``days`` days.
+
+    Matches on the indexed month-day key, so lookups use
+    ``(user_id, birthday_md)`` and work across the new year.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         user (User): The user whose contacts to check.
+        days (int): Size of the window in days, today included.
+        today (date | None): First day of the window, defaults to today.
 
     Returns:
-        List[Contact]: Contacts with birthdays within the next 7 days.
+        List[Contact]: Contacts with birthdays within the window, soonest first.
     """
-    today = datetime.today().date()
-    next_week = today + timedelta(days=7)
-    return (
-        db.query(Contact)
-        .filter(Contact.user_id == user.id)
-        .filter(Contact.birthday.between(today, next_week))
-        .all()
+    today = today or datetime.today().date()
+    stmt = select(Contact).where(Contact.user_id == user.id)
+    if days >= 365:
+        stmt = stmt.where(Contact.birthday_md.is_not(None))
+    else:
+        start_md, end_md, wraps = birthday_window(today, days)
+        if wraps:
+            stmt = stmt.where(
+                or_(Contact.birthday_md >= start_md, Contact.birthday_md <= end_md)
+            )
+        else:
+            stmt = stmt.where(Contact.birthday_md.between(start_md, end_md))
+
+    # Birthdays still ahead this year first, then those falling next year
+    next_year_first = case((Contact.birthday_md >= birthday_key(today), 0), else_=1)
+    result = await db.execute(
+        stmt.order_by(next_year_first, Contact.birthday_md, Contact.id)
     )
+    return result.scalars().all()
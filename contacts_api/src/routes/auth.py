@@ -1,19 +1,23 @@
 import secrets
+from datetime import datetime, timezone
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException, Request, status, Security
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
-from src.schemas.users import RequestResetModel, ResetPasswordModel, UserModel, UserResponse, TokenModel
+from src.database.models import User
+from src.schemas.users import RequestResetModel, ResetPasswordModel, SessionResponse, UserModel, UserResponse, TokenModel
 from src.repository import users as repository_users
-from src.services.auth import auth_service
+from src.services.auth import TokenClaims, auth_service
 from src.services.email import send_reset_email, send_verification_email
 from src.services.security import oauth2_scheme, http_bearer
-
-import json
-from src.services.deps import get_redis
-from src.services.auth import REDIS_KEY, REDIS_TTL
+from src.services.cache import user_cache
+from src.services.login_guard import login_guard
+from src.services.rate_limit import client_ip
+from src.services.revocation import token_revocations
+from src.services.sessions import session_registry
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -27,12 +31,13 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 #   201 – user created
 #   409 – email already registered
 @router.post("/signup", response_model=UserResponse, status_code=201)
-async def signup(body: UserModel, db: Session = Depends(get_db)):
+async def signup(body: UserModel, db: AsyncSession = Depends(get_db)):
     if await repository_users.get_user_by_email(body.email, db):
         raise HTTPException(status_code=409, detail="Account already exists")
 
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.get_password_hash(body.password)
     user = await repository_users.create_user(body, db)
+    await login_guard.forget_unknown(user.email)
 
     token = await auth_service.create_email_token({"sub": user.email})
     await send_verification_email(user.email, token)
@@ -40,93 +45,132 @@ async def signup(body: UserModel, db: Session = Depends(get_db)):
 
 
 # Route: POST /auth/login
-# Purpose: Authenticate user and issue access & refresh tokens
+# Purpose: Authenticate user and issue access & refresh tokens; a password
+#          hash made under an older hashing policy is replaced
 # Method: POST
 # Accepts: OAuth2PasswordRequestForm (username, password)
 # Returns: TokenModel (access_token, refresh_token, token_type)
 # Status Codes:
 #   401 – invalid credentials or email not verified
+#   429 – too many failed attempts for the email or client IP (Retry-After)
+#   503 – session store unavailable
 @router.post("/login", response_model=TokenModel)
 async def login(
+    request: Request,
     form: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
-    redis=Depends(get_redis),  
+    db: AsyncSession = Depends(get_db),
 ):
+    # Locked out or known not to exist: refused before any query or hashing
+    ip = client_ip(request)
+    check = await login_guard.check(form.username, ip)
+    if check.unknown:
+        await login_guard.failure(None, ip)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
     user = await repository_users.get_user_by_email(form.username, db)
-    if not user or not auth_service.verify_password(form.password, user.password):
+    if not user:
+        await login_guard.remember_unknown(form.username)
+        await login_guard.failure(None, ip)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await auth_service.verify_and_update_password(form.password, user.password)
+    if not valid:
+        await login_guard.failure(user.email, ip)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    await login_guard.success(user.email)
     if not user.confirmed:
         raise HTTPException(status_code=401, detail="Email not verified")
-
-    access = await auth_service.create_access_token({"sub": user.email})
-    refresh = await auth_service.create_refresh_token({"sub": user.email})
-    await repository_users.update_token(user, refresh, db)
-
-    await redis.set(
-        REDIS_KEY.format(email=user.email),
-        json.dumps(
-            {
-                "id": user.id,
-                "email": user.email,
-                "confirmed": user.confirmed,
-                "avatar": user.avatar,
-            }
-        ),
-        ex=REDIS_TTL,
+    if new_hash:
+        await repository_users.update_password(user.email, new_hash, db)
+
+    # Every login is its own session, so several devices stay signed in
+    sid, jti = await session_registry.create(user.email, request.headers.get("user-agent"))
+    access = await auth_service.create_access_token({"sub": user.email, "sid": sid})
+    refresh = await auth_service.create_refresh_token(
+        {"sub": user.email, "sid": sid, "jti": jti}
     )
+    await user_cache.store(user)
 
     return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
 
 
 # Route: GET /auth/refresh_token
-# Purpose: Refresh access & refresh tokens
+# Purpose: Rotate the session's refresh token and issue a new access token
 # Method: GET
 # Accepts: Bearer token (refresh token)
 # Returns: TokenModel
 # Status Codes:
-#   401 – invalid or expired refresh token
+#   401 – invalid, expired, revoked or already used refresh token
+#         (reusing an older one revokes the session)
+#   503 – session store unavailable
 @router.get("/refresh_token", response_model=TokenModel)
-async def refresh_token(
-    cred: HTTPAuthorizationCredentials = Security(http_bearer),
-    db: Session = Depends(get_db),
-):
-    token = cred.credentials
-    email = await auth_service.decode_refresh_token(token)
-
-    user = await repository_users.get_user_by_email(email, db)
-    if user.refresh_token != token:
-        await repository_users.update_token(user, None, db)
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
-
-    access = await auth_service.create_access_token({"sub": email})
-    refresh = await auth_service.create_refresh_token({"sub": email})
-    await repository_users.update_token(user, refresh, db)
+async def refresh_token(cred: HTTPAuthorizationCredentials = Security(http_bearer)):
+    claims = await auth_service.decode_refresh_token(cred.credentials)
+    email, sid = claims["sub"], claims["sid"]
+
+    # Served from Redis alone: no database round trip
+    jti = await session_registry.rotate(email, sid, claims["jti"])
+    access = await auth_service.create_access_token({"sub": email, "sid": sid})
+    refresh = await auth_service.create_refresh_token({"sub": email, "sid": sid, "jti": jti})
     return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
 
 
 # Route: POST /auth/logout
-# Purpose: Logout the user and clear refresh token
+# Purpose: Logout the user, revoke the access token and end its session
 # Method: POST
 # Accepts: Bearer token (access token)
 # Returns: 204 No Content
+# Status Codes:
+#   401 – invalid or revoked access token
+#   503 – session store unavailable
 @router.post("/logout", status_code=204)
-async def logout(
-    cred: HTTPAuthorizationCredentials = Security(http_bearer),
-    db: Session = Depends(get_db),
-    redis=Depends(get_redis), 
+async def logout(claims: TokenClaims = Depends(auth_service.get_token_claims)):
+    # A revoked token leaves the token cache the next time it is presented
+    if claims.jti and claims.exp:
+        await token_revocations.revoke(claims.jti, claims.exp)
+    if claims.email:
+        if claims.sid:
+            await session_registry.revoke(claims.email, claims.sid)
+        await user_cache.invalidate(claims.email)
+
+
+# Route: GET /auth/sessions
+# Purpose: List the devices the user is logged in on
+# Method: GET
+# Accepts: Bearer token (access token)
+# Returns: List[SessionResponse], most recently used first
+# Status Codes:
+#   401 – invalid access token
+#   503 – session store unavailable
+@router.get("/sessions", response_model=List[SessionResponse])
+async def list_sessions(
+    claims: TokenClaims = Depends(auth_service.get_token_claims),
+    user: User = Depends(auth_service.get_current_user),
 ):
-    token = cred.credentials
-    try:
-        email = jwt.decode(
-            token, auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM]
-        ).get("sub")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    user = await repository_users.get_user_by_email(email, db)
-    if user:
-        await repository_users.update_token(user, None, db)
-        await redis.delete(REDIS_KEY.format(email=email)) 
+    return [
+        SessionResponse(
+            sid=s["sid"],
+            device=s["device"],
+            created_at=datetime.fromtimestamp(s["created"], timezone.utc),
+            last_used_at=datetime.fromtimestamp(s["last_used"], timezone.utc),
+            current=s["sid"] == claims.sid,
+        )
+        for s in await session_registry.list(user.email)
+    ]
+
+
+# Route: DELETE /auth/sessions/{sid}
+# Purpose: Log out one device (its refresh token stops working)
+# Method: DELETE
+# Accepts: Session id in path, Bearer token (access token)
+# Returns: 204 No Content
+# Status Codes:
+#   401 – invalid access token
+#   404 – no such session for this user
+#   503 – session store unavailable
+@router.delete("/sessions/{sid}", status_code=204)
+async def revoke_session(sid: str, user: User = Depends(auth_service.get_current_user)):
+    if not await session_registry.revoke(user.email, sid):
+        raise HTTPException(status_code=404, detail="Session not found")
 
 
 # Route: GET /auth/confirm_email/{token}
@@ -137,7 +181,7 @@ async def logout(
 # Status Codes:
 #   404 – user not found
 @router.get("/confirm_email/{token}")
-async def confirm_email(token: str, db: Session = Depends(get_db)):
+async def confirm_email(token: str, db: AsyncSession = Depends(get_db)):
     email = await auth_service.get_email_from_token(token)
     user = await repository_users.get_user_by_email(email, db)
     if not user:
@@ -158,7 +202,7 @@ async def confirm_email(token: str, db: Session = Depends(get_db)):
 #   404 – user not found
 @router.post("/request-reset-password")
 async def request_reset_password(
-    body: RequestResetModel, request: Request, db: Session = Depends(get_db)
+    body: RequestResetModel, request: Request, db: AsyncSession = Depends(get_db)
 ):
     user = await repository_users.get_user_by_email(body.email, db)
     if not user:
@@ -185,7 +229,7 @@ async def request_reset_password(
 #   400 – invalid or expired token
 @router.post("/reset-password")
 async def reset_password(
-    body: ResetPasswordModel, request: Request, db: Session = Depends(get_db)
+    body: ResetPasswordModel, request: Request, db: AsyncSession = Depends(get_db)
 ):
     redis_key = f"reset:{body.email}"
     token_from_redis = await request.app.state.redis.get(redis_key)
@@ -193,8 +237,19 @@ async def reset_password(
     if not token_from_redis or token_from_redis != body.token:
         raise HTTPException(status_code=400, detail="Неверный или истёкший токен")
 
-    hashed_password = auth_service.get_password_hash(body.new_password)
+    hashed_password = await auth_service.get_password_hash(body.new_password)
     await repository_users.update_password(body.email, hashed_password, db)
     await request.app.state.redis.delete(redis_key)
+    # A new password signs out every device
+    await session_registry.revoke_all(body.email)
 
     return {"message": "Пароль успешно обновлён"}
+
+
+# Route: GET /auth/jwks.json
+# Purpose: Publish the public token verification keys (JWK Set)
+# Method: GET
+# Returns: {"keys": [...]}; empty while tokens are signed with shared secrets
+@router.get("/jwks.json")
+async def jwks():
+    return auth_service.tokens.jwks()
@@ -1,126 +1,341 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Literal, Optional
 from src.schemas.contacts import *
-from src.database.db import get_db
+from src.database.db import get_db, get_sessionmaker
 from src.repository import contacts as repo
 from src.database.models import User
 from src.services.auth import auth_service
-from fastapi_limiter.depends import RateLimiter
+from src.services import conditional
+from src.services.cache import response_cache
+from src.services.contact_export import MEDIA_TYPES, accepts_gzip, export_contacts, gzip_stream
+from src.services.contact_import import detect_format, import_contacts
+from src.services.rate_limit import RateLimit
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+CONTACT_LIST = TypeAdapter(List[ContactResponse])
+
+
+def _json(body: bytes, headers: dict | None = None) -> Response:
+    # Cached responses are stored serialized and sent as they are
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _contacts_version(db: AsyncSession, user: User):
+    return await response_cache.version(user.id, lambda: repo.get_contacts_version(db, user))
+
 
 # Route: POST /contacts/
 # Purpose: Create a new contact for the authenticated user
 # Method: POST
 # Accepts: ContactCreate
-# Returns: ContactResponse
+# Returns: ContactResponse, with ETag / Last-Modified of the new contact
 @router.post(
     "/",
     response_model=ContactResponse,
     status_code=201,
-    dependencies=[Depends(RateLimiter(times=2, seconds=300))],
+    dependencies=[Depends(RateLimit("contacts:create", user="2/300", ip="20/300"))],
 )
-def create(
+async def create(
     contact: ContactCreate,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    new_contact = await repo.create_contact(db, contact, current_user)
+    response.headers.update(conditional.validators(new_contact.version, new_contact.updated_at))
+    return new_contact
+
+
+async def _not_written(db: AsyncSession, contact_id: int, user: User, versions):
+    # A write matched no row: the contact is missing, or If-Match failed
+    if versions is not None and await repo.get_contact_by_id(db, contact_id, user):
+        return HTTPException(status_code=412, detail="Contact was modified")
+    return HTTPException(status_code=404, detail="Contact not found")
+
+
+# Route: POST /contacts/bulk
+# Purpose: Import many contacts from a CSV or JSON Lines file
+# Method: POST
+# Accepts: Multipart file (CSV with a header row, or one JSON object per line),
+#          format (csv | jsonl, optional – guessed from file name / content type)
+# Returns: ContactImportResult (inserted / failed counts and per-row errors)
+# Status Codes:
+#   400 – unknown file format
+@router.post(
+    "/bulk",
+    response_model=ContactImportResult,
+    dependencies=[Depends(RateLimit("contacts:bulk", user="5/3600"))],
+)
+async def bulk_import(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    return repo.create_contact(db, contact, current_user)
+    fmt = format or detect_format(file)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400, detail="Unsupported file format, use CSV or JSON Lines"
+        )
+    return await import_contacts(db, file, fmt, current_user)
 
 
 # Route: GET /contacts/
-# Purpose: Retrieve all contacts of the authenticated user
+# Purpose: Retrieve contacts of the authenticated user, one page at a time
+# Method: GET
+# Accepts: limit (int), cursor (str, from previous page), sort (id | last_name | birthday),
+#          If-None-Match / If-Modified-Since headers
+# Returns: ContactPage, with ETag / Last-Modified of the whole collection
+#          (served from the response cache while no contact changed)
+# Status Codes:
+#   304 – no contact changed since the client's copy (answered without reading contacts)
+#   400 – invalid cursor
+@router.get("/", response_model=ContactPage)
+async def read_all(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "last_name", "birthday"] = "id",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    # Read the version before the page: a change in between then only costs
+    # the client one unnecessary 200 later, never a stale 304
+    version, updated_at = await _contacts_version(db, current_user)
+    headers = conditional.validators(version, updated_at)
+    if conditional.not_modified(request, version, updated_at):
+        return Response(status_code=304, headers=headers)
+
+    async def render():
+        try:
+            items, next_cursor = await repo.get_contacts(
+                db, current_user, limit=limit, cursor=cursor, sort=sort
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        page = ContactPage.model_validate(
+            {"items": items, "next_cursor": next_cursor}, from_attributes=True
+        )
+        return page.model_dump_json().encode()
+
+    key = response_cache.key(
+        current_user.id, version, "contacts:list", {"limit": limit, "cursor": cursor, "sort": sort}
+    )
+    return _json(await response_cache.get_or_render(key, render), headers)
+
+
+# Route: GET /contacts/export
+# Purpose: Download all contacts of the authenticated user as a file
 # Method: GET
-# Returns: List of ContactResponse
-@router.get("/", response_model=List[ContactResponse])
-def read_all(
-    db: Session = Depends(get_db),
+# Accepts: format (csv | ndjson); gzip-compressed when the client's
+#          Accept-Encoding allows gzip (a q-value of 0 refuses it)
+# Returns: Streamed CSV (with header row) or NDJSON file
+@router.get("/export")
+async def export(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    session_factory=Depends(get_sessionmaker),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    return repo.get_contacts(db, current_user)
+    body = export_contacts(session_factory, current_user.id, format)
+    headers = {
+        "Content-Disposition": f'attachment; filename="contacts.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+# Route: GET /contacts/changes
+# Purpose: Delta sync – contacts created, updated or deleted since a sync token
+# Method: GET
+# Accepts: since (str, next_token of the previous sync; omit for a full sync),
+#          limit (int, changes per page)
+# Returns: ContactChanges (changed contacts, deleted ids, next_token, has_more)
+# Status Codes:
+#   400 – invalid sync token
+#   410 – sync token too old (deletes were forgotten); resync without since
+@router.get("/changes", response_model=ContactChanges)
+async def changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    try:
+        version = repo.decode_sync_token(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    try:
+        changed, deleted, seen, has_more = await repo.get_changes(
+            db, current_user, version, limit=limit
+        )
+    except ValueError:
+        raise HTTPException(status_code=410, detail="Sync token expired, resync without since")
+    return {
+        "changed": changed,
+        "deleted": deleted,
+        "next_token": repo.encode_sync_token(seen),
+        "has_more": has_more,
+    }
 
 
 # Route: GET /contacts/{contact_id}
 # Purpose: Retrieve a single contact by ID
 # Method: GET
-# Accepts: contact_id (int)
-# Returns: ContactResponse
+# Accepts: contact_id (int), If-None-Match / If-Modified-Since headers
+# Returns: ContactResponse, with ETag / Last-Modified
 # Status Codes:
+#   304 – the client's copy (If-None-Match / If-Modified-Since) is current
 #   404 – contact not found
 @router.get("/{contact_id}", response_model=ContactResponse)
-def read_one(
+async def read_one(
     contact_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    contact = repo.get_contact_by_id(db, contact_id, current_user)
+    if conditional.is_conditional(request):
+        # Revalidation only reads the version, not the contact
+        current = await repo.get_contact_version(db, contact_id, current_user)
+        if current and conditional.not_modified(request, *current):
+            return Response(status_code=304, headers=conditional.validators(*current))
+    contact = await repo.get_contact_by_id(db, contact_id, current_user)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
+    response.headers.update(conditional.validators(contact.version, contact.updated_at))
     return contact
 
 
 # Route: PUT /contacts/{contact_id}
 # Purpose: Update a contact by ID
 # Method: PUT
-# Accepts: contact_id (int), ContactUpdate
-# Returns: ContactResponse
+# Accepts: contact_id (int), ContactUpdate, optional If-Match header
+# Returns: ContactResponse, with the new ETag / Last-Modified
 # Status Codes:
 #   404 – contact not found
+#   412 – If-Match does not match the contact's current ETag
 @router.put("/{contact_id}", response_model=ContactResponse)
-def update(
+async def update(
     contact_id: int,
     contact: ContactUpdate,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    updated_contact = repo.update_contact(db, contact_id, contact, current_user)
+    versions = conditional.if_match_versions(if_match)
+    updated_contact = await repo.update_contact(db, contact_id, contact, current_user, versions)
     if not updated_contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
+        raise await _not_written(db, contact_id, current_user, versions)
+    response.headers.update(conditional.validators(updated_contact.version, updated_contact.updated_at))
+    return updated_contact
+
+
+# Route: PATCH /contacts/{contact_id}
+# Purpose: Partially update a contact by ID; only the fields sent are written
+# Method: PATCH
+# Accepts: contact_id (int), ContactPatch, optional If-Match header
+# Returns: ContactResponse, with the new ETag / Last-Modified
+# Status Codes:
+#   404 – contact not found
+#   412 – If-Match does not match the contact's current ETag
+#   422 – invalid field value (null is accepted for additional_info only)
+@router.patch("/{contact_id}", response_model=ContactResponse)
+async def patch(
+    contact_id: int,
+    contact: ContactPatch,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    versions = conditional.if_match_versions(if_match)
+    updated_contact = await repo.update_contact(db, contact_id, contact, current_user, versions)
+    if not updated_contact:
+        raise await _not_written(db, contact_id, current_user, versions)
+    response.headers.update(conditional.validators(updated_contact.version, updated_contact.updated_at))
     return updated_contact
 
 
 # Route: DELETE /contacts/{contact_id}
 # Purpose: Delete a contact by ID
 # Method: DELETE
-# Accepts: contact_id (int)
+# Accepts: contact_id (int), optional If-Match header
 # Returns: Deleted ContactResponse
 # Status Codes:
 #   404 – contact not found
+#   412 – If-Match does not match the contact's current ETag
 @router.delete("/{contact_id}", response_model=ContactResponse)
-def delete(
+async def delete(
     contact_id: int,
-    db: Session = Depends(get_db),
+    if_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    deleted_contact = repo.delete_contact(db, contact_id, current_user)
+    versions = conditional.if_match_versions(if_match)
+    deleted_contact = await repo.delete_contact(db, contact_id, current_user, versions)
     if not deleted_contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
+        raise await _not_written(db, contact_id, current_user, versions)
     return deleted_contact
 
 
 # Route: GET /contacts/search/{query}
-# Purpose: Search contacts by name or email
+# Purpose: Search contacts by name or email (prefix match, ranked by relevance)
 # Method: GET
-# Accepts: query (str)
-# Returns: List of ContactResponse
-@router.get("/search/{query}", response_model=List[ContactResponse])
-def search(
+# Accepts: query (str), limit (int)
+# Returns: List of ContactResponse (served from the response cache while no
+#          contact changed)
+@router.get(
+    "/search/{query}",
+    response_model=List[ContactResponse],
+    dependencies=[Depends(RateLimit("contacts:search", user="120/60", batch=5))],
+)
+async def search(
     query: str,
-    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    return repo.search_contacts(query, db, current_user)
+    async def render():
+        contacts = await repo.search_contacts(query, db, current_user, limit=limit)
+        return CONTACT_LIST.dump_json(CONTACT_LIST.validate_python(contacts, from_attributes=True))
+
+    version, _ = await _contacts_version(db, current_user)
+    key = response_cache.key(
+        current_user.id, version, "contacts:search", {"query": query, "limit": limit}
+    )
+    return _json(await response_cache.get_or_render(key, render))
 
 
 # Route: GET /contacts/birthdays/upcoming
-# Purpose: Get contacts with birthdays in the upcoming 7 days
+# Purpose: Get contacts with birthdays in the upcoming days (7 by default)
 # Method: GET
-# Returns: List of ContactResponse
+# Accepts: days (int)
+# Returns: List of ContactResponse (served from the response cache while no
+#          contact changed, for the current day)
 @router.get("/birthdays/upcoming", response_model=List[ContactResponse])
-def birthdays(
-    db: Session = Depends(get_db),
+async def birthdays(
+    days: int = Query(7, ge=0, le=366),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    return repo.upcoming_birthdays(db, current_user)
+    today = datetime.today().date()
+
+    async def render():
+        contacts = await repo.upcoming_birthdays(db, current_user, days=days, today=today)
+        return CONTACT_LIST.dump_json(CONTACT_LIST.validate_python(contacts, from_attributes=True))
+
+    version, _ = await _contacts_version(db, current_user)
+    key = response_cache.key(
+        current_user.id, version, "contacts:birthdays", {"days": days, "today": today}
+    )
+    return _json(await response_cache.get_or_render(key, render))
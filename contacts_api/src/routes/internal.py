@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+
+from src.database.db import engine
+from src.database.pool import pool_stats
+from src.services.deps import require_internal_key
+from src.services.sql_profiler import sql_profiler
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_key)],
+)
+
+
+# Route: GET /internal/db-pool
+# Purpose: Live connection pool statistics of the worker serving the request
+# Method: GET
+# Returns: pool size, checked-in / checked-out connections, overflow,
+#          checkout wait histogram and timeouts
+# Status Codes:
+#   403 – missing or wrong X-Internal-Key
+#   404 – no internal key configured and internal_api_open is off
+@router.get("/db-pool")
+async def db_pool():
+    return pool_stats(engine)
+
+
+# Route: GET /internal/sql-profiles
+# Purpose: SQL statements of the latest requests profiled by this worker
+# Method: GET
+# Returns: whether profiling is enabled, thresholds, and per request the
+#          statements with timings, query plans of slow ones and repeated
+#          statements (possible N+1)
+# Status Codes:
+#   403 – missing or wrong X-Internal-Key
+#   404 – no internal key configured and internal_api_open is off
+@router.get("/sql-profiles")
+async def sql_profiles():
+    return {
+        "enabled": sql_profiler.enabled,
+        "slow_ms": sql_profiler.slow_seconds * 1000,
+        "repeat_threshold": sql_profiler.repeat_threshold,
+        "profiles": list(reversed(sql_profiler.profiles)),
+    }
@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from src.database.db import engine
+from src.database.pool import pool_stats
+from src.services.auth import auth_service
+from src.services.cache import response_cache, user_cache
+from src.services.deps import require_internal_key
+from src.services.hashing import password_hasher
+from src.services.login_guard import login_guard
+from src.services.metrics import CONTENT_TYPE, registry
+from src.services.revocation import token_revocations
+
+router = APIRouter(
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_key)],
+)
+
+
+@registry.collector
+def cache_metrics():
+    token_cache, local = auth_service.token_cache, user_cache.local
+    counts = {
+        ("token", "hit"): token_cache.hits,
+        ("token", "miss"): token_cache.misses,
+        ("user_local", "hit"): local.hits,
+        ("user_local", "miss"): local.misses,
+        ("user_redis", "hit"): user_cache.redis_hits,
+        ("user_redis", "miss"): user_cache.redis_misses,
+        ("response_local", "hit"): response_cache.local.hits,
+        ("response_local", "miss"): response_cache.local.misses,
+        ("response_redis", "hit"): response_cache.redis_hits,
+        ("response_redis", "miss"): response_cache.redis_misses,
+    }
+    return [
+        (
+            "cache_requests_total",
+            "counter",
+            "Lookups in the token, user and contact response caches.",
+            [
+                f'cache_requests_total{{cache="{cache}",result="{result}"}} {count}'
+                for (cache, result), count in counts.items()
+            ],
+        )
+    ]
+
+
+@registry.collector
+def token_revocation_metrics():
+    revocations = token_revocations
+    return [
+        ("token_revocation_checks_total", "counter", "Access token revocation checks by outcome.", [
+            f'token_revocation_checks_total{{result="clear"}} {revocations.checks - revocations.positives}',
+            f'token_revocation_checks_total{{result="false_positive"}} {revocations.positives - revocations.revoked}',
+            f'token_revocation_checks_total{{result="revoked"}} {revocations.revoked}',
+        ]),
+        ("token_revocation_filter_entries", "gauge", "Revoked token ids in this worker's filter.", [
+            f"token_revocation_filter_entries {revocations.bloom.count}",
+        ]),
+    ]
+
+
+@registry.collector
+def login_guard_metrics():
+    return [
+        ("login_guard_total", "counter", "Login attempts stopped or failed, by outcome.", [
+            f'login_guard_total{{result="locked"}} {login_guard.locked}',
+            f'login_guard_total{{result="unknown_user"}} {login_guard.unknown_hits}',
+            f'login_guard_total{{result="failed"}} {login_guard.failures}',
+        ]),
+    ]
+
+
+@registry.collector
+def password_hashing_metrics():
+    stats = password_hasher.stats()
+    completed = stats["completed"]
+    return [
+        ("password_hash_jobs_total", "counter", "Password hashing jobs by outcome.", [
+            f'password_hash_jobs_total{{result="completed"}} {completed}',
+            f'password_hash_jobs_total{{result="rejected"}} {stats["rejected"]}',
+        ]),
+        ("password_hash_pending", "gauge", "Password hashing jobs in flight.", [
+            f'password_hash_pending {stats["pending"]}',
+        ]),
+        ("password_hash_seconds_total", "counter", "Time spent hashing, by phase.", [
+            f'password_hash_seconds_total{{phase="wait"}} {stats["avg_wait_seconds"] * completed}',
+            f'password_hash_seconds_total{{phase="run"}} {stats["avg_run_seconds"] * completed}',
+        ]),
+    ]
+
+
+@registry.collector
+def db_pool_metrics():
+    stats = pool_stats(engine)
+    families = [
+        (f"db_pool_{name}", "gauge", f"Connection pool {name}.", [f"db_pool_{name} {stats[name]}"])
+        for name in ("size", "checkedin", "checkedout", "overflow")
+        if name in stats
+    ]
+    wait = stats["checkout_wait"]
+    samples = [
+        f'db_pool_checkout_wait_seconds_bucket{{le="{bound}"}} {count}'
+        for bound, count in wait["buckets"].items()
+    ]
+    samples.append(f"db_pool_checkout_wait_seconds_sum {wait['sum']}")
+    samples.append(f"db_pool_checkout_wait_seconds_count {wait['count']}")
+    families.append(
+        ("db_pool_checkout_wait_seconds", "histogram", "Connection checkout wait.", samples)
+    )
+    families.append((
+        "db_pool_checkout_timeouts_total", "counter", "Connection checkouts that timed out.",
+        [f"db_pool_checkout_timeouts_total {wait['timeouts']}"],
+    ))
+    return families
+
+
+# Route: GET /metrics
+# Purpose: Metrics of the worker serving the request, for Prometheus
+# Method: GET
+# Returns: Prometheus text exposition format
+# Status Codes:
+#   403 – missing or wrong X-Internal-Key
+#   404 – no internal key configured and internal_api_open is off
+@router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -1,13 +1,11 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
+from fastapi import APIRouter, Depends, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.conf.config import settings
+from src.services.avatars import avatar_pipeline
 from src.schemas.users import UserResponse
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -25,8 +23,11 @@ async def read_me(current_user: User = Depends(auth_service.get_current_user)):
 # Route: PATCH /users/avatar
 # Purpose: Upload or update user's avatar (image)
 # Method: PATCH
-# Accepts: Multipart file
+# Accepts: Multipart file (image, size-capped)
 # Returns: Updated UserResponse with avatar URL
+# Status Codes:
+#   400 – empty file or not an image
+#   413 – file larger than the configured limit
 @router.patch(
     "/avatar",
     response_model=UserResponse,
@@ -36,28 +37,9 @@ async def read_me(current_user: User = Depends(auth_service.get_current_user)):
 async def update_avatar(
     file: UploadFile = File(...),
     current_user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True,
-    )
-
- 
-    upload_result = cloudinary.uploader.upload(
-        file.file,
-        public_id=f"ContactApp/{current_user.id}",
-        overwrite=True,
-    )
-
-  
-    avatar_url = cloudinary.CloudinaryImage(f"ContactApp/{current_user.id}").build_url(
-        width=250, height=250, crop="fill", version=upload_result.get("version")
-    )
-
-  
-    user = await repository_users.update_avatar(current_user, avatar_url, db)
-    return user
+    avatar_url = await avatar_pipeline.store(file)
+    if avatar_url == current_user.avatar:
+        return current_user
+    return await repository_users.update_avatar(current_user, avatar_url, db)
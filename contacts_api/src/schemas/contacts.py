@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 # Base schema for contact data (used in create and update)
 class ContactBase(BaseModel):
@@ -17,9 +17,43 @@ class ContactCreate(ContactBase):
 # Schema for updating an existing contact (same fields as creation)
 class ContactUpdate(ContactBase):
     pass
+# Schema for a partial update: only the fields sent are written. Omitted
+# fields keep their value; only additional_info may be set to null.
+class ContactPatch(BaseModel):
+    first_name: str = Field(None, max_length=50)
+    last_name: str = Field(None, max_length=50)
+    email: EmailStr = None
+    phone: str = Field(None, max_length=20)
+    birthday: date = None
+    additional_info: Optional[str] = None
 # Schema for returning contact information from API
 class ContactResponse(ContactBase):
     id: int
+    birthday: Optional[date] = None  # the column is nullable; such contacts sort last
 
     class Config:
         orm_mode = True  # Enables compatibility with ORM models
+
+# Schema for one page of contacts with an opaque cursor for the next page
+class ContactPage(BaseModel):
+    items: List[ContactResponse]
+    next_cursor: Optional[str] = None  # None when there are no more pages
+
+# Schema for one page of delta sync: apply deleted first, then changed
+class ContactChanges(BaseModel):
+    changed: List[ContactResponse]  # created or updated, oldest change first
+    deleted: List[int]  # ids of deleted contacts
+    next_token: str  # pass as ?since= on the next sync
+    has_more: bool = False  # True when more changes follow right away
+
+# Schema for one rejected row of a bulk import
+class ContactImportError(BaseModel):
+    row: int  # 1-based record number in the uploaded file
+    errors: List[str]
+
+# Schema for the outcome of a bulk import
+class ContactImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[ContactImportError]
+    errors_truncated: bool = False  # True when more rows failed than are listed
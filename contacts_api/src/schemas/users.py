@@ -11,6 +11,7 @@ class UserResponse(BaseModel):
     id: int
     email: str
     created_at: datetime  # Account creation timestamp
+    avatar: str | None = None  # Avatar URL, if one was uploaded
 
     class Config:
         orm_mode = True  # Enables compatibility with ORM models
@@ -30,3 +31,11 @@ class ResetPasswordModel(BaseModel):
     email: EmailStr
     token: str  # Token received by email
     new_password: str  # New password to set
+
+# Schema for one of the user's refresh-token sessions (logged-in devices)
+class SessionResponse(BaseModel):
+    sid: str
+    device: str  # User-Agent seen at login
+    created_at: datetime
+    last_used_at: datetime  # Login or last token refresh
+    current: bool = False  # Session of the access token making the request
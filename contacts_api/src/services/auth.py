@@ -1,27 +1,38 @@
 """
 This module handles authentication logic:
 - password hashing/verification
-- access/refresh token creation and decoding
-- user extraction from JWT and Redis caching
+- access/refresh token creation and decoding through the token codec
+  (refresh tokens belong to a session in the Redis session registry)
+- user extraction from JWT with in-process and Redis caching, refusing
+  revoked access tokens
 - email confirmation token creation and decoding
 """
 
-import os, json
+import os, hashlib
 from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.conf.config import settings
 from src.database.db import get_db
+from src.database.models import User
 from src.repository import users as repository_users
 from src.services.security import http_bearer
-from src.services.deps import get_redis  
+from src.services.hashing import HashingOverloaded, password_hasher
+from src.services.cache import LRUCache, user_cache, user_from_cache
+from src.services.revocation import token_revocations
+from src.services.sessions import new_id
+from src.services.tokens import HMACKey, TokenCodec, TokenError, build_codec
 
 
-REDIS_KEY = "user:{email}"  
-REDIS_TTL = 60 * 15  
+class TokenClaims(NamedTuple):
+    """Verified claims of an access token."""
+    email: str
+    jti: Optional[str]
+    sid: Optional[str]  # login session; None for tokens issued without one
+    exp: Optional[float]
 
 
 class Auth:
@@ -31,25 +42,61 @@ class Auth:
     - JWT token generation and validation
     - Current user resolution
     """
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    hasher = password_hasher
+    # Verified access tokens -> TokenClaims, expiring with the token itself
+    token_cache = LRUCache(maxsize=settings.token_cache_size)
     SECRET_KEY = os.getenv("SECRET_KEY", "secret")
     ALGORITHM = os.getenv("ALGORITHM", "HS256")
     EMAIL_SECRET_KEY = os.getenv("EMAIL_SECRET_KEY", SECRET_KEY)
+    # Access and refresh tokens: key ring with kid-based rotation
+    tokens = build_codec(
+        SECRET_KEY,
+        ALGORITHM,
+        settings.jwt_keys,
+        settings.jwt_active_kid,
+        settings.jwt_accept_legacy_secret,
+    )
+    # Email confirmation tokens never leave this service
+    email_tokens = TokenCodec([HMACKey(EMAIL_SECRET_KEY, ALGORITHM)])
 
     # ---------- Password utils ----------
-    def get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    # Hashing runs in the hasher's worker pool so it never blocks the event loop
+    async def get_password_hash(self, password: str) -> str:
+        try:
+            return await self.hasher.hash(password)
+        except HashingOverloaded:
+            raise self._busy()
+
+    async def verify_password(self, plain: str, hashed: str) -> bool:
+        try:
+            return await self.hasher.verify(plain, hashed)
+        except HashingOverloaded:
+            raise self._busy()
 
-    def verify_password(self, plain: str, hashed: str) -> bool:
-        return self.pwd_context.verify(plain, hashed)
+    async def verify_and_update_password(self, plain: str, hashed: str) -> tuple[bool, str | None]:
+        """Verify a password; also returns a replacement hash when the policy changed."""
+        try:
+            return await self.hasher.verify_and_update(plain, hashed)
+        except HashingOverloaded:
+            raise self._busy()
+
+    @staticmethod
+    def _busy() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
 
     # ---------- Token creation ----------
     async def _create(self, data: dict, minutes: int, scope: str) -> str:
-        payload = data | {
+        # Every token gets an id so it can be revoked; refresh tokens bring
+        # the one their session expects
+        payload = {"jti": new_id()} | data | {
             "exp": datetime.now(timezone.utc) + timedelta(minutes=minutes),
             "scope": scope,
         }
-        return jwt.encode(payload, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        return self.tokens.encode(payload)
 
     async def create_access_token(self, data: dict) -> str:
         return await self._create(data, 15, "access_token")
@@ -57,67 +104,102 @@ class Auth:
     async def create_refresh_token(self, data: dict) -> str:
         return await self._create(data, 7 * 24 * 60, "refresh_token")
 
-    async def decode_refresh_token(self, token: str) -> str:
+    async def decode_refresh_token(self, token: str) -> dict:
+        """
+        Verify a refresh token and return its claims.
+
+        Refresh tokens name their session (``sid``) and carry their own id
+        (``jti``); both are checked against the session registry on rotation.
+        """
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload.get("scope") != "refresh_token":
-                raise HTTPException(status_code=401, detail="Invalid scope")
-            return payload["sub"]
-        except JWTError:
+            payload = self.tokens.decode(token)
+        except TokenError:
             raise HTTPException(status_code=401, detail="Invalid token")
+        if payload.get("scope") != "refresh_token":
+            raise HTTPException(status_code=401, detail="Invalid scope")
+        if not all(payload.get(claim) for claim in ("sub", "sid", "jti")):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return payload
+
+    def decode_access_token(self, token: str) -> dict:
+        """Verify an access token and return its claims."""
+        try:
+            payload = self.tokens.decode(token)
+        except TokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        if payload.get("scope") != "access_token":
+            raise HTTPException(status_code=401, detail="Wrong token scope")
+        return payload
 
     # ---------- Get current user ----------
-    async def get_current_user(
-        self,
-        credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-        db: Session = Depends(get_db),
-        redis=Depends(get_redis), 
-    ):
+    async def get_token_claims(
+        self, credentials: HTTPAuthorizationCredentials = Depends(http_bearer)
+    ) -> TokenClaims:
         """
-        Extract current user from access token. Use Redis as cache, fallback to DB.
+        Verify the bearer access token and return its claims.
+
+        Tokens already verified by this process are answered from the
+        in-process token cache. Revoked tokens are refused; checking costs no
+        I/O unless the token is in the revocation filter.
         """
         token = credentials.credentials
-        try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload.get("scope") != "access_token":
-                raise HTTPException(status_code=401, detail="Wrong token scope")
-            email = payload.get("sub")
-        except JWTError:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        digest = self.token_digest(token)
+        claims = self.token_cache.get(digest)
+        if claims is None:
+            payload = self.decode_access_token(token)
+            claims = TokenClaims(
+                payload.get("sub"), payload.get("jti"), payload.get("sid"), payload.get("exp")
+            )
+            if claims.exp is not None:
+                self.token_cache.set(digest, claims, expires_at=claims.exp)
+
+        if await token_revocations.is_revoked(claims.jti):
+            self.token_cache.pop(digest)
+            raise HTTPException(status_code=401, detail="Token revoked")
+        return claims
 
-        cache_key = REDIS_KEY.format(email=email)  
-        cached = await redis.get(cache_key)
-        if cached:
-            return json.loads(cached)  
+    async def get_current_user(
+        self,
+        credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+        db: AsyncSession = Depends(get_db),
+    ) -> User:
+        """
+        Extract current user from access token.
 
-        user = await repository_users.get_user_by_email(email, db)
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+        The token is verified by ``get_token_claims``; the user itself comes
+        from the two-tier user cache (local LRU, then Redis), falling back to
+        the DB.
+        """
+        email = (await self.get_token_claims(credentials)).email
 
-        user_data = {
-            "id": user.id,
-            "email": user.email,
-            "confirmed": user.confirmed,
-            "avatar": user.avatar,
-        }
+        user_data = await user_cache.get(email)
+        if user_data is None:
+            user = await repository_users.get_user_by_email(email, db)
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            user_data = await user_cache.store(user)
+        return user_from_cache(user_data)
 
-        await redis.set(cache_key, json.dumps(user_data), ex=REDIS_TTL)
+    @staticmethod
+    def token_digest(token: str) -> bytes:
+        """Key under which a token is kept in the token cache."""
+        return hashlib.sha256(token.encode()).digest()
 
-        return user_data
+    def forget_token(self, token: str):
+        """Drop a token from this process's token cache (e.g. on logout)."""
+        self.token_cache.pop(self.token_digest(token))
 
     # ---------- Email confirmation ----------
     async def create_email_token(self, data: dict) -> str:
         """Generate email confirmation token valid for 24 hours"""
         payload = data | {"exp": datetime.now(timezone.utc) + timedelta(hours=24)}
-        return jwt.encode(payload, self.EMAIL_SECRET_KEY, algorithm=self.ALGORITHM)
+        return self.email_tokens.encode(payload)
 
     async def get_email_from_token(self, token: str) -> str:
         """Decode email confirmation token and extract email"""
         try:
-            return jwt.decode(
-                token, self.EMAIL_SECRET_KEY, algorithms=[self.ALGORITHM]
-            )["sub"]
-        except JWTError:
+            return self.email_tokens.decode(token)["sub"]
+        except (TokenError, KeyError):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Verification error"
             )
@@ -0,0 +1,262 @@
+"""
+Avatar upload pipeline:
+- reads the (disk-spooled) upload in chunks, enforcing a size cap and
+  hashing the content on the way
+- skips all work when the same image was stored before (content-addressed keys)
+- decodes, crops and resizes to a square JPEG in a worker thread pool
+- stores through a pluggable async backend: Cloudinary or the local filesystem
+"""
+
+import abc
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cloudinary
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.conf.config import settings
+from src.services.cache import LRUCache
+
+READ_CHUNK = 64 * 1024
+
+# Refuse images whose pixel count could exhaust memory when decoded
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+
+class AvatarStorage(abc.ABC):
+    """Async storage backend for processed avatars, addressed by key."""
+
+    @abc.abstractmethod
+    def url(self, key: str) -> str:
+        """Public URL of a stored object; must not need any I/O."""
+
+    @abc.abstractmethod
+    async def exists(self, key: str) -> bool:
+        """
+        True when an object is known to be stored under the key.
+
+        Backends where a lookup is costly may answer False and rely on
+        ``put`` keeping existing objects.
+        """
+
+    @abc.abstractmethod
+    async def put(self, key: str, data: bytes, content_type: str) -> bool:
+        """Store an object under the key; True when it was already stored."""
+
+
+class LocalStorage(AvatarStorage):
+    """
+    Stores avatars as files below a directory, served under ``base_url``.
+
+    Attributes:
+        root (Path): Directory holding the files.
+        base_url (str): URL prefix the directory is served from.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool((self.root / key).is_file)
+
+    def _write(self, key: str, data: bytes):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def put(self, key: str, data: bytes, content_type: str) -> bool:
+        await run_in_threadpool(self._write, key, data)
+        return False
+
+
+class CloudinaryStorage(AvatarStorage):
+    """
+    Stores avatars in Cloudinary under ``folder``.
+
+    The Cloudinary SDK is blocking, so its calls run in the thread pool.
+    There is no lookup before uploading: the Admin API is rate limited, and
+    an upload with ``overwrite=False`` keeps an existing asset anyway.
+    """
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str, folder: str = "ContactApp"):
+        cloudinary.config(
+            cloud_name=cloud_name, api_key=api_key, api_secret=api_secret, secure=True
+        )
+        self.folder = folder
+
+    def _public_id(self, key: str) -> str:
+        return f"{self.folder}/{key.rsplit('.', 1)[0]}"
+
+    def url(self, key: str) -> str:
+        return cloudinary.CloudinaryImage(self._public_id(key)).build_url(secure=True)
+
+    async def exists(self, key: str) -> bool:
+        return False
+
+    async def put(self, key: str, data: bytes, content_type: str) -> bool:
+        response = await run_in_threadpool(
+            cloudinary.uploader.upload,
+            io.BytesIO(data),
+            public_id=self._public_id(key),
+            overwrite=False,
+            resource_type="image",
+        )
+        return bool(response.get("existing"))
+
+
+def resize_avatar(source, size: int) -> bytes:
+    """
+    Decode an image, centre-crop it to a square and resize to ``size`` pixels.
+
+    Args:
+        source: Binary file object positioned at the image start.
+        size (int): Edge length of the result in pixels.
+
+    Returns:
+        bytes: JPEG-encoded avatar.
+
+    Raises:
+        ValueError: When the data is not a supported image.
+    """
+    try:
+        with Image.open(source) as image:
+            # Lets JPEG decode at a reduced scale instead of full resolution
+            image.draft("RGB", (size * 2, size * 2))
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            else:
+                image = image.convert("RGB")
+            avatar = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+        raise ValueError(str(error)) from error
+    out = io.BytesIO()
+    avatar.save(out, "JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+
+class AvatarPipeline:
+    """
+    Turns an uploaded image into a stored avatar URL.
+
+    Attributes:
+        storage (AvatarStorage): Where processed avatars go.
+        max_bytes (int): Largest accepted upload.
+        size (int): Avatar edge length in pixels.
+        workers (int): Threads decoding and resizing images.
+    """
+
+    def __init__(self, storage: AvatarStorage, max_bytes: int = 5 * 1024 * 1024, size: int = 250, workers: int = 2):
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.size = size
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        # Content hashes known to be stored, to skip the backend lookup
+        self._stored = LRUCache(maxsize=10_000)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="avatar"
+            )
+        return self._executor
+
+    def key_for(self, digest: str) -> str:
+        """Storage key of the avatar made from content with this hash."""
+        return f"avatars/{digest}-{self.size}.jpg"
+
+    async def _digest(self, file: UploadFile) -> str:
+        if file.size is not None and file.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail="Avatar file is too large")
+        digest = hashlib.sha256()
+        total = 0
+        while chunk := await file.read(READ_CHUNK):
+            total += len(chunk)
+            if total > self.max_bytes:
+                raise HTTPException(status_code=413, detail="Avatar file is too large")
+            digest.update(chunk)
+        if total == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        return digest.hexdigest()
+
+    async def store(self, file: UploadFile) -> str:
+        """
+        Process an upload unless an identical one was stored before.
+
+        Args:
+            file (UploadFile): Uploaded image.
+
+        Returns:
+            str: Public URL of the avatar.
+
+        Raises:
+            HTTPException: 413 when the upload exceeds ``max_bytes``,
+                400 when it is empty or not an image.
+        """
+        key = self.key_for(await self._digest(file))
+        if self._stored.get(key) or await self.storage.exists(key):
+            self._stored.set(key, True)
+            return self.storage.url(key)
+
+        await file.seek(0)
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(
+                self._get_executor(), resize_avatar, file.file, self.size
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="File is not a supported image")
+        await self.storage.put(key, data, "image/jpeg")
+        self._stored.set(key, True)
+        return self.storage.url(key)
+
+    def shutdown(self):
+        """Stop the resize workers; they are recreated on next use."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_storage() -> AvatarStorage:
+    """Build the storage backend selected by ``settings.avatar_storage``."""
+    if settings.avatar_storage == "local":
+        return LocalStorage(settings.avatar_local_dir, settings.avatar_base_url)
+    if settings.avatar_storage == "cloudinary":
+        return CloudinaryStorage(
+            settings.cloudinary_name,
+            settings.cloudinary_api_key,
+            settings.cloudinary_api_secret,
+        )
+    raise ValueError(f"Unknown avatar storage: {settings.avatar_storage}")
+
+
+avatar_pipeline = AvatarPipeline(
+    create_storage(),
+    max_bytes=settings.avatar_max_bytes,
+    size=settings.avatar_size,
+    workers=settings.avatar_workers,
+)
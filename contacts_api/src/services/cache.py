@@ -0,0 +1,469 @@
+"""
+In-process and shared caching:
+- LRUCache: bounded least-recently-used map with optional per-entry expiry
+- UserCache: two-tier user cache (local LRU in front of Redis) with
+  write-through updates and invalidation broadcast over Redis pub/sub
+- ResponseCache: two-tier cache of serialized contact responses, keyed by
+  the owner's contacts version so writes invalidate by bumping the version
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_KEY = "user:{email}"
+USER_CACHE_TTL = 60 * 15
+USER_INVALIDATION_CHANNEL = "user-cache:invalidate"
+
+CONTACTS_VERSION_KEY = "contacts:version:{user_id}"
+RESPONSE_CACHE_KEY = "response:{user_id}:{version}:{route}:{params}"
+
+# Store "<version> <updated_at>" unless a newer version is already stored, so
+# concurrent writers finishing out of order cannot move the version back
+_SET_VERSION = """
+local current = redis.call('GET', KEYS[1])
+if current and tonumber(string.match(current, '^%d+')) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1] .. ' ' .. ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class LRUCache:
+    """
+    Bounded LRU cache whose entries may carry an absolute expiry time.
+
+    Meant for use from a single event loop; operations are plain dict
+    manipulations and never await.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept; the least recently
+            used entry is evicted first.
+        default_ttl (float | None): Lifetime in seconds of entries stored
+            without an explicit expiry; None means they never expire.
+    """
+
+    def __init__(self, maxsize: int = 1024, default_ttl: float | None = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for a key and mark it as recently used.
+
+        Args:
+            key: Cache key.
+            default: Value returned on a miss or an expired entry.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at is not None and time.time() >= expires_at:
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, expires_at: float | None = None):
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key.
+            value: Value to store.
+            expires_at (float | None): Unix timestamp after which the entry is
+                ignored; defaults to now + default_ttl.
+        """
+        if expires_at is None and self.default_ttl is not None:
+            expires_at = time.time() + self.default_ttl
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a key and return its value (expired or not)."""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        """Drop every entry."""
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def user_to_cache(user: User) -> dict:
+    """
+    Serializable snapshot of the user fields the API needs per request.
+
+    Args:
+        user (User): User loaded from the database.
+
+    Returns:
+        dict: JSON-serializable user data.
+    """
+    return {
+        "id": user.id,
+        "email": user.email,
+        "confirmed": user.confirmed,
+        "avatar": user.avatar,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def user_from_cache(data: dict) -> User:
+    """
+    Rebuild a detached User from cached data.
+
+    Args:
+        data (dict): Output of ``user_to_cache``.
+
+    Returns:
+        User: Transient User instance (not attached to any session).
+    """
+    created_at = data.get("created_at")
+    return User(
+        id=data["id"],
+        email=data["email"],
+        confirmed=data.get("confirmed"),
+        avatar=data.get("avatar"),
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+    )
+
+
+class UserCache:
+    """
+    Two-tier user cache: a per-process LRU in front of Redis.
+
+    Writes go through both tiers and publish an invalidation message, so the
+    other workers drop their local copy and re-read Redis on next access.
+    Local entries also expire after ``local_ttl`` seconds to bound staleness
+    if a message is ever missed.
+
+    Attributes:
+        local (LRUCache): Per-process tier, keyed by email.
+        ttl (int): Lifetime of Redis entries in seconds.
+        redis: Redis client, set by ``init``; without it only the local tier is used.
+        redis_hits (int), redis_misses (int): Lookups answered / missed by Redis.
+    """
+
+    def __init__(self, maxsize: int = 10_000, local_ttl: float = 60, ttl: int = USER_CACHE_TTL):
+        self.local = LRUCache(maxsize=maxsize, default_ttl=local_ttl)
+        self.ttl = ttl
+        self.redis = None
+        self.instance_id = uuid.uuid4().hex
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self._listener: asyncio.Task | None = None
+
+    def init(self, redis):
+        """Attach the shared Redis client."""
+        self.redis = redis
+
+    async def get(self, email: str) -> dict | None:
+        """
+        Return cached user data, looking at the local tier first, then Redis.
+
+        Args:
+            email (str): User email.
+
+        Returns:
+            dict | None: Cached user data, or None on a miss in both tiers.
+        """
+        data = self.local.get(email)
+        if data is not None or self.redis is None:
+            return data
+        raw = await self.redis.get(USER_CACHE_KEY.format(email=email))
+        if not raw:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        data = json.loads(raw)
+        self.local.set(email, data)
+        return data
+
+    async def store(self, user: User) -> dict:
+        """
+        Write a user through both tiers and tell other workers to drop theirs.
+
+        Args:
+            user (User): Fresh user state.
+
+        Returns:
+            dict: The cached user data.
+        """
+        data = user_to_cache(user)
+        self.local.set(user.email, data)
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(USER_CACHE_KEY.format(email=user.email), json.dumps(data), ex=self.ttl)
+            pipe.publish(USER_INVALIDATION_CHANNEL, self._message(user.email))
+            await pipe.execute()
+        return data
+
+    async def invalidate(self, email: str):
+        """
+        Remove a user from both tiers on every worker.
+
+        Args:
+            email (str): User email.
+        """
+        self.local.pop(email)
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(USER_CACHE_KEY.format(email=email))
+            pipe.publish(USER_INVALIDATION_CHANNEL, self._message(email))
+            await pipe.execute()
+
+    def _message(self, email: str) -> str:
+        return json.dumps({"email": email, "origin": self.instance_id})
+
+    def handle_message(self, raw: str):
+        """
+        Apply an invalidation message published by another worker.
+
+        Malformed messages are logged and skipped, so they cannot stop the
+        listener.
+        """
+        try:
+            payload = json.loads(raw)
+            if payload.get("origin") != self.instance_id:
+                self.local.pop(payload["email"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.warning("Ignoring malformed user cache invalidation message: %r", raw)
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(USER_INVALIDATION_CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.handle_message(message["data"])
+                finally:
+                    await pubsub.aclose()
+            except (RedisError, OSError):
+                logger.warning("User cache invalidation listener lost Redis, retrying")
+            # Messages may have been missed while disconnected
+            self.local.clear()
+            await asyncio.sleep(1)
+
+    def start_listener(self):
+        """Start consuming invalidation messages in a background task."""
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop_listener(self):
+        """Stop the background invalidation consumer."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+user_cache = UserCache(
+    maxsize=settings.user_cache_size,
+    local_ttl=settings.user_cache_local_ttl,
+)
+
+
+class ResponseCache:
+    """
+    Two-tier cache of pre-serialized JSON responses for contact reads.
+
+    Entries are keyed by user, route, parameters and the user's contacts
+    version (``users.contacts_version``). Writes publish the new version to
+    Redis, which makes every older entry unreachable on every worker at once;
+    stale entries simply expire, as does the version itself (after ``ttl``).
+    A cached read therefore costs one Redis GET for the version plus a local
+    lookup, and concurrent misses for the same key in a process share one
+    computation (single flight).
+
+    Attributes:
+        local (LRUCache): Per-process tier of response bytes.
+        ttl (int): Lifetime of Redis entries in seconds.
+        redis: Redis client, set by ``init``; without it only the local tier
+            is used and versions are always read from the database.
+        redis_hits (int), redis_misses (int): Lookups answered / missed by Redis.
+        computed (int): Responses rendered because no tier had them.
+    """
+
+    def __init__(self, maxsize: int = 2_000, local_ttl: float = 30, ttl: int = 300):
+        self.local = LRUCache(maxsize=maxsize, default_ttl=local_ttl)
+        self.ttl = ttl
+        self.redis = None
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.computed = 0
+        self._set_version = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def init(self, redis):
+        """Attach the shared Redis client."""
+        self.redis = redis
+        self._set_version = redis.register_script(_SET_VERSION)
+
+    async def version(self, user_id: int, load):
+        """
+        Current contacts version of a user, from Redis when known.
+
+        Args:
+            user_id (int): Owner of the contacts.
+            load: Coroutine function reading ``(version, updated_at)`` from
+                the database, used when Redis does not know the version.
+
+        Returns:
+            tuple[int, datetime]: Contacts version and time of the last change.
+        """
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(CONTACTS_VERSION_KEY.format(user_id=user_id))
+            except RedisError:
+                logger.warning("Response cache could not read a version from Redis")
+                raw = None
+            if raw:
+                version, updated_at = raw.split(" ", 1)
+                return int(version), datetime.fromisoformat(updated_at)
+        version, updated_at = await load()
+        await self.set_version(user_id, version, updated_at)
+        return version, updated_at
+
+    async def set_version(self, user_id: int, version: int, updated_at: datetime):
+        """
+        Publish a user's contacts version, invalidating older responses.
+
+        Called after the change is committed; never moves the version back.
+        When publishing fails the stored version is dropped instead, so the
+        next read loads the new one from the database.
+
+        Args:
+            user_id (int): Owner of the contacts.
+            version (int): New contacts version.
+            updated_at (datetime): Time of the change (UTC).
+        """
+        if self.redis is None:
+            return
+        key = CONTACTS_VERSION_KEY.format(user_id=user_id)
+        try:
+            await self._set_version(
+                keys=[key],
+                args=[version, updated_at.isoformat(), self.ttl],
+            )
+        except RedisError:
+            logger.warning("Response cache could not publish contacts version %s", version)
+            try:
+                await self.redis.delete(key)
+            except RedisError:
+                # Left as is, the old version expires within ttl seconds
+                logger.warning("Response cache could not drop the stale contacts version")
+
+    @staticmethod
+    def key(user_id: int, version: int, route: str, params: dict) -> str:
+        """
+        Cache key of one response.
+
+        Args:
+            user_id (int): Owner of the contacts.
+            version (int): Contacts version the response reflects.
+            route (str): Route name.
+            params (dict): Every input that changes the response.
+
+        Returns:
+            str: Key shared by the local tier and Redis.
+        """
+        canonical = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+        digest = hashlib.blake2b(canonical.encode(), digest_size=12).hexdigest()
+        return RESPONSE_CACHE_KEY.format(user_id=user_id, version=version, route=route, params=digest)
+
+    async def get_or_render(self, key: str, render) -> bytes:
+        """
+        Return cached response bytes, rendering them once on a miss.
+
+        Args:
+            key (str): Output of ``key``.
+            render: Coroutine function producing the response bytes; errors
+                propagate to every waiter and nothing is cached.
+
+        Returns:
+            bytes: Serialized response body.
+        """
+        body = self.local.get(key)
+        if body is not None:
+            return body
+        while (waiting := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(waiting)
+            except asyncio.CancelledError:
+                if not waiting.cancelled():
+                    raise  # this request was cancelled, not the render
+                # The rendering request went away; take over
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body = await self._load(key, render)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            future.exception()  # mark retrieved: there may be no waiters
+            raise
+        else:
+            future.set_result(body)
+            self.local.set(key, body)
+            return body
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, key: str, render) -> bytes:
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(key)
+            except RedisError:
+                raw = None
+            if raw is not None:
+                self.redis_hits += 1
+                return raw.encode()
+            self.redis_misses += 1
+        body = await render()
+        self.computed += 1
+        if self.redis is not None:
+            try:
+                await self.redis.set(key, body.decode(), ex=self.ttl)
+            except RedisError:
+                logger.warning("Response cache could not store a response in Redis")
+        return body
+
+
+response_cache = ResponseCache(
+    maxsize=settings.response_cache_size,
+    local_ttl=settings.response_cache_local_ttl,
+    ttl=settings.response_cache_ttl,
+)
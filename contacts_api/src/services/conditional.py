@@ -0,0 +1,107 @@
+"""
+HTTP conditional request helpers (RFC 9110, section 13):
+- ETag / Last-Modified validators built from contact versions
+- If-None-Match / If-Modified-Since evaluation for 304 responses
+- If-Match parsing for optimistic concurrency on writes
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+
+
+def etag(version: int) -> str:
+    """Strong entity tag of a version."""
+    return f'"{version}"'
+
+
+def validators(version: int, updated_at: datetime) -> dict:
+    """
+    Response headers describing a resource version.
+
+    Responses are per user, so shared caches must not store them, and
+    clients must revalidate before reusing them.
+
+    Args:
+        version (int): Version of the resource.
+        updated_at (datetime): UTC time of the last change (naive).
+
+    Returns:
+        dict: ETag, Last-Modified and Cache-Control headers.
+    """
+    return {
+        "ETag": etag(version),
+        "Last-Modified": format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison ignores the W/ prefix
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request: Request, version: int, updated_at: datetime) -> bool:
+    """
+    Whether a GET can be answered with 304 Not Modified.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    it is absent.
+
+    Args:
+        request (Request): Incoming request.
+        version (int): Current version of the resource.
+        updated_at (datetime): UTC time of the last change (naive).
+
+    Returns:
+        bool: True when the client's copy is current.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = _tags(if_none_match)
+        return "*" in tags or etag(version) in {_opaque(tag) for tag in tags}
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        modified = updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+        return modified <= since
+    return False
+
+
+def is_conditional(request: Request) -> bool:
+    """Whether a GET carries a validator that may lead to 304."""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def if_match_versions(header: str | None) -> list[int] | None:
+    """
+    Versions an If-Match header accepts.
+
+    Args:
+        header (str | None): Value of If-Match.
+
+    Returns:
+        list[int] | None: None when any version is acceptable (no header or
+        ``*``); otherwise the versions listed, compared strongly, so weak or
+        foreign tags match nothing.
+    """
+    if header is None:
+        return None
+    tags = _tags(header)
+    if "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
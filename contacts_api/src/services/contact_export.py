@@ -0,0 +1,110 @@
+"""
+Streaming contact export:
+- serializes contact rows to CSV or NDJSON batch by batch
+- optionally gzip-compresses the stream on the fly, when the client's
+  Accept-Encoding allows it
+- opens its own session, since the body is produced after the route returns
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator
+
+from src.repository import contacts as repo
+
+FIELDS = tuple(column.key for column in repo.EXPORT_COLUMNS)
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _csv_chunk(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _ndjson_chunk(rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(FIELDS, row)), default=str, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows a gzip body.
+
+    ``gzip`` (or ``x-gzip``) with a non-zero q-value allows it, as does a
+    ``*`` with one when gzip is not listed; ``gzip;q=0`` refuses it.
+
+    Args:
+        accept_encoding (str): Header value.
+
+    Returns:
+        bool: True when the response may be gzip-encoded.
+    """
+    gzip_q = wildcard_q = None
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            gzip_q = q
+        elif coding == "*":
+            wildcard_q = q
+    if gzip_q is None:
+        gzip_q = wildcard_q or 0.0
+    return gzip_q > 0
+
+
+async def export_contacts(
+    session_factory, user_id: int, fmt: str, batch_size: int = 1000
+) -> AsyncIterator[bytes]:
+    """
+    Produce the export file of a user's contacts as a stream of byte chunks.
+
+    Args:
+        session_factory: Callable returning a new AsyncSession.
+        user_id (int): Owner of the contacts.
+        fmt (str): "csv" or "ndjson".
+        batch_size (int): Rows serialized per chunk.
+
+    Yields:
+        bytes: Consecutive pieces of the file.
+    """
+    async with session_factory() as db:
+        header = fmt == "csv"
+        if header:
+            yield _csv_chunk([], header=True)
+        async for rows in repo.stream_contact_rows(db, user_id, batch_size):
+            yield _csv_chunk(rows, header=False) if header else _ndjson_chunk(rows)
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Gzip-compress a byte stream without buffering it.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Uncompressed chunks.
+
+    Yields:
+        bytes: gzip-framed compressed chunks.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,176 @@
+"""
+Bulk contact import:
+- reads CSV or JSON Lines uploads record by record (never the whole file)
+- validates each record with ContactCreate, collecting per-row errors
+- writes valid records in chunks through repository.bulk_create_contacts
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+from typing import Iterator
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.repository import contacts as repo
+from src.schemas.contacts import ContactCreate
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+_SUFFIXES = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# A record is (row number, data or None, parse error or None)
+Record = tuple[int, dict | None, str | None]
+
+
+def detect_format(file: UploadFile) -> str | None:
+    """
+    Guess the upload format from its file name, then its content type.
+
+    Args:
+        file (UploadFile): Uploaded file.
+
+    Returns:
+        str | None: "csv", "jsonl" or None when unknown.
+    """
+    name = (file.filename or "").lower()
+    for suffix, fmt in _SUFFIXES.items():
+        if name.endswith(suffix):
+            return fmt
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    return _CONTENT_TYPES.get(content_type)
+
+
+def csv_records(text: io.TextIOBase) -> Iterator[Record]:
+    """Yield records of a CSV file whose first line holds the column names."""
+    reader = csv.DictReader(text)
+    for index, row in enumerate(reader, start=1):
+        yield index, {
+            key.strip(): (value if value != "" else None)
+            for key, value in row.items()
+            if key
+        }, None
+
+
+def jsonl_records(text: io.TextIOBase) -> Iterator[Record]:
+    """Yield records of a JSON Lines file, one JSON object per line."""
+    for index, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield index, None, "Invalid JSON"
+            continue
+        if not isinstance(data, dict):
+            yield index, None, "Expected a JSON object"
+            continue
+        yield index, data, None
+
+
+def _next_chunk(records: Iterator[Record], size: int) -> list[Record]:
+    return list(islice(records, size))
+
+
+def _format_errors(error: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    ]
+
+
+async def import_contacts(
+    db: AsyncSession,
+    file: UploadFile,
+    fmt: str,
+    user: User,
+    chunk_size: int = 1000,
+    max_errors: int = 1000,
+) -> dict:
+    """
+    Import contacts from an uploaded CSV / JSON Lines file.
+
+    Records are read ``chunk_size`` at a time in a worker thread (the upload
+    is spooled to disk by Starlette), validated, and each chunk is written
+    and committed in one batch. Rows whose email already exists are skipped
+    and reported.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        file (UploadFile): Uploaded file.
+        fmt (str): "csv" or "jsonl".
+        user (User): Owner of the imported contacts.
+        chunk_size (int): Records validated and inserted per batch.
+        max_errors (int): Maximum number of row errors included in the result.
+
+    Returns:
+        dict: ``inserted`` and ``failed`` counts, ``errors`` (row number and
+        messages) and ``errors_truncated``.
+    """
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    records = csv_records(text) if fmt == "csv" else jsonl_records(text)
+    summary = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    last_row = 0
+
+    def report(row: int, messages: list[str]):
+        summary["failed"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"row": row, "errors": messages})
+        else:
+            summary["errors_truncated"] = True
+
+    try:
+        while True:
+            try:
+                chunk = await run_in_threadpool(_next_chunk, records, chunk_size)
+            except UnicodeDecodeError:
+                report(last_row + 1, ["File is not valid UTF-8, import stopped"])
+                break
+            except csv.Error as error:
+                report(last_row + 1, [f"Malformed CSV, import stopped: {error}"])
+                break
+            if not chunk:
+                break
+            last_row = chunk[-1][0]
+
+            valid: list[tuple[int, ContactCreate]] = []
+            seen: set[str] = set()
+            for row, data, error in chunk:
+                if error:
+                    report(row, [error])
+                    continue
+                try:
+                    contact = ContactCreate.model_validate(data)
+                except ValidationError as exc:
+                    report(row, _format_errors(exc))
+                    continue
+                if contact.email in seen:
+                    report(row, ["Duplicate email in upload"])
+                    continue
+                seen.add(contact.email)
+                valid.append((row, contact))
+
+            inserted = await repo.bulk_create_contacts(
+                db, [contact for _, contact in valid], user
+            )
+            for row, contact in valid:
+                if contact.email in inserted:
+                    summary["inserted"] += 1
+                else:
+                    report(row, ["Contact with this email already exists"])
+    finally:
+        # Leave the upload's file open for Starlette to close
+        text.detach()
+    summary["errors"].sort(key=lambda item: item["row"])
+    return summary
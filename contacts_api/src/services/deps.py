@@ -1,8 +1,14 @@
 """
-Dependency provider for Redis client
+Dependency providers:
+- Redis client
+- access check for internal endpoints
 """
 
-from fastapi import Request
+import secrets
+
+from fastapi import Header, HTTPException, Request
+
+from src.conf.config import settings
 
 
 async def get_redis(request: Request):
@@ -10,3 +16,27 @@ async def get_redis(request: Request):
     Return Redis client from app state
     """
     return request.app.state.redis
+
+
+def has_internal_key(value: str | None) -> bool:
+    """
+    True when ``value`` matches the configured ``settings.internal_api_key``
+    """
+    expected = settings.internal_api_key
+    return bool(expected) and secrets.compare_digest(value or "", expected)
+
+
+async def require_internal_key(x_internal_key: str | None = Header(default=None)):
+    """
+    Guard internal endpoints with the X-Internal-Key header.
+
+    Without a configured ``settings.internal_api_key`` they do not exist
+    (404) unless ``settings.internal_api_open`` explicitly opens them
+    """
+    expected = settings.internal_api_key
+    if not expected:
+        if settings.internal_api_open:
+            return
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not has_internal_key(x_internal_key):
+        raise HTTPException(status_code=403, detail="Forbidden")
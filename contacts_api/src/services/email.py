@@ -1,32 +1,20 @@
 """
-Email utilities using FastAPI-Mail:
+Email utilities:
 - verification email
 - password reset email
+
+Messages are rendered here and put on the Redis mail queue; the mail worker
+(src.mail_worker) delivers them, so requests never wait on SMTP.
 """
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from pydantic import EmailStr
 from src.conf.config import settings
-
-
-# Configuration for the mail server
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME=settings.mail_from_name,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=False,
-)
+from src.services.mail_queue import mail_queue
 
 
 async def send_verification_email(email: EmailStr, token: str):
     """
-    Send email with verification link to confirm user registration
+    Queue email with verification link to confirm user registration
     """
     verify_link = f"{settings.base_url}/api/auth/confirm_email/{token}"
     html = f"""
@@ -34,16 +22,12 @@ async def send_verification_email(email: EmailStr, token: str):
         <p>Для подтверждения адреса нажмите на ссылку:</p>
         <a href="{verify_link}">{verify_link}</a>
     """
-    message = MessageSchema(
-        subject="Email confirmation", recipients=[email], body=html, subtype="html"
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    await mail_queue.enqueue(email, "Email confirmation", html)
 
 
 async def send_reset_email(email: EmailStr, token: str):
     """
-    Send password reset email with a secure token and link
+    Queue password reset email with a secure token and link
     """
     reset_link = f"{settings.base_url}/reset-password" f"?token={token}&email={email}"
 
@@ -54,11 +38,4 @@ async def send_reset_email(email: EmailStr, token: str):
         <a href="{reset_link}">{reset_link}</a>
         <p>Ссылка действительна 1 час.</p>
     """
-
-    msg = MessageSchema(
-        subject="Сброс пароля",
-        recipients=[email],
-        body=html,
-        subtype="html",
-    )
-    await FastMail(conf).send_message(msg)
+    await mail_queue.enqueue(email, "Сброс пароля", html)
@@ -0,0 +1,182 @@
+"""
+Password hashing policy:
+- argon2id or bcrypt for new hashes; the other scheme is still verified
+- cost parameters picked at startup by timing this machine against a target
+  latency, kept between a security floor and a ceiling
+- hashes made with the other scheme or a lower cost need an update, so
+  successful logins move them to the current policy; costlier hashes are
+  kept, so re-tuning after a restart or on other hardware never rewrites
+  (or weakens) them
+"""
+
+import logging
+import math
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = ("argon2", "bcrypt")
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+# OWASP minimum for argon2id is 19 MiB with 2 passes
+ARGON2_MIN_MEMORY_KIB = 19 * 1024
+ARGON2_MIN_TIME_COST = 2
+ARGON2_MAX_TIME_COST = 20
+
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+class HashPolicy(NamedTuple):
+    """
+    Scheme and cost parameters for new password hashes.
+
+    Plain tuples so a policy can be sent to process-pool workers and used as
+    a cache key.
+
+    Attributes:
+        scheme (str): "argon2" (argon2id) or "bcrypt".
+        params (tuple): ``(name, value)`` pairs: ``rounds`` for bcrypt;
+            ``time_cost``, ``memory_cost`` (KiB) and ``parallelism`` for argon2.
+    """
+
+    scheme: str
+    params: tuple[tuple[str, int], ...]
+
+    def context(self) -> CryptContext:
+        """Passlib context hashing with this policy (built once per policy)."""
+        return policy_context(self)
+
+    def describe(self) -> str:
+        """Scheme and costs for logs, e.g. ``argon2, time_cost=3, ...``."""
+        return ", ".join([self.scheme, *(f"{name}={value}" for name, value in self.params)])
+
+
+@lru_cache(maxsize=8)
+def policy_context(policy: HashPolicy) -> CryptContext:
+    """
+    Passlib context for a policy.
+
+    The policy's cost is the minimum as well as the default, so
+    ``needs_update`` is true for hashes of the other scheme or of a lower
+    cost, but not for costlier ones.
+
+    Args:
+        policy (HashPolicy): Policy to apply.
+
+    Returns:
+        CryptContext: Context hashing with the policy and verifying both schemes.
+    """
+    if policy.scheme not in SCHEMES:
+        raise ValueError(f"Unknown password hash scheme: {policy.scheme}")
+    params = dict(policy.params)
+    options = {}
+    if policy.scheme == "bcrypt":
+        rounds = params["rounds"]
+    else:
+        rounds = params["time_cost"]
+        options.update(
+            argon2__type="ID",
+            argon2__memory_cost=params["memory_cost"],
+            argon2__parallelism=params["parallelism"],
+        )
+    # Not passlib's "rounds": that one pins max_rounds as well
+    for option in ("default_rounds", "min_rounds"):
+        options[f"{policy.scheme}__{option}"] = rounds
+    others = [scheme for scheme in SCHEMES if scheme != policy.scheme]
+    return CryptContext(
+        schemes=[policy.scheme, *others], default=policy.scheme, deprecated=others, **options
+    )
+
+
+def floor_policy(scheme: str, memory_kib: int = 64 * 1024, parallelism: int = 1) -> HashPolicy:
+    """
+    Cheapest policy still considered safe for a scheme.
+
+    Args:
+        scheme (str): "argon2" or "bcrypt".
+        memory_kib (int): argon2 memory cost; raised to the floor if below it.
+        parallelism (int): argon2 lanes.
+
+    Returns:
+        HashPolicy: The policy.
+    """
+    if scheme == "bcrypt":
+        return HashPolicy("bcrypt", (("rounds", BCRYPT_MIN_ROUNDS),))
+    if scheme == "argon2":
+        return HashPolicy("argon2", (
+            ("time_cost", ARGON2_MIN_TIME_COST),
+            ("memory_cost", max(memory_kib, ARGON2_MIN_MEMORY_KIB)),
+            ("parallelism", parallelism),
+        ))
+    raise ValueError(f"Unknown password hash scheme: {scheme}")
+
+
+def pinned_policy(scheme: str, params: dict[str, int], memory_kib: int = 64 * 1024,
+                  parallelism: int = 1) -> HashPolicy:
+    """
+    Policy with fixed costs, e.g. shared by every server of a fleet so they
+    all hash at the same cost.
+
+    Args:
+        scheme (str): "argon2" or "bcrypt".
+        params (dict[str, int]): Costs to use; missing ones come from the floor.
+        memory_kib (int): argon2 memory cost when not in ``params``.
+        parallelism (int): argon2 lanes when not in ``params``.
+
+    Returns:
+        HashPolicy: The policy.
+    """
+    floor = dict(floor_policy(scheme, memory_kib, parallelism).params)
+    unknown = set(params) - set(floor)
+    if unknown:
+        raise ValueError(f"Unknown {scheme} parameters: {', '.join(sorted(unknown))}")
+    return HashPolicy(scheme, tuple((name, params.get(name, value)) for name, value in floor.items()))
+
+
+def measure(policy: HashPolicy, samples: int = 3) -> float:
+    """Fastest of ``samples`` hashes with a policy, in seconds."""
+    context = policy.context()
+    best = math.inf
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash(BENCHMARK_PASSWORD)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def tune(scheme: str, target_ms: float, memory_kib: int = 64 * 1024, parallelism: int = 1) -> HashPolicy:
+    """
+    Most expensive policy whose hash takes at most ``target_ms`` here.
+
+    The floor policy is timed and the cost scaled from it: bcrypt time
+    doubles per round, argon2 time grows linearly with ``time_cost`` at a
+    fixed memory cost. The result never goes below the floor, even when
+    the floor alone misses the target.
+
+    Args:
+        scheme (str): "argon2" or "bcrypt".
+        target_ms (float): Hashing time one login may take.
+        memory_kib (int): argon2 memory cost.
+        parallelism (int): argon2 lanes.
+
+    Returns:
+        HashPolicy: The tuned policy.
+    """
+    floor = floor_policy(scheme, memory_kib, parallelism)
+    ratio = target_ms / 1000 / measure(floor)
+    params = dict(floor.params)
+    if scheme == "bcrypt":
+        extra = math.floor(math.log2(ratio)) if ratio >= 1 else 0
+        params["rounds"] = min(BCRYPT_MIN_ROUNDS + extra, BCRYPT_MAX_ROUNDS)
+    else:
+        time_cost = math.floor(ARGON2_MIN_TIME_COST * ratio)
+        params["time_cost"] = min(max(time_cost, ARGON2_MIN_TIME_COST), ARGON2_MAX_TIME_COST)
+    policy = HashPolicy(scheme, tuple(params.items()))
+    if ratio < 1:
+        logger.warning("Password hash floor (%s) is slower than the %s ms target", floor.describe(), target_ms)
+    return policy
@@ -0,0 +1,199 @@
+"""
+Password hashing off the event loop:
+- hashing / verification run in a bounded worker pool
+- a thread pool by default (bcrypt and argon2 release the GIL), or a process pool
+- the hashing policy (see ``hash_policy``) is tuned at startup and travels
+  with every job, so process workers apply it too
+- verification reports hashes that need an update, with their replacement
+- callers beyond the pending limit are rejected instead of queueing forever
+- counters for monitoring queue depth, wait time and rejections
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.conf.config import settings
+from src.services.hash_policy import HashPolicy, floor_policy, pinned_policy, tune
+
+logger = logging.getLogger(__name__)
+
+
+class HashingOverloaded(Exception):
+    """Raised when too many hashing jobs are already pending."""
+
+
+def _timed(func, *args):
+    # Runs inside the worker; returns the run time so the caller can tell
+    # queue wait apart from hashing time.
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _hash(policy: HashPolicy, password: str) -> str:
+    return policy.context().hash(password)
+
+
+def _verify(policy: HashPolicy, plain: str, hashed: str) -> bool:
+    return policy.context().verify(plain, hashed)
+
+
+def _verify_and_update(policy: HashPolicy, plain: str, hashed: str) -> tuple[bool, str | None]:
+    return policy.context().verify_and_update(plain, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs password hashing in a worker pool with a bounded number of pending jobs.
+
+    Attributes:
+        kind (str): "thread" or "process".
+        workers (int): Pool size, i.e. hashes computed concurrently.
+        max_pending (int): Jobs allowed in flight (running + queued) before
+            new ones are rejected with HashingOverloaded.
+        policy (HashPolicy): Scheme and costs of new hashes; the floor policy
+            of the scheme until ``tune`` runs.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 4, max_pending: int = 64,
+                 policy: HashPolicy | None = None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind}")
+        self.kind = kind
+        self.policy = policy or floor_policy("argon2")
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="pwd-hash"
+                        )
+        return self._executor
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HashingOverloaded("Password hashing queue is full")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(
+                self._get_executor(), _timed, func, *args
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        total = time.perf_counter() - submitted
+        with self._lock:
+            self._completed += 1
+            self._run_seconds += run_seconds
+            self._wait_seconds += max(total - run_seconds, 0.0)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the worker pool."""
+        return await self._submit(_hash, self.policy, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        """Verify a password against its hash in the worker pool."""
+        return await self._submit(_verify, self.policy, plain, hashed)
+
+    async def verify_and_update(self, plain: str, hashed: str) -> tuple[bool, str | None]:
+        """
+        Verify a password and rehash it when its hash is outdated.
+
+        Returns:
+            tuple[bool, str | None]: Whether the password matches, and a hash
+            under the current policy when the stored one should be replaced.
+        """
+        return await self._submit(_verify_and_update, self.policy, plain, hashed)
+
+    async def tune(self, scheme: str, target_ms: float, memory_kib: int, parallelism: int,
+                   params: dict[str, int] | None = None) -> HashPolicy:
+        """
+        Set the policy for new hashes.
+
+        Fixed ``params`` are used as given; otherwise the costs are measured
+        on a pool worker, i.e. under the same conditions as real hashing.
+
+        Args:
+            scheme (str): "argon2" or "bcrypt".
+            target_ms (float): Hashing time one login may take.
+            memory_kib (int): argon2 memory cost.
+            parallelism (int): argon2 lanes.
+            params (dict[str, int] | None): Fixed costs, skipping measurement.
+
+        Returns:
+            HashPolicy: The new policy.
+        """
+        if params:
+            policy = pinned_policy(scheme, params, memory_kib, parallelism)
+        else:
+            loop = asyncio.get_running_loop()
+            policy = await loop.run_in_executor(
+                self._get_executor(), tune, scheme, target_ms, memory_kib, parallelism
+            )
+        self.policy = policy
+        logger.info("Password hashing policy: %s", policy.describe())
+        return policy
+
+    def stats(self) -> dict:
+        """
+        Snapshot of pool counters.
+
+        Returns:
+            dict: pending and max_pending jobs, completed and rejected totals,
+            and average queue wait / run time in seconds.
+        """
+        with self._lock:
+            completed = self._completed
+            return {
+                "kind": self.kind,
+                "policy": self.policy.describe(),
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": self._wait_seconds / completed if completed else 0.0,
+                "avg_run_seconds": self._run_seconds / completed if completed else 0.0,
+            }
+
+    def shutdown(self):
+        """Stop the worker pool; it is recreated on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    kind=settings.password_hash_pool,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    policy=floor_policy(
+        settings.password_hash_scheme,
+        settings.password_hash_memory_kib,
+        settings.password_hash_parallelism,
+    ),
+)
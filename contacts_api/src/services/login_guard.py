@@ -0,0 +1,218 @@
+"""
+Login brute-force protection on Redis:
+- failed attempts counted per email and per client IP
+- exponential lockout once a counter passes its threshold; locked logins
+  are refused with 429 before the user is loaded or a password hashed
+- negative cache of emails without an account, so repeated guesses for
+  them cost neither a query nor a hash
+"""
+
+import logging
+import math
+from typing import NamedTuple
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+FAILURES_KEY = "login:failures:{scope}:{subject}"
+LOCK_KEY = "login:lock:{scope}:{subject}"
+UNKNOWN_KEY = "login:unknown:{email}"
+
+# KEYS: (failure counter, lock) pairs. ARGV: window seconds, base lock ms,
+# max lock ms, then the threshold of each pair. A counter at or past its
+# threshold locks for base * 2^(count - threshold), capped; the counter
+# outlives the lock so the next failure doubles it. Returns the longest
+# lock set, in ms.
+_RECORD_FAILURE = """
+local window = tonumber(ARGV[1])
+local longest = 0
+for i = 1, #KEYS, 2 do
+    local count = redis.call('INCR', KEYS[i])
+    local threshold = tonumber(ARGV[4 + (i - 1) / 2])
+    local ttl = window
+    if count >= threshold then
+        local lock = math.min(tonumber(ARGV[2]) * 2 ^ (count - threshold), tonumber(ARGV[3]))
+        lock = math.ceil(lock)
+        redis.call('SET', KEYS[i + 1], 1, 'PX', lock)
+        ttl = window + math.ceil(lock / 1000)
+        if lock > longest then longest = lock end
+    end
+    redis.call('EXPIRE', KEYS[i], ttl)
+end
+return longest
+"""
+
+
+class LoginCheck(NamedTuple):
+    """Outcome of the pre-authentication check."""
+
+    unknown: bool  # the email is known to have no account
+
+
+class LoginGuard:
+    """
+    Failed-login tracker.
+
+    Attributes:
+        email_threshold (int): Failures per email before it is locked.
+        ip_threshold (int): Failures per client IP before it is locked.
+        window (int): Seconds a failure is remembered.
+        lockout_base (float): First lock in seconds; doubles per failure.
+        lockout_max (float): Longest lock in seconds.
+        unknown_ttl (int): Seconds an email without account is remembered.
+        redis: Redis client, set by ``init``; without it logins are not
+            guarded.
+        locked (int), unknown_hits (int), failures (int): Logins refused
+            while locked, answered from the negative cache, and failed.
+    """
+
+    def __init__(
+        self,
+        email_threshold: int = 5,
+        ip_threshold: int = 20,
+        window: int = 900,
+        lockout_base: float = 1,
+        lockout_max: float = 900,
+        unknown_ttl: int = 300,
+        enabled: bool = True,
+    ):
+        self.email_threshold = email_threshold
+        self.ip_threshold = ip_threshold
+        self.window = window
+        self.lockout_base = lockout_base
+        self.lockout_max = lockout_max
+        self.unknown_ttl = unknown_ttl
+        self.enabled = enabled
+        self.redis = None
+        self._record = None
+        self.locked = 0
+        self.unknown_hits = 0
+        self.failures = 0
+
+    def init(self, redis):
+        """Attach the Redis client."""
+        self.redis = redis
+        self._record = redis.register_script(_RECORD_FAILURE)
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self.redis is not None
+
+    async def check(self, email: str, ip: str) -> LoginCheck:
+        """
+        Refuse a login attempt for a locked email or IP.
+
+        One Redis round trip; runs before the user is loaded.
+
+        Args:
+            email (str): Email the client tries to log in as.
+            ip (str): Client IP.
+
+        Returns:
+            LoginCheck: Whether the email is known to have no account.
+
+        Raises:
+            HTTPException: 429 with Retry-After while locked.
+        """
+        if not self.active:
+            return LoginCheck(unknown=False)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.pttl(LOCK_KEY.format(scope="email", subject=email))
+            pipe.pttl(LOCK_KEY.format(scope="ip", subject=ip))
+            pipe.exists(UNKNOWN_KEY.format(email=email))
+            email_lock, ip_lock, unknown = await pipe.execute()
+        except RedisError:
+            logger.warning("Login guard cannot reach Redis, allowing login attempt")
+            return LoginCheck(unknown=False)
+        lock_ms = max(email_lock, ip_lock)
+        if lock_ms > 0:
+            self.locked += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many failed login attempts",
+                headers={"Retry-After": str(max(math.ceil(lock_ms / 1000), 1))},
+            )
+        if unknown:
+            self.unknown_hits += 1
+        return LoginCheck(unknown=bool(unknown))
+
+    async def failure(self, email: str | None, ip: str):
+        """
+        Count a failed attempt, locking the email and/or IP past their thresholds.
+
+        Args:
+            email (str | None): Account whose password was wrong; None when
+                the email has no account, so only the IP is charged.
+            ip (str): Client IP.
+        """
+        self.failures += 1
+        if not self.active:
+            return
+        keys, thresholds = [], []
+        subjects = [("ip", ip, self.ip_threshold)]
+        if email is not None:
+            subjects.insert(0, ("email", email, self.email_threshold))
+        for scope, subject, threshold in subjects:
+            keys += [
+                FAILURES_KEY.format(scope=scope, subject=subject),
+                LOCK_KEY.format(scope=scope, subject=subject),
+            ]
+            thresholds.append(threshold)
+        try:
+            await self._record(
+                keys=keys,
+                args=[self.window, self.lockout_base * 1000, self.lockout_max * 1000, *thresholds],
+            )
+        except RedisError:
+            logger.warning("Login guard cannot reach Redis, failure not recorded")
+
+    async def success(self, email: str):
+        """
+        Forget an account's failures after a successful login.
+
+        The IP counter is kept, so logging into an own account between
+        guesses does not reset it.
+        """
+        if not self.active:
+            return
+        try:
+            await self.redis.delete(
+                FAILURES_KEY.format(scope="email", subject=email),
+                LOCK_KEY.format(scope="email", subject=email),
+            )
+        except RedisError:
+            logger.warning("Login guard cannot reach Redis, failures not cleared")
+
+    async def remember_unknown(self, email: str):
+        """Cache that an email has no account."""
+        if not self.active:
+            return
+        try:
+            await self.redis.set(UNKNOWN_KEY.format(email=email), 1, ex=self.unknown_ttl)
+        except RedisError:
+            logger.warning("Login guard cannot reach Redis, unknown email not cached")
+
+    async def forget_unknown(self, email: str):
+        """Drop an email from the negative cache, e.g. once it signs up."""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(UNKNOWN_KEY.format(email=email))
+        except RedisError:
+            logger.warning("Login guard cannot reach Redis, unknown email not cleared")
+
+
+login_guard = LoginGuard(
+    email_threshold=settings.login_email_threshold,
+    ip_threshold=settings.login_ip_threshold,
+    window=settings.login_failure_window,
+    lockout_base=settings.login_lockout_base,
+    lockout_max=settings.login_lockout_max,
+    unknown_ttl=settings.login_unknown_ttl,
+    enabled=settings.login_guard_enabled,
+)
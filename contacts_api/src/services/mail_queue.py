@@ -0,0 +1,407 @@
+"""
+Outbound mail queue:
+- MailQueue: durable Redis-backed queue of email jobs, with delayed retries
+  (exponential backoff) and a dead-letter list
+- SMTPSender: sends batches of messages over one persistent SMTP connection
+- MailWorker: moves jobs from the queue to the SMTP server (run by src.mail_worker)
+
+Jobs move between Redis keys:
+- ``mail:queue`` (list) — ready to send, pushed left and taken from the right
+- ``mail:processing:<worker>`` (list) — taken by a worker and not yet
+  acknowledged; requeued when that worker restarts
+- ``mail:delayed`` (sorted set scored by due time) — waiting for a retry
+- ``mail:dead`` (list) — failed permanently or too many times; jobs that
+  cannot be parsed are kept as ``{"raw": ..., "last_error": ...}``
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "mail:queue"
+DELAYED_KEY = "mail:delayed"
+DEAD_KEY = "mail:dead"
+PROCESSING_KEY = "mail:processing:{worker}"
+
+# Moves due jobs from the delayed set to the queue in one atomic step, so
+# several workers promoting at once never send a job twice.
+_PROMOTE_DUE = """
+local jobs = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job in ipairs(jobs) do
+    redis.call('ZREM', KEYS[1], job)
+    redis.call('LPUSH', KEYS[2], job)
+end
+return #jobs
+"""
+
+
+class MailQueueUnavailable(Exception):
+    """Raised when a job is enqueued before the queue has a Redis client."""
+
+
+class MailQueue:
+    """
+    Redis-backed queue of outbound email jobs.
+
+    A job is a JSON object with ``id``, ``to``, ``subject``, ``html``,
+    ``attempts`` and, after a failure, ``last_error``.
+
+    Attributes:
+        max_attempts (int): Deliveries tried before a job is dead-lettered.
+        backoff_base (float): Delay in seconds before the first retry; it
+            doubles on every further attempt.
+        backoff_max (float): Upper bound of the retry delay in seconds.
+        redis: Redis client (``decode_responses=True``), set by ``init``.
+    """
+
+    def __init__(self, max_attempts: int = 5, backoff_base: float = 2.0, backoff_max: float = 600):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.redis = None
+        self._promote = None
+
+    def init(self, redis):
+        """Attach the Redis client."""
+        self.redis = redis
+        self._promote = redis.register_script(_PROMOTE_DUE)
+
+    async def enqueue(self, to: str, subject: str, html: str) -> str:
+        """
+        Add an email to the queue.
+
+        Args:
+            to (str): Recipient address.
+            subject (str): Message subject.
+            html (str): HTML body.
+
+        Returns:
+            str: Job id.
+        """
+        if self.redis is None:
+            raise MailQueueUnavailable("Mail queue is not connected to Redis")
+        job = {
+            "id": uuid.uuid4().hex,
+            "to": to,
+            "subject": subject,
+            "html": html,
+            "attempts": 0,
+        }
+        await self.redis.lpush(QUEUE_KEY, json.dumps(job))
+        return job["id"]
+
+    async def fetch(self, worker: str, batch_size: int, timeout: float) -> list[str]:
+        """
+        Take up to ``batch_size`` jobs, waiting up to ``timeout`` seconds for the first.
+
+        Jobs are moved atomically to the worker's processing list, so they
+        survive a crash until acknowledged.
+
+        Args:
+            worker (str): Worker name.
+            batch_size (int): Maximum number of jobs returned.
+            timeout (float): Seconds to block while the queue is empty.
+
+        Returns:
+            list[str]: Raw jobs, oldest first.
+        """
+        processing = PROCESSING_KEY.format(worker=worker)
+        first = await self.redis.blmove(QUEUE_KEY, processing, timeout, "RIGHT", "LEFT")
+        if first is None:
+            return []
+        jobs = [first]
+        while len(jobs) < batch_size:
+            raw = await self.redis.lmove(QUEUE_KEY, processing, "RIGHT", "LEFT")
+            if raw is None:
+                break
+            jobs.append(raw)
+        return jobs
+
+    async def ack(self, worker: str, raw: str):
+        """Drop a delivered job from the worker's processing list."""
+        await self.redis.lrem(PROCESSING_KEY.format(worker=worker), 1, raw)
+
+    def backoff(self, attempts: int) -> float:
+        """Retry delay in seconds after ``attempts`` failed deliveries."""
+        return min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+
+    async def fail(self, worker: str, raw: str, error: str, permanent: bool = False) -> bool:
+        """
+        Record a failed delivery: schedule a retry or dead-letter the job.
+
+        Args:
+            worker (str): Worker name.
+            raw (str): Raw job as returned by ``fetch``.
+            error (str): Description of the failure.
+            permanent (bool): Skip retries (e.g. the server rejected the recipient).
+
+        Returns:
+            bool: True when the job was dead-lettered.
+        """
+        try:
+            job = json.loads(raw)
+            job["attempts"] = int(job.get("attempts", 0)) + 1
+        except (ValueError, TypeError, AttributeError):
+            await self.dead_letter_raw(worker, raw, error)
+            return True
+        job["last_error"] = error
+        dead = permanent or job["attempts"] >= self.max_attempts
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrem(PROCESSING_KEY.format(worker=worker), 1, raw)
+        if dead:
+            job["failed_at"] = time.time()
+            pipe.lpush(DEAD_KEY, json.dumps(job))
+        else:
+            due = time.time() + self.backoff(job["attempts"])
+            pipe.zadd(DELAYED_KEY, {json.dumps(job): due})
+        await pipe.execute()
+        return dead
+
+    async def dead_letter_raw(self, worker: str, raw: str, error: str):
+        """
+        Dead-letter a job without parsing it, e.g. because it is malformed.
+
+        Args:
+            worker (str): Worker name.
+            raw (str): Raw job as returned by ``fetch``.
+            error (str): Description of the failure.
+        """
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrem(PROCESSING_KEY.format(worker=worker), 1, raw)
+        pipe.lpush(DEAD_KEY, json.dumps({"raw": raw, "last_error": error, "failed_at": time.time()}))
+        await pipe.execute()
+
+    async def promote_due(self, now: float | None = None, limit: int = 1000) -> int:
+        """
+        Move retries whose backoff has elapsed back to the queue.
+
+        Returns:
+            int: Number of jobs moved.
+        """
+        now = time.time() if now is None else now
+        return await self._promote(keys=[DELAYED_KEY, QUEUE_KEY], args=[now, limit])
+
+    async def recover(self, worker: str) -> int:
+        """
+        Requeue jobs a previous run of this worker took but never acknowledged.
+
+        Returns:
+            int: Number of jobs requeued.
+        """
+        processing = PROCESSING_KEY.format(worker=worker)
+        moved = 0
+        while await self.redis.lmove(processing, QUEUE_KEY, "LEFT", "RIGHT") is not None:
+            moved += 1
+        return moved
+
+    async def stats(self) -> dict:
+        """
+        Queue lengths.
+
+        Returns:
+            dict: ``queued``, ``delayed`` and ``dead`` job counts.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.llen(QUEUE_KEY)
+        pipe.zcard(DELAYED_KEY)
+        pipe.llen(DEAD_KEY)
+        queued, delayed, dead = await pipe.execute()
+        return {"queued": queued, "delayed": delayed, "dead": dead}
+
+
+def build_message(job: dict, sender: str) -> EmailMessage:
+    """
+    Turn a queued job into an email message.
+
+    Args:
+        job (dict): Queued job.
+        sender (str): From header value.
+
+    Returns:
+        EmailMessage: HTML message.
+    """
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = job["to"]
+    message["Subject"] = job["subject"]
+    message["Message-ID"] = f"<{job['id']}@contacts-api>"
+    message.set_content(job["html"], subtype="html")
+    return message
+
+
+class SMTPSender:
+    """
+    Sends messages over one SMTP connection kept open between batches.
+
+    The connection is opened (STARTTLS and login included) on first use and
+    re-opened once if the server has dropped it meanwhile.
+    """
+
+    def __init__(self, **smtp_options):
+        self.smtp_options = smtp_options
+        self._smtp: aiosmtplib.SMTP | None = None
+        self.connections = 0
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = aiosmtplib.SMTP(**self.smtp_options)
+            await self._smtp.connect()
+            self.connections += 1
+        return self._smtp
+
+    async def _send(self, message: EmailMessage):
+        try:
+            await (await self._connection()).send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # Idle connections get closed by servers; retry once on a fresh one
+            self._smtp = None
+            await (await self._connection()).send_message(message)
+
+    async def send_batch(self, messages: list[EmailMessage]) -> list[Exception | None]:
+        """
+        Send messages one after another over the shared connection.
+
+        Args:
+            messages (list[EmailMessage]): Messages to send.
+
+        Returns:
+            list[Exception | None]: Per message, the error or None on success.
+        """
+        results: list[Exception | None] = []
+        for message in messages:
+            try:
+                await self._send(message)
+                results.append(None)
+            except (aiosmtplib.SMTPException, OSError) as error:
+                if isinstance(error, (aiosmtplib.SMTPServerDisconnected, OSError)):
+                    self._smtp = None
+                results.append(error)
+        return results
+
+    async def close(self):
+        """Politely close the connection if one is open."""
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+
+def is_permanent(error: Exception) -> bool:
+    """True for SMTP 5xx replies, which retrying will not fix."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(refusal.code >= 500 for refusal in error.recipients)
+    return isinstance(error, aiosmtplib.SMTPResponseException) and error.code >= 500
+
+
+class MailWorker:
+    """
+    Delivers queued mail in batches.
+
+    Attributes:
+        queue (MailQueue): Source of jobs.
+        sender (SMTPSender): Delivery connection.
+        name (str): Worker name; keep it stable across restarts so jobs left
+            in its processing list are recovered.
+        batch_size (int): Jobs sent per batch.
+        poll_timeout (float): Seconds to block waiting for new jobs.
+        idle_close (float): Seconds without jobs after which the SMTP
+            connection is closed.
+    """
+
+    def __init__(
+        self,
+        queue: MailQueue,
+        sender: SMTPSender,
+        name: str = "default",
+        batch_size: int = 50,
+        poll_timeout: float = 1.0,
+        idle_close: float = 30.0,
+        from_address: str | None = None,
+    ):
+        self.queue = queue
+        self.sender = sender
+        self.name = name
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.idle_close = idle_close
+        self.from_address = from_address or formataddr(
+            (settings.mail_from_name, str(settings.mail_from))
+        )
+        self._last_sent = time.monotonic()
+
+    async def run_once(self) -> int:
+        """
+        Promote due retries, then take and send one batch.
+
+        Returns:
+            int: Number of jobs taken from the queue.
+        """
+        await self.queue.promote_due()
+        jobs = await self.queue.fetch(self.name, self.batch_size, self.poll_timeout)
+        if not jobs:
+            if time.monotonic() - self._last_sent > self.idle_close:
+                await self.sender.close()
+            return 0
+
+        messages, sendable = [], []
+        for raw in jobs:
+            try:
+                messages.append(build_message(json.loads(raw), self.from_address))
+                sendable.append(raw)
+            except (ValueError, KeyError, TypeError) as error:
+                logger.warning("Dead-lettering malformed mail job: %r", error)
+                await self.queue.dead_letter_raw(self.name, raw, f"Malformed job: {error!r}")
+
+        results = await self.sender.send_batch(messages)
+        for raw, error in zip(sendable, results):
+            if error is None:
+                await self.queue.ack(self.name, raw)
+            else:
+                dead = await self.queue.fail(
+                    self.name, raw, repr(error), permanent=is_permanent(error)
+                )
+                logger.warning("Mail delivery failed%s: %r", " permanently" if dead else "", error)
+        self._last_sent = time.monotonic()
+        return len(jobs)
+
+    async def run(self, stop: asyncio.Event):
+        """
+        Process batches until ``stop`` is set.
+
+        Args:
+            stop (asyncio.Event): Set to shut the worker down after the
+                current batch.
+        """
+        recovered = await self.queue.recover(self.name)
+        if recovered:
+            logger.info("Requeued %d unacknowledged mail jobs", recovered)
+        try:
+            while not stop.is_set():
+                try:
+                    await self.run_once()
+                except (RedisError, OSError):
+                    logger.exception("Mail worker lost Redis, retrying")
+                    await asyncio.sleep(1)
+        finally:
+            await self.sender.close()
+
+
+mail_queue = MailQueue(
+    max_attempts=settings.mail_queue_max_attempts,
+    backoff_base=settings.mail_queue_backoff_base,
+    backoff_max=settings.mail_queue_backoff_max,
+)
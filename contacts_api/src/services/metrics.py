@@ -0,0 +1,347 @@
+"""
+Prometheus-style metrics:
+- Counter / Histogram with labels, rendered in the Prometheus text format
+- MetricsMiddleware: request counts and latency per route template, plus
+  per-request SQL and Redis totals (also sent back in ``Server-Timing`` to
+  requests carrying a valid internal key)
+- SQLAlchemy cursor hooks timing every query
+- InstrumentedRedis: Redis client timing every command and pipeline
+- collectors reporting counters other components already keep (user and
+  token caches, password hashing pool, DB connection pool)
+
+Metrics are per process; scrape each worker or aggregate in Prometheus.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.services.deps import has_internal_key
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """
+    Monotonic counter, one series per label combination.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): Description shown by Prometheus.
+        labelnames (tuple[str, ...]): Label names, in the order values are passed.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        """Add ``amount`` to the series with these label values."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in items
+        ]
+
+
+class Histogram:
+    """
+    Cumulative histogram, one series per label combination.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): Description shown by Prometheus.
+        labelnames (tuple[str, ...]): Label names, in the order values are passed.
+        buckets (tuple[float, ...]): Upper bounds of the buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """Record one observation in the series with these label values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = []
+        for labels, counts, total in items:
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                le_label = 'le="' + le + '"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le_label)} {running}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return lines
+
+
+class Registry:
+    """
+    Metrics exposed on ``/metrics``.
+
+    Collectors are callables returning ``(name, kind, help, samples)``
+    tuples; they report values kept elsewhere at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Callable[[], list[tuple]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func: Callable[[], list[tuple]]):
+        """Register a collector; usable as a decorator."""
+        self._collectors.append(func)
+        return func
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        families = [(m.name, m.kind, m.help, m.samples()) for m in self._metrics]
+        for collect in self._collectors:
+            families.extend(collect())
+        lines = []
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+)
+http_latency = registry.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+)
+db_queries = registry.register(
+    Histogram("db_query_duration_seconds", "SQL statement execution time.", ("operation",))
+)
+db_queries_per_request = registry.register(
+    Histogram(
+        "db_queries_per_request", "SQL statements run per HTTP request.", ("route",), COUNT_BUCKETS
+    )
+)
+db_time_per_request = registry.register(
+    Histogram("db_time_per_request_seconds", "SQL time spent per HTTP request.", ("route",))
+)
+redis_commands = registry.register(
+    Histogram("redis_command_duration_seconds", "Redis command round trip time.", ("command",))
+)
+redis_time_per_request = registry.register(
+    Histogram("redis_time_per_request_seconds", "Redis time spent per HTTP request.", ("route",))
+)
+
+
+class RequestStats:
+    """SQL and Redis totals of the request being handled."""
+
+    __slots__ = ("db_queries", "db_seconds", "redis_commands", "redis_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.redis_commands = 0
+        self.redis_seconds = 0.0
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+# ---------- SQLAlchemy ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    db_queries.observe(elapsed, operation)
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    stack = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if stack:
+        stack.pop()
+
+
+def instrument_sqlalchemy():
+    """Time statements on every engine (async engines included)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+# ---------- Redis ----------
+
+def _record_redis(command: str, started: float):
+    elapsed = time.perf_counter() - started
+    redis_commands.observe(elapsed, command)
+    stats = current_request.get()
+    if stats is not None:
+        stats.redis_commands += 1
+        stats.redis_seconds += elapsed
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline whose ``execute`` round trip is timed as one PIPELINE command."""
+
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            _record_redis("PIPELINE", started)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Async Redis client timing every command and pipeline."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            _record_redis(str(args[0]).upper(), started)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+# ---------- ASGI ----------
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count and latency per route template.
+
+    Requests matching no route are grouped under ``<unmatched>`` so unknown
+    paths cannot blow up the number of series. Backend timings go out in
+    ``Server-Timing`` only to requests with a valid X-Internal-Key, unless
+    ``public_server_timing`` sends them to everyone.
+    """
+
+    def __init__(self, app, public_server_timing: bool = False):
+        self.app = app
+        self.public_server_timing = public_server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+        server_timing = self.public_server_timing or self._authorized(scope)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if server_timing:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"server-timing", self._server_timing(stats, started).encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            method = scope["method"]
+            http_requests.inc(method, route, str(status_code))
+            http_latency.observe(time.perf_counter() - started, method, route)
+            db_queries_per_request.observe(stats.db_queries, route)
+            db_time_per_request.observe(stats.db_seconds, route)
+            redis_time_per_request.observe(stats.redis_seconds, route)
+
+    @staticmethod
+    def _authorized(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-internal-key":
+                return has_internal_key(value.decode("latin-1"))
+        return False
+
+    @staticmethod
+    def _server_timing(stats: RequestStats, started: float) -> str:
+        return (
+            f"db;desc=\"{stats.db_queries} queries\";dur={stats.db_seconds * 1000:.1f}, "
+            f"redis;desc=\"{stats.redis_commands} commands\";dur={stats.redis_seconds * 1000:.1f}, "
+            f"app;dur={(time.perf_counter() - started) * 1000:.1f}"
+        )
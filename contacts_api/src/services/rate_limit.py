@@ -0,0 +1,271 @@
+"""
+Request rate limiting on Redis:
+- GCRA (generic cell rate algorithm) quotas per user, per client IP and per
+  route, all checked and charged by one atomic Lua script call
+- optional local pre-allocation: a worker reserves a batch of tokens in one
+  call and admits requests from it without talking to Redis
+- standard ``RateLimit-*`` response headers and ``Retry-After`` on 429
+- quotas declared on routes and overridable through ``settings.rate_limits``
+"""
+
+import logging
+import math
+import time
+from typing import NamedTuple
+
+from fastapi import Depends, HTTPException, Request, Response
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY = "ratelimit:{name}:{scope}:{subject}"
+
+# GCRA over several keys at once. For each key, ARGV holds the emission
+# interval (ms per request) and the burst size; a key stores its
+# "theoretical arrival time" (TAT). Up to ARGV[2] tokens are granted, limited
+# by the key with the fewest available; nothing is charged when none are.
+# Returns {granted, remaining, retry_after_ms, reset_ms, tightest key index}.
+_GCRA = """
+local now = tonumber(ARGV[1])
+local want = tonumber(ARGV[2])
+local tats, grant, tightest = {}, want, 1
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[1 + 2 * i])
+    local burst = tonumber(ARGV[2 + 2 * i])
+    local tat = tonumber(redis.call('GET', KEYS[i])) or now
+    if tat < now then tat = now end
+    tats[i] = tat
+    local available = math.floor((now + burst * interval - tat) / interval)
+    if available < grant then grant = available; tightest = i end
+end
+if grant <= 0 then
+    local retry = 0
+    for i = 1, #KEYS do
+        local interval = tonumber(ARGV[1 + 2 * i])
+        local burst = tonumber(ARGV[2 + 2 * i])
+        local wait = tats[i] - (burst - 1) * interval - now
+        if wait > retry then retry = wait; tightest = i end
+    end
+    return {0, 0, math.ceil(retry), math.ceil(tats[tightest] - now), tightest}
+end
+local remaining, reset = nil, 0
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[1 + 2 * i])
+    local burst = tonumber(ARGV[2 + 2 * i])
+    local tat = tats[i] + grant * interval
+    redis.call('SET', KEYS[i], tostring(tat), 'PX', math.ceil(tat - now))
+    local left = math.floor((now + burst * interval - tat) / interval)
+    if remaining == nil or left < remaining then
+        remaining = left; tightest = i; reset = math.ceil(tat - now)
+    end
+end
+return {grant, remaining, 0, reset, tightest}
+"""
+
+
+class Quota(NamedTuple):
+    """``limit`` requests per ``period`` seconds."""
+
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Quota":
+        """
+        Parse a quota written as ``"<limit>/<seconds>"``, e.g. ``"100/60"``.
+
+        Raises:
+            ValueError: On malformed input.
+        """
+        limit, _, period = value.partition("/")
+        quota = cls(int(limit), float(period))
+        if quota.limit < 1 or quota.period <= 0:
+            raise ValueError(f"Invalid rate limit quota: {value}")
+        return quota
+
+    @property
+    def interval_ms(self) -> float:
+        return self.period * 1000 / self.limit
+
+
+class Decision(NamedTuple):
+    """Outcome of a rate limit check, in the terms of its tightest quota."""
+
+    allowed: bool
+    quota: Quota
+    remaining: int
+    retry_after: float
+    reset: float
+
+    def headers(self) -> dict[str, str]:
+        """``RateLimit-*`` headers, plus ``Retry-After`` when refused."""
+        headers = {
+            "RateLimit-Limit": str(self.quota.limit),
+            "RateLimit-Remaining": str(max(self.remaining, 0)),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+            "RateLimit-Policy": f"{self.quota.limit};w={self.quota.period:g}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+
+class _Lease:
+    __slots__ = ("tokens", "expires_at", "decision")
+
+    def __init__(self, tokens: int, expires_at: float, decision: Decision):
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.decision = decision
+
+
+class Limiter:
+    """
+    Evaluates quotas against Redis.
+
+    Attributes:
+        redis: Redis client, set by ``init``; without it every request is
+            allowed.
+        enabled (bool): Turns limiting off entirely when False.
+    """
+
+    def __init__(self, enabled: bool = True, lease_ttl: float = 1.0):
+        self.redis = None
+        self.enabled = enabled
+        self.lease_ttl = lease_ttl
+        self._script = None
+        self._leases = LRUCache(maxsize=10_000)
+        self.calls = 0
+
+    def init(self, redis):
+        """Attach the Redis client."""
+        self.redis = redis
+        self._script = redis.register_script(_GCRA)
+        self._leases.clear()
+
+    async def _charge(self, keys: list[str], quotas: list[Quota], want: int) -> tuple[int, Decision]:
+        args = [int(time.time() * 1000), want]
+        for quota in quotas:
+            args += [quota.interval_ms, quota.limit]
+        self.calls += 1
+        granted, remaining, retry_ms, reset_ms, tightest = await self._script(
+            keys=keys, args=args
+        )
+        decision = Decision(
+            allowed=granted > 0,
+            quota=quotas[tightest - 1],
+            remaining=remaining,
+            retry_after=retry_ms / 1000,
+            reset=reset_ms / 1000,
+        )
+        return granted, decision
+
+    async def hit(self, keys: list[str], quotas: list[Quota], batch: int = 1) -> Decision | None:
+        """
+        Admit or refuse one request against all quotas.
+
+        Args:
+            keys (list[str]): Redis key of each quota.
+            quotas (list[Quota]): Quotas, in the order of ``keys``.
+            batch (int): Tokens to reserve per Redis call; above 1 the extra
+                tokens are kept in a short-lived local lease and used by the
+                following requests with the same keys.
+
+        Returns:
+            Decision | None: None when limiting is off or Redis is unavailable.
+        """
+        if not self.enabled or self.redis is None or not keys:
+            return None
+
+        lease_key = tuple(keys)
+        if batch > 1:
+            lease = self._leases.get(lease_key)
+            if lease is not None and lease.tokens > 0 and time.monotonic() < lease.expires_at:
+                lease.tokens -= 1
+                return lease.decision._replace(
+                    remaining=lease.decision.remaining + lease.tokens
+                )
+
+        try:
+            granted, decision = await self._charge(keys, quotas, batch)
+        except RedisError:
+            logger.warning("Rate limiter cannot reach Redis, allowing request")
+            return None
+        if batch > 1 and granted > 1:
+            self._leases.set(
+                lease_key, _Lease(granted - 1, time.monotonic() + self.lease_ttl, decision)
+            )
+            return decision._replace(remaining=decision.remaining + granted - 1)
+        return decision
+
+
+limiter = Limiter(enabled=settings.rate_limit_enabled)
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client as seen by the application server."""
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    """
+    Route dependency enforcing the quotas of one named limit.
+
+    Quotas are ``"<limit>/<seconds>"`` strings; entries under ``name`` in
+    ``settings.rate_limits`` (e.g. ``{"contacts:create": {"user": "10/60"}}``)
+    replace the ones given here.
+
+    Attributes:
+        name (str): Limit name, part of the Redis keys.
+        user (str | None): Quota per authenticated user.
+        ip (str | None): Quota per client IP.
+        route (str | None): Quota shared by all callers of the route.
+        batch (int): Local pre-allocation size; 1 checks Redis on every request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        user: str | None = None,
+        ip: str | None = None,
+        route: str | None = None,
+        batch: int = 1,
+    ):
+        configured = {"user": user, "ip": ip, "route": route}
+        configured.update(settings.rate_limits.get(name, {}))
+        self.name = name
+        self.quotas = {
+            scope: Quota.parse(value) for scope, value in configured.items() if value
+        }
+        self.batch = batch
+
+    def _subjects(self, request: Request, user: User) -> dict[str, str]:
+        return {"user": str(user.id), "ip": client_ip(request), "route": "all"}
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        current_user: User = Depends(auth_service.get_current_user),
+    ):
+        subjects = self._subjects(request, current_user)
+        keys, quotas = [], []
+        for scope, quota in self.quotas.items():
+            keys.append(
+                RATE_LIMIT_KEY.format(name=self.name, scope=scope, subject=subjects[scope])
+            )
+            quotas.append(quota)
+
+        decision = await limiter.hit(keys, quotas, self.batch)
+        if decision is None:
+            return
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=429, detail="Too Many Requests", headers=decision.headers()
+            )
+        response.headers.update(decision.headers())
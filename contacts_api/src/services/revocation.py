@@ -0,0 +1,223 @@
+"""
+Access-token revocation:
+- revoked token ids (``jti``) kept in Redis until the token would expire
+- a per-worker Bloom filter of revoked ids, rebuilt from Redis periodically,
+  so checking a token that was not revoked costs no network round trip
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = "revoked:{jti}"
+# Sorted set of revoked ids scored by token expiry, read when syncing
+REVOKED_INDEX_KEY = "revoked:index"
+# Bumped on every revocation so workers skip rebuilds when nothing changed
+REVOKED_GENERATION_KEY = "revoked:generation"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings.
+
+    Membership tests never miss an added item; items never added are
+    reported present with probability about ``error_rate`` while the filter
+    holds no more than ``capacity`` items.
+
+    Attributes:
+        size (int): Number of bits.
+        hashes (int): Bits set per item.
+        count (int): Items added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: bit i is h1 + i * h2, from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        """Add an item."""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class TokenRevocations:
+    """
+    Revocation list of access tokens.
+
+    A revoked ``jti`` is stored as ``revoked:{jti}`` with a TTL equal to the
+    token's remaining lifetime, and in the ``revoked:index`` sorted set
+    scored by expiry. Each worker keeps a Bloom filter of the live ids:
+    a token absent from it is accepted without I/O, a token present is
+    confirmed against Redis to rule out a false positive. The filter is
+    rebuilt every ``interval`` seconds when the generation counter moved,
+    so a revocation made on another worker takes effect within that
+    interval; on the revoking worker it is immediate.
+
+    Attributes:
+        interval (float): Seconds between syncs.
+        capacity (int): Revoked ids the filter is sized for; it grows when
+            more are live.
+        error_rate (float): Target false-positive rate of the filter.
+        redis: Redis client, set by ``init``; without it revocations are
+            only known to this process.
+        checks (int), positives (int), revoked (int): Tokens checked, found
+            in the filter, and confirmed revoked.
+    """
+
+    def __init__(self, interval: float = 5, capacity: int = 100_000, error_rate: float = 0.001):
+        self.interval = interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.redis = None
+        self.checks = 0
+        self.positives = 0
+        self.revoked = 0
+        self._reset()
+        self._task = None
+
+    def _reset(self):
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        self.generation = None
+        # Ids revoked by this worker, kept across rebuilds until they expire,
+        # since a sync may have read Redis before they were written
+        self._local: dict[str, float] = {}
+
+    def init(self, redis):
+        """Attach the shared Redis client and drop all local state."""
+        self.redis = redis
+        self._reset()
+
+    async def revoke(self, jti: str, expires_at: float):
+        """
+        Revoke a token until it expires.
+
+        Args:
+            jti (str): Token id.
+            expires_at (float): Token expiry as a Unix timestamp.
+
+        Raises:
+            HTTPException: 503 when Redis cannot be reached; the token is
+                then not revoked.
+        """
+        ttl = math.ceil(expires_at - time.time())
+        if ttl <= 0:
+            return
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.set(REVOKED_KEY.format(jti=jti), 1, ex=ttl)
+            pipe.zadd(REVOKED_INDEX_KEY, {jti: expires_at})
+            pipe.incr(REVOKED_GENERATION_KEY)
+            try:
+                await pipe.execute()
+            except RedisError:
+                logger.exception("Could not revoke a token")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Session store unavailable",
+                    headers={"Retry-After": "1"},
+                )
+        self._local[jti] = expires_at
+        self.bloom.add(jti)
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        """
+        Whether a token was revoked.
+
+        Args:
+            jti (str | None): Token id; tokens without one predate
+                revocation and are never revoked.
+
+        Returns:
+            bool: True when the token must be refused.
+        """
+        self.checks += 1
+        if jti is None or jti not in self.bloom:
+            return False
+        self.positives += 1
+        revoked = True
+        if self.redis is not None and jti not in self._local:
+            try:
+                revoked = bool(await self.redis.exists(REVOKED_KEY.format(jti=jti)))
+            except RedisError:
+                # Fail closed: the filter rarely errs, so the token was most likely revoked
+                logger.warning("Token revocation check could not reach Redis")
+        self.revoked += revoked
+        return revoked
+
+    async def sync(self):
+        """Rebuild the filter from Redis if any token was revoked since the last sync."""
+        if self.redis is None:
+            return
+        now = time.time()
+        generation = await self.redis.get(REVOKED_GENERATION_KEY)
+        if generation == self.generation:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(REVOKED_INDEX_KEY, "-inf", now)
+        pipe.zrange(REVOKED_INDEX_KEY, 0, -1)
+        _, jtis = await pipe.execute()
+
+        self._local = {jti: exp for jti, exp in self._local.items() if exp > now}
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        for jti in self._local:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.generation = generation
+
+    async def _sync_forever(self):
+        while True:
+            try:
+                await self.sync()
+            except (RedisError, OSError):
+                logger.warning("Token revocation sync could not reach Redis, retrying")
+            await asyncio.sleep(self.interval)
+
+    def start_sync(self):
+        """Start syncing the filter in a background task."""
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._sync_forever())
+
+    async def stop_sync(self):
+        """Stop the background sync."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+token_revocations = TokenRevocations(
+    interval=settings.token_revocation_sync_interval,
+    capacity=settings.token_revocation_capacity,
+    error_rate=settings.token_revocation_error_rate,
+)
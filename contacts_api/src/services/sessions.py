@@ -0,0 +1,252 @@
+"""
+Refresh-token sessions kept in Redis:
+- one session per login (device), several per user
+- refresh token rotation with reuse detection, in one atomic Lua call
+- listing and revoking a user's sessions without touching the database
+"""
+
+import logging
+import secrets
+import time
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = "session:{sid}"
+USER_SESSIONS_KEY = "sessions:{email}"
+# Matches the refresh token lifetime; renewed on every rotation
+SESSION_TTL = 7 * 24 * 60 * 60
+# A client racing itself (two tabs refreshing at once) presents the previous
+# refresh token shortly after a rotation; that is refused without revoking
+REUSE_GRACE = 10
+DEVICE_MAX_LENGTH = 200
+
+# KEYS: session hash, user's session set. ARGV: presented jti, new jti, now,
+# grace seconds, ttl, sid. Returns 1 when rotated, 0 for an unknown (expired
+# or revoked) session, -1 for a previous token within the grace period and
+# -2 for reuse of an older token, which revokes the session.
+_ROTATE = """
+local current = redis.call('HGET', KEYS[1], 'jti')
+if not current then
+    return 0
+end
+if current == ARGV[1] then
+    redis.call('HSET', KEYS[1], 'jti', ARGV[2], 'previous', ARGV[1],
+               'rotated_at', ARGV[3], 'last_used', ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    redis.call('EXPIRE', KEYS[2], ARGV[5])
+    return 1
+end
+local rotated_at = tonumber(redis.call('HGET', KEYS[1], 'rotated_at') or '0')
+if redis.call('HGET', KEYS[1], 'previous') == ARGV[1]
+        and tonumber(ARGV[3]) - rotated_at <= tonumber(ARGV[4]) then
+    return -1
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[2], ARGV[6])
+return -2
+"""
+
+
+def new_id() -> str:
+    """Random identifier for sessions and refresh tokens (``jti``)."""
+    return secrets.token_urlsafe(16)
+
+
+class SessionRegistry:
+    """
+    Registry of refresh-token sessions in Redis.
+
+    A session is a hash ``session:{sid}`` holding the owner's email, the
+    device (user agent), creation and last-use times, the ``jti`` of the
+    refresh token currently valid for it and the one it replaced. Each user
+    has a set ``sessions:{email}`` of session ids. Both expire with the
+    refresh token and are renewed on rotation.
+
+    Attributes:
+        ttl (int): Session lifetime in seconds.
+        grace (int): Seconds the previous refresh token is refused without
+            revoking the session.
+        redis: Redis client, set by ``init``; without it every operation
+            fails with 503.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL, grace: int = REUSE_GRACE):
+        self.ttl = ttl
+        self.grace = grace
+        self.redis = None
+        self._rotate = None
+
+    def init(self, redis):
+        """Attach the shared Redis client."""
+        self.redis = redis
+        self._rotate = redis.register_script(_ROTATE)
+
+    @staticmethod
+    def _unavailable() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Session store unavailable",
+            headers={"Retry-After": "1"},
+        )
+
+    def _client(self):
+        if self.redis is None:
+            raise self._unavailable()
+        return self.redis
+
+    async def create(self, email: str, device: str | None) -> tuple[str, str]:
+        """
+        Open a session for a login.
+
+        Args:
+            email (str): Owner of the session.
+            device (str | None): Client description, usually the User-Agent.
+
+        Returns:
+            tuple[str, str]: Session id and the ``jti`` of its first refresh token.
+        """
+        redis = self._client()
+        sid, jti = new_id(), new_id()
+        now = int(time.time())
+        key = SESSION_KEY.format(sid=sid)
+        sessions_key = USER_SESSIONS_KEY.format(email=email)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={
+                    "email": email,
+                    "device": (device or "")[:DEVICE_MAX_LENGTH],
+                    "created": now,
+                    "last_used": now,
+                    "jti": jti,
+                })
+                pipe.expire(key, self.ttl)
+                pipe.sadd(sessions_key, sid)
+                pipe.expire(sessions_key, self.ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.exception("Could not create a session")
+            raise self._unavailable()
+        return sid, jti
+
+    async def rotate(self, email: str, sid: str, jti: str) -> str:
+        """
+        Exchange a session's current refresh token for a new one.
+
+        Args:
+            email (str): Owner named by the refresh token.
+            sid (str): Session named by the refresh token.
+            jti (str): Id of the presented refresh token.
+
+        Returns:
+            str: ``jti`` of the new refresh token.
+
+        Raises:
+            HTTPException: 401 when the session is gone or the token was
+            already rotated; reuse outside the grace period also revokes
+            the session. 503 when Redis is unavailable.
+        """
+        self._client()
+        new_jti = new_id()
+        try:
+            result = await self._rotate(
+                keys=[SESSION_KEY.format(sid=sid), USER_SESSIONS_KEY.format(email=email)],
+                args=[jti, new_jti, int(time.time()), self.grace, self.ttl, sid],
+            )
+        except RedisError:
+            logger.exception("Could not rotate a session")
+            raise self._unavailable()
+        result = int(result)
+        if result == 1:
+            return new_jti
+        if result == -1:
+            raise HTTPException(status_code=401, detail="Refresh token already used")
+        if result == -2:
+            logger.warning("Refresh token reuse detected, session %s revoked", sid)
+            raise HTTPException(status_code=401, detail="Refresh token reuse detected")
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    async def list(self, email: str) -> list[dict]:
+        """
+        Live sessions of a user, most recently used first.
+
+        Ids of sessions that have expired are dropped from the user's set.
+
+        Args:
+            email (str): Owner of the sessions.
+
+        Returns:
+            list[dict]: ``sid``, ``device``, ``created`` and ``last_used``
+            (Unix seconds) of each session.
+        """
+        redis = self._client()
+        sessions_key = USER_SESSIONS_KEY.format(email=email)
+        try:
+            sids = sorted(await redis.smembers(sessions_key))
+            async with redis.pipeline(transaction=False) as pipe:
+                for sid in sids:
+                    pipe.hmget(SESSION_KEY.format(sid=sid), "device", "created", "last_used")
+                rows = await pipe.execute()
+            expired = [sid for sid, row in zip(sids, rows) if row[1] is None]
+            if expired:
+                await redis.srem(sessions_key, *expired)
+        except RedisError:
+            logger.exception("Could not list sessions")
+            raise self._unavailable()
+        sessions = [
+            {"sid": sid, "device": device, "created": int(created), "last_used": int(last_used)}
+            for sid, (device, created, last_used) in zip(sids, rows)
+            if created is not None
+        ]
+        sessions.sort(key=lambda s: s["last_used"], reverse=True)
+        return sessions
+
+    async def revoke(self, email: str, sid: str) -> bool:
+        """
+        End one of a user's sessions.
+
+        Args:
+            email (str): Owner of the session.
+            sid (str): Session to end.
+
+        Returns:
+            bool: False when the user had no such session.
+        """
+        redis = self._client()
+        try:
+            if not await redis.srem(USER_SESSIONS_KEY.format(email=email), sid):
+                return False
+            await redis.delete(SESSION_KEY.format(sid=sid))
+        except RedisError:
+            logger.exception("Could not revoke a session")
+            raise self._unavailable()
+        return True
+
+    async def revoke_all(self, email: str) -> int:
+        """
+        End every session of a user (e.g. after a password reset).
+
+        Args:
+            email (str): Owner of the sessions.
+
+        Returns:
+            int: Number of sessions ended.
+        """
+        redis = self._client()
+        sessions_key = USER_SESSIONS_KEY.format(email=email)
+        try:
+            sids = await redis.smembers(sessions_key)
+            if not sids:
+                return 0
+            # Only the ids read are removed, so a login racing the reset keeps its session
+            ended = await redis.delete(*(SESSION_KEY.format(sid=sid) for sid in sids))
+            await redis.srem(sessions_key, *sids)
+            return ended
+        except RedisError:
+            logger.exception("Could not revoke sessions")
+            raise self._unavailable()
+
+
+session_registry = SessionRegistry()
@@ -0,0 +1,266 @@
+"""
+Per-request SQL profiler (development aid, off unless
+``settings.sql_profiler_enabled``):
+- records every statement a request runs, with timing and the count and
+  types of its parameters (their values only when explicitly enabled, as
+  they hold password hashes, emails and other user data)
+- attaches the query plan (EXPLAIN) of slow SELECTs
+- flags statements repeated within one request, the usual sign of N+1 loading
+- reports a summary in the ``X-SQL-Profile`` response header and keeps the
+  latest profiles for the /internal/sql-profiles endpoint
+"""
+
+import logging
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+HEADER = "X-SQL-Profile"
+
+
+class StatementRecord:
+    """One executed statement."""
+
+    __slots__ = ("sql", "parameters", "duration", "plan")
+
+    def __init__(self, sql: str, parameters: str, duration: float, plan: list[str] | None = None):
+        self.sql = sql
+        self.parameters = parameters
+        self.duration = duration
+        self.plan = plan
+
+
+class RequestProfile:
+    """Statements run while handling one request."""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.status: int | None = None
+        self.statements: list[StatementRecord] = []
+
+    def repeated(self, threshold: int) -> list[dict]:
+        """Statements run at least ``threshold`` times, most frequent first."""
+        counts = Counter(record.sql for record in self.statements)
+        totals: dict[str, float] = {}
+        for record in self.statements:
+            totals[record.sql] = totals.get(record.sql, 0.0) + record.duration
+        return [
+            {"sql": sql, "count": count, "total_ms": round(totals[sql] * 1000, 3)}
+            for sql, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def summary(self, slow_seconds: float, repeat_threshold: int) -> dict:
+        """
+        Profile as a JSON-serializable dict.
+
+        Returns:
+            dict: Request, totals, the statements, slow ones and repeated ones.
+        """
+        statements = [
+            {
+                "sql": record.sql,
+                "parameters": record.parameters,
+                "ms": round(record.duration * 1000, 3),
+                **({"plan": record.plan} if record.plan is not None else {}),
+            }
+            for record in self.statements
+        ]
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "queries": len(self.statements),
+            "time_ms": round(sum(r.duration for r in self.statements) * 1000, 3),
+            "slow": [s for s in statements if s["ms"] >= slow_seconds * 1000],
+            "repeated": self.repeated(repeat_threshold),
+            "statements": statements,
+        }
+
+
+def describe_parameters(parameters, executemany: bool = False) -> str:
+    """
+    Count and types of statement parameters, without their values.
+
+    Args:
+        parameters: DBAPI parameters: a sequence or mapping, or a sequence of
+            them for ``executemany``.
+        executemany (bool): Whether ``parameters`` holds one set per row.
+
+    Returns:
+        str: E.g. ``2 parameters (str, int)`` or ``5 rows of 2 parameters (str, int)``.
+    """
+    prefix = ""
+    if executemany:
+        rows = list(parameters or ())
+        prefix = f"{len(rows)} rows of "
+        parameters = rows[0] if rows else ()
+    values = list(parameters.values()) if isinstance(parameters, dict) else list(parameters or ())
+    types = ", ".join(type(value).__name__ for value in values)
+    return f"{prefix}{len(values)} parameters ({types})"
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+
+
+def _explain(conn, statement: str, parameters) -> list[str] | None:
+    # A separate DBAPI cursor, so the result of the profiled statement is untouched
+    dialect = conn.dialect.name
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(dialect)
+    if prefix is None:
+        return None
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as error:  # the plan is best-effort diagnostics
+        return [f"EXPLAIN failed: {error}"]
+    finally:
+        cursor.close()
+
+
+class SQLProfiler:
+    """
+    Collects request profiles when enabled.
+
+    Attributes:
+        enabled (bool): Profile requests; when False the hooks return at once.
+        slow_seconds (float): Statements at least this slow get a query plan.
+        repeat_threshold (int): Identical statements per request flagged as N+1.
+        record_parameters (bool): Keep parameter values; otherwise only their
+            count and types are recorded.
+        profiles (deque): Latest request summaries, newest last.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        slow_ms: float = 50,
+        repeat_threshold: int = 3,
+        keep: int = 100,
+        record_parameters: bool = False,
+    ):
+        self.enabled = enabled
+        self.record_parameters = record_parameters
+        self.slow_seconds = slow_ms / 1000
+        self.repeat_threshold = repeat_threshold
+        self.profiles: deque = deque(maxlen=keep)
+
+    # ---------- SQLAlchemy hooks ----------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled and current_profile.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        stack = conn.info.get("profile_started")
+        if not self.enabled or profile is None or not stack:
+            return
+        duration = time.perf_counter() - stack.pop()
+        plan = None
+        if (
+            duration >= self.slow_seconds
+            and not executemany
+            and statement.lstrip()[:6].upper() in ("SELECT", "WITH")
+        ):
+            plan = _explain(conn, statement, parameters)
+        if self.record_parameters:
+            recorded = repr(parameters)[:500]
+        else:
+            recorded = describe_parameters(parameters, executemany)[:500]
+        profile.statements.append(StatementRecord(statement, recorded, duration, plan))
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        stack = conn.info.get("profile_started") if conn is not None else None
+        if stack:
+            stack.pop()
+
+    def install(self, target=Engine):
+        """
+        Listen to executed statements.
+
+        Args:
+            target: Engine to profile; by default every engine (async ones included).
+        """
+        if not event.contains(target, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(target, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(target, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(target, "handle_error", self._handle_error)
+
+    # ---------- Request lifecycle ----------
+
+    def finish(self, profile: RequestProfile) -> dict:
+        """Summarize a finished request, keep it and warn about N+1 patterns."""
+        summary = profile.summary(self.slow_seconds, self.repeat_threshold)
+        self.profiles.append(summary)
+        for item in summary["repeated"]:
+            logger.warning(
+                "Possible N+1 in %s %s: %d x %s",
+                profile.method, profile.path, item["count"], item["sql"][:200],
+            )
+        return summary
+
+    @staticmethod
+    def header(summary: dict) -> str:
+        return (
+            f"id={summary['id']}; queries={summary['queries']}; "
+            f"time_ms={summary['time_ms']}; slow={len(summary['slow'])}; "
+            f"repeated={len(summary['repeated'])}"
+        )
+
+
+sql_profiler = SQLProfiler(
+    enabled=settings.sql_profiler_enabled,
+    slow_ms=settings.sql_profiler_slow_ms,
+    repeat_threshold=settings.sql_profiler_repeat_threshold,
+    record_parameters=settings.sql_profiler_record_parameters,
+)
+
+
+class SQLProfilerMiddleware:
+    """
+    ASGI middleware profiling each HTTP request while the profiler is enabled.
+
+    The ``X-SQL-Profile`` header covers statements run before the response
+    starts; statements of a streamed body still appear in the stored profile.
+    """
+
+    def __init__(self, app, profiler: SQLProfiler = sql_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                partial = profile.summary(self.profiler.slow_seconds, self.profiler.repeat_threshold)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (HEADER.lower().encode(), self.profiler.header(partial).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            self.profiler.finish(profile)
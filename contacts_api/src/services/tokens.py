@@ -0,0 +1,353 @@
+"""
+JSON Web Tokens (compact JWS) without a general-purpose JWT library:
+- HS256/384/512 with the HMAC key set up once per key, not per token
+- EdDSA (Ed25519) and ES256 so other services can verify tokens with the
+  public keys alone (published as a JWKS)
+- a key ring selected by the ``kid`` header: one active key signs, retired
+  keys keep verifying until their tokens expire
+"""
+
+import abc
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+
+# Headers are attacker controlled; only this many distinct ones are memoized
+HEADER_CACHE_SIZE = 64
+
+
+class TokenError(Exception):
+    """Raised for malformed, forged or expired tokens."""
+
+
+def b64encode(data: bytes) -> str:
+    """Base64url without padding, as JWS uses it."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64decode(segment: str) -> bytes:
+    """Inverse of ``b64encode``."""
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class SigningKey(abc.ABC):
+    """
+    A key of the key ring.
+
+    Attributes:
+        alg (str): JWS algorithm the key is used with.
+        kid (str | None): Key id written to and matched against the header.
+    """
+
+    alg: str
+
+    def __init__(self, kid: str | None = None):
+        self.kid = kid
+
+    @abc.abstractmethod
+    def sign(self, data: bytes) -> bytes:
+        """Signature of ``data``."""
+
+    @abc.abstractmethod
+    def verify(self, data: bytes, signature: bytes) -> bool:
+        """True when ``signature`` is a valid signature of ``data``."""
+
+    def public_jwk(self) -> dict | None:
+        """Public half as a JWK, or None for symmetric keys."""
+        return None
+
+
+class HMACKey(SigningKey):
+    """HS256/HS384/HS512 key."""
+
+    DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+    def __init__(self, secret: str | bytes, alg: str = "HS256", kid: str | None = None):
+        super().__init__(kid)
+        if alg not in self.DIGESTS:
+            raise ValueError(f"Unsupported HMAC algorithm {alg}")
+        self.alg = alg
+        if isinstance(secret, str):
+            secret = secret.encode()
+        # Keyed once; copies reuse the padded key instead of deriving it per token
+        self._mac = hmac.new(secret, digestmod=self.DIGESTS[alg])
+
+    def sign(self, data: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(data)
+        return mac.digest()
+
+    def verify(self, data: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self.sign(data), signature)
+
+
+class EdDSAKey(SigningKey):
+    """Ed25519 key; without the private half it only verifies."""
+
+    alg = "EdDSA"
+
+    def __init__(
+        self,
+        private_key: ed25519.Ed25519PrivateKey | None = None,
+        public_key: ed25519.Ed25519PublicKey | None = None,
+        kid: str | None = None,
+    ):
+        super().__init__(kid)
+        self._private = private_key
+        self._public = public_key or private_key.public_key()
+
+    def sign(self, data: bytes) -> bytes:
+        if self._private is None:
+            raise TokenError(f"Key {self.kid} can only verify")
+        return self._private.sign(data)
+
+    def verify(self, data: bytes, signature: bytes) -> bool:
+        try:
+            self._public.verify(signature, data)
+        except InvalidSignature:
+            return False
+        return True
+
+    def public_jwk(self) -> dict:
+        raw = self._public.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"kty": "OKP", "crv": "Ed25519", "x": b64encode(raw),
+                "kid": self.kid, "alg": self.alg, "use": "sig"}
+
+
+class ES256Key(SigningKey):
+    """ECDSA P-256 key with SHA-256; without the private half it only verifies."""
+
+    alg = "ES256"
+
+    def __init__(
+        self,
+        private_key: ec.EllipticCurvePrivateKey | None = None,
+        public_key: ec.EllipticCurvePublicKey | None = None,
+        kid: str | None = None,
+    ):
+        super().__init__(kid)
+        self._private = private_key
+        self._public = public_key or private_key.public_key()
+        if not isinstance(self._public.curve, ec.SECP256R1):
+            raise ValueError("ES256 needs a P-256 key")
+
+    def sign(self, data: bytes) -> bytes:
+        if self._private is None:
+            raise TokenError(f"Key {self.kid} can only verify")
+        # JWS wants the raw r || s pair, not DER
+        r, s = decode_dss_signature(self._private.sign(data, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    def verify(self, data: bytes, signature: bytes) -> bool:
+        if len(signature) != 64:
+            return False
+        r, s = int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big")
+        try:
+            self._public.verify(encode_dss_signature(r, s), data, ec.ECDSA(hashes.SHA256()))
+        except InvalidSignature:
+            return False
+        return True
+
+    def public_jwk(self) -> dict:
+        numbers = self._public.public_numbers()
+        return {"kty": "EC", "crv": "P-256",
+                "x": b64encode(numbers.x.to_bytes(32, "big")),
+                "y": b64encode(numbers.y.to_bytes(32, "big")),
+                "kid": self.kid, "alg": self.alg, "use": "sig"}
+
+
+def load_key(spec: dict) -> SigningKey:
+    """
+    Build a key from its configuration.
+
+    Args:
+        spec (dict): ``kid``, ``alg`` and, for HS*, ``secret``; for EdDSA and
+            ES256 a PEM ``private_key`` (or ``private_key_file``) to sign, or
+            only a PEM ``public_key`` (or ``public_key_file``) to verify.
+
+    Returns:
+        SigningKey: The key.
+    """
+    alg, kid = spec.get("alg", "HS256"), spec.get("kid")
+    if alg in HMACKey.DIGESTS:
+        return HMACKey(spec["secret"], alg, kid)
+    if alg not in ("EdDSA", "ES256"):
+        raise ValueError(f"Unsupported token algorithm {alg}")
+
+    def pem(name: str) -> bytes | None:
+        if spec.get(name):
+            return spec[name].encode()
+        if spec.get(f"{name}_file"):
+            with open(spec[f"{name}_file"], "rb") as file:
+                return file.read()
+        return None
+
+    private_pem, public_pem = pem("private_key"), pem("public_key")
+    private = serialization.load_pem_private_key(private_pem, password=None) if private_pem else None
+    public = serialization.load_pem_public_key(public_pem) if public_pem else None
+    if private is None and public is None:
+        raise ValueError(f"Key {kid} needs a private_key or public_key")
+    key_class, key_types = (
+        (EdDSAKey, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)) if alg == "EdDSA"
+        else (ES256Key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey))
+    )
+    if not all(k is None or isinstance(k, key_types) for k in (private, public)):
+        raise ValueError(f"Key {kid} does not match {alg}")
+    return key_class(private, public, kid)
+
+
+class TokenCodec:
+    """
+    Encodes and verifies compact JWS tokens against a key ring.
+
+    Tokens are signed with the active key and carry its ``kid``; any key of
+    the ring verifies tokens naming it, as long as the header's ``alg``
+    matches the key's. A key without ``kid`` verifies tokens without one.
+
+    Attributes:
+        keys (dict[str | None, SigningKey]): Key ring by ``kid``.
+        active (SigningKey): Key new tokens are signed with.
+    """
+
+    def __init__(self, keys: list[SigningKey], active_kid: str | None = None):
+        if not keys:
+            raise ValueError("A token codec needs at least one key")
+        self.keys = {key.kid: key for key in keys}
+        self.active = self.keys[active_kid] if active_kid is not None else keys[0]
+        header = {"alg": self.active.alg, "typ": "JWT"}
+        if self.active.kid is not None:
+            header["kid"] = self.active.kid
+        self._header = b64encode(json.dumps(header, separators=(",", ":")).encode())
+        self._headers: dict[str, SigningKey] = {}
+
+    def encode(self, payload: dict) -> str:
+        """
+        Sign claims with the active key.
+
+        Args:
+            payload (dict): Claims; datetimes become Unix timestamps.
+
+        Returns:
+            str: Compact JWS.
+        """
+        body = b64encode(json.dumps(payload, separators=(",", ":"), default=_json_default).encode())
+        signing_input = f"{self._header}.{body}"
+        return f"{signing_input}.{b64encode(self.active.sign(signing_input.encode()))}"
+
+    def _key_for(self, header_segment: str) -> SigningKey:
+        key = self._headers.get(header_segment)
+        if key is not None:
+            return key
+        try:
+            header = json.loads(b64decode(header_segment))
+        except (binascii.Error, ValueError):
+            raise TokenError("Malformed token header")
+        if not isinstance(header, dict):
+            raise TokenError("Malformed token header")
+        key = self.keys.get(header.get("kid"))
+        if key is None:
+            raise TokenError("Unknown signing key")
+        # Never let the token choose the algorithm of a key ("none", HS with a public key)
+        if header.get("alg") != key.alg:
+            raise TokenError("Algorithm mismatch")
+        if len(self._headers) < HEADER_CACHE_SIZE:
+            self._headers[header_segment] = key
+        return key
+
+    def decode(self, token: str, leeway: float = 0) -> dict:
+        """
+        Verify a token and return its claims.
+
+        Args:
+            token (str): Compact JWS.
+            leeway (float): Seconds an expired token is still accepted.
+
+        Returns:
+            dict: Claims.
+
+        Raises:
+            TokenError: The token is malformed, its signature does not match
+            or it has expired.
+        """
+        signing_input, _, signature_segment = token.rpartition(".")
+        header_segment, _, body_segment = signing_input.partition(".")
+        if not header_segment or not body_segment or "." in body_segment:
+            raise TokenError("Malformed token")
+        key = self._key_for(header_segment)
+        try:
+            signature = b64decode(signature_segment)
+        except (binascii.Error, ValueError):
+            raise TokenError("Malformed token signature")
+        if not key.verify(signing_input.encode(), signature):
+            raise TokenError("Signature verification failed")
+        try:
+            payload = json.loads(b64decode(body_segment))
+        except (binascii.Error, ValueError):
+            raise TokenError("Malformed token payload")
+        if not isinstance(payload, dict):
+            raise TokenError("Malformed token payload")
+        exp = payload.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise TokenError("Malformed expiry")
+            if exp + leeway < time.time():
+                raise TokenError("Token expired")
+        return payload
+
+    def jwks(self) -> dict:
+        """Public keys of the ring as a JWK Set, for stateless verification elsewhere."""
+        return {"keys": [jwk for key in self.keys.values() if (jwk := key.public_jwk())]}
+
+
+def build_codec(
+    secret: str,
+    algorithm: str,
+    keys: list[dict],
+    active_kid: str | None,
+    accept_legacy_secret: bool = True,
+) -> TokenCodec:
+    """
+    Key ring for access and refresh tokens.
+
+    The shared secret is part of the ring as a key without ``kid``, so
+    tokens issued before keys were configured stay valid; it signs only
+    when no keys are configured. Once those tokens have expired it can be
+    retired with ``accept_legacy_secret=False``.
+
+    Args:
+        secret (str): Shared secret.
+        algorithm (str): HMAC algorithm of ``secret``.
+        keys (list[dict]): Configured keys (see ``load_key``), each with a ``kid``.
+        active_kid (str | None): Configured key that signs; the first one when None.
+        accept_legacy_secret (bool): Keep the shared secret in the ring
+            next to configured keys.
+
+    Returns:
+        TokenCodec: The codec.
+    """
+    ring = []
+    for spec in keys:
+        if not spec.get("kid"):
+            raise ValueError("Configured token keys need a kid")
+        ring.append(load_key(spec))
+    if algorithm in HMACKey.DIGESTS and (accept_legacy_secret or not ring):
+        ring.append(HMACKey(secret, algorithm))
+    return TokenCodec(ring, active_kid)
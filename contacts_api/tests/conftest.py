@@ -16,15 +16,25 @@ os.environ["CLOUDINARY_API_KEY"] = "fake_key"
 os.environ["CLOUDINARY_API_SECRET"] = "fake_secret"
 
 
-from fastapi_limiter import FastAPILimiter
+import fakeredis
 import pytest
+from fakeredis.aioredis import FakeAsyncRedisConnection
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from redis.asyncio import ConnectionPool, Redis
 
 from src.main import app
 from src.database.models import Base
-from src.database.db import get_db
+from src.database.db import get_db, get_sessionmaker
+from src.services.auth import auth_service
+from src.services.cache import response_cache, user_cache
+from src.services.login_guard import login_guard
+from src.services.rate_limit import limiter
+from src.services.revocation import token_revocations
+from src.services.sessions import session_registry
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -34,22 +44,19 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The app runs on aiosqlite against the same file; NullPool because every
+# TestClient request may run on a fresh event loop.
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db", poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 @pytest.fixture(autouse=True)
 def disable_rate_limiter(monkeypatch):
-    monkeypatch.setattr(
-        "fastapi_limiter.depends.RateLimiter", lambda *args, **kwargs: AsyncMock()
-    )
-    FastAPILimiter.redis = AsyncMock()
-
-    async def mock_identifier(request):
-        return "test_user"
-
-    async def mock_http_callback(request, response, pexpire):
-        pass  # просто ничего не делает, заглушка
-
-    FastAPILimiter.identifier = mock_identifier
-    FastAPILimiter.http_callback = mock_http_callback  # 👈 обязательно!
+    monkeypatch.setattr(limiter, "redis", None)
 
 
 @pytest.fixture(scope="function")
@@ -65,15 +72,27 @@ def session():
 
 @pytest.fixture(scope="function")
 def client(session):
-    def override_get_db():
-        try:
-            yield session
-        finally:
-            session.close()
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = lambda: TestingAsyncSessionLocal
 
     app.state.redis = AsyncMock()
+    auth_service.token_cache.clear()
+    user_cache.local.clear()
+    response_cache.local.clear()
+    # Login sessions, revoked tokens and failed logins live in Redis; every
+    # test starts with an empty server
+    redis = Redis(connection_pool=ConnectionPool(
+        connection_class=FakeAsyncRedisConnection,
+        server=fakeredis.FakeServer(),
+        decode_responses=True,
+    ))
+    session_registry.init(redis)
+    token_revocations.init(redis)
+    login_guard.init(redis)
 
     return TestClient(app)
 
@@ -1,10 +1,20 @@
+import io
 import pytest
-from unittest.mock import AsyncMock
+from PIL import Image
+from passlib.context import CryptContext
+from unittest.mock import AsyncMock, patch
 from src.routes import auth
 from src.services import deps
 from src.main import app
 from urllib.parse import urlencode
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from src.database.models import User
+from src.services.auth import auth_service
+from src.services.avatars import LocalStorage, avatar_pipeline
+from src.services.sessions import session_registry
 
 
 @pytest.fixture(autouse=True)
@@ -80,3 +90,223 @@ def test_login_user_not_found(client, user):
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Invalid credentials"
+
+
+def test_read_me_with_access_token(client, session, user):
+    app.dependency_overrides.pop(auth_service.get_current_user, None)
+    client.post("/api/auth/signup", json=user)
+    current_user: User = session.query(User).filter(User.email == user["email"]).first()
+    current_user.confirmed = True
+    session.commit()
+
+    tokens = client.post(
+        "/api/auth/login",
+        data={"username": user["email"], "password": user["password"]},
+    ).json()
+
+    for _ in range(2):
+        response = client.get(
+            "/api/users/me",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["email"] == user["email"]
+
+
+def test_update_avatar(client, session, user, tmp_path, monkeypatch):
+    monkeypatch.setattr(avatar_pipeline, "storage", LocalStorage(str(tmp_path), "/media"))
+    app.dependency_overrides.pop(auth_service.get_current_user, None)
+    client.post("/api/auth/signup", json=user)
+    current_user: User = session.query(User).filter(User.email == user["email"]).first()
+    current_user.confirmed = True
+    session.commit()
+    tokens = client.post(
+        "/api/auth/login",
+        data={"username": user["email"], "password": user["password"]},
+    ).json()
+
+    image = io.BytesIO()
+    Image.new("RGB", (400, 300), "blue").save(image, "PNG")
+    for _ in range(2):
+        response = client.patch(
+            "/api/users/avatar",
+            files={"file": ("avatar.png", image.getvalue(), "image/png")},
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["avatar"].startswith("/media/avatars/")
+
+    response = client.patch(
+        "/api/users/avatar",
+        files={"file": ("avatar.png", b"not an image", "image/png")},
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert response.status_code == 400
+
+
+def _login(client, session, user, device="pytest"):
+    if not session.query(User).filter(User.email == user["email"]).first():
+        client.post("/api/auth/signup", json=user)
+        current_user: User = session.query(User).filter(User.email == user["email"]).first()
+        current_user.confirmed = True
+        session.commit()
+    return client.post(
+        "/api/auth/login",
+        data={"username": user["email"], "password": user["password"]},
+        headers={"User-Agent": device},
+    ).json()
+
+
+def _refresh(client, refresh_token):
+    return client.get(
+        "/api/auth/refresh_token",
+        headers={"Authorization": f"Bearer {refresh_token}"},
+    )
+
+
+def test_refresh_rotates_without_sql(client, session, user):
+    tokens = _login(client, session, user)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        response = _refresh(client, tokens["refresh_token"])
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["refresh_token"] != tokens["refresh_token"]
+    assert statements == []
+    assert _refresh(client, response.json()["refresh_token"]).status_code == 200
+
+
+def test_refresh_token_reuse_revokes_session(client, session, user, monkeypatch):
+    tokens = _login(client, session, user)
+    rotated = _refresh(client, tokens["refresh_token"]).json()
+
+    # Within the grace period a stale token is refused, the session survives
+    response = _refresh(client, tokens["refresh_token"])
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token already used"
+
+    monkeypatch.setattr(session_registry, "grace", -1)
+    response = _refresh(client, tokens["refresh_token"])
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token reuse detected"
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_sessions_per_device(client, session, user):
+    app.dependency_overrides.pop(auth_service.get_current_user, None)
+    phone = _login(client, session, user, device="phone")
+    laptop = _login(client, session, user, device="laptop")
+    headers = {"Authorization": f"Bearer {laptop['access_token']}"}
+
+    sessions = client.get("/api/auth/sessions", headers=headers).json()
+    assert sorted(s["device"] for s in sessions) == ["laptop", "phone"]
+    assert [s["device"] for s in sessions if s["current"]] == ["laptop"]
+
+    phone_sid = next(s["sid"] for s in sessions if s["device"] == "phone")
+    assert client.delete(f"/api/auth/sessions/{phone_sid}", headers=headers).status_code == 204
+    assert client.delete(f"/api/auth/sessions/{phone_sid}", headers=headers).status_code == 404
+    assert _refresh(client, phone["refresh_token"]).status_code == 401
+    assert _refresh(client, laptop["refresh_token"]).status_code == 200
+
+
+def test_logout_ends_only_its_session(client, session, user):
+    phone = _login(client, session, user, device="phone")
+    laptop = _login(client, session, user, device="laptop")
+
+    response = client.post(
+        "/api/auth/logout", headers={"Authorization": f"Bearer {phone['access_token']}"}
+    )
+
+    assert response.status_code == 204
+    assert _refresh(client, phone["refresh_token"]).status_code == 401
+    assert _refresh(client, laptop["refresh_token"]).status_code == 200
+
+
+def test_logout_revokes_access_token(client, session, user):
+    app.dependency_overrides.pop(auth_service.get_current_user, None)
+    tokens = _login(client, session, user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 204
+
+    response = client.get("/api/users/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+
+def test_logout_without_redis_is_unavailable(client, session, user):
+    tokens = _login(client, session, user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    with patch.object(Pipeline, "execute", AsyncMock(side_effect=RedisError)):
+        response = client.post("/api/auth/logout", headers=headers)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert _refresh(client, tokens["refresh_token"]).status_code == 200
+
+
+def test_jwks_lists_no_shared_secrets(client):
+    response = client.get("/api/auth/jwks.json")
+
+    assert response.status_code == 200
+    assert response.json() == {"keys": []}
+
+
+def test_login_rehashes_legacy_bcrypt_password(client, session, user):
+    legacy = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(user["password"])
+    session.add(User(email=user["email"], password=legacy, confirmed=True))
+    session.commit()
+
+    def login_and_read_hash():
+        response = client.post(
+            "/api/auth/login",
+            data={"username": user["email"], "password": user["password"]},
+        )
+        assert response.status_code == 200, response.text
+        session.expire_all()
+        return session.query(User).filter(User.email == user["email"]).first().password
+
+    upgraded = login_and_read_hash()
+    assert upgraded.startswith("$argon2id$")
+    # Already under the current policy: the next login leaves it alone
+    assert login_and_read_hash() == upgraded
+
+
+def test_login_lockout_rejects_before_hashing(client, session, user, monkeypatch):
+    _login(client, session, user)
+    verify = AsyncMock(return_value=(False, None))
+    monkeypatch.setattr(auth_service, "verify_and_update_password", verify)
+
+    statuses = [
+        client.post(
+            "/api/auth/login",
+            data={"username": user["email"], "password": "wrongpassword"},
+        ).status_code
+        for _ in range(7)
+    ]
+
+    assert statuses == [401] * 5 + [429] * 2
+    assert verify.await_count == 5
+
+
+def test_login_unknown_email_is_negatively_cached(client, session, user):
+    form = {"username": user["email"], "password": user["password"]}
+    assert client.post("/api/auth/login", data=form).status_code == 401
+
+    with patch.object(auth.repository_users, "get_user_by_email", AsyncMock()) as lookup:
+        response = client.post("/api/auth/login", data=form)
+    assert response.status_code == 401
+    lookup.assert_not_awaited()
+
+    # Signing up clears the negative cache
+    tokens = _login(client, session, user)
+    assert "access_token" in tokens
@@ -1,8 +1,13 @@
+import csv
+import io
 import json
+import fakeredis.aioredis
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from src.database.models import User
+from datetime import date, timedelta
+from src.database.models import Contact, User
 from src.services.auth import auth_service
+from src.services.rate_limit import limiter
 from src.main import app
 
 
@@ -74,13 +79,105 @@ def test_read_all_contacts(client, token, session, user):
 
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list)
+    assert isinstance(data["items"], list)
+    assert data["next_cursor"] is None
 
    
     app.dependency_overrides = {}
 
 
-def test_read_one_contact(client, token, user, contact_data):
+def test_read_all_contacts_paginated(client, token, session, user):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+    for i in range(5):
+        session.add(
+            Contact(
+                first_name=f"Name{i}",
+                last_name=f"Last{4 - i}",
+                email=f"page{i}@example.com",
+                phone="1234567890",
+                birthday=date(1990, 1, 1),
+                user_id=current_user.id,
+            )
+        )
+    session.commit()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "sort": "last_name"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(
+            "/api/contacts/", params=params, headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        seen.extend(item["last_name"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [f"Last{i}" for i in range(5)]
+
+    response = client.get(
+        "/api/contacts/",
+        params={"cursor": "not-a-cursor"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 400
+
+    app.dependency_overrides = {}
+
+
+def test_read_all_contacts_paginated_without_birthdays(client, token, session, user):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+    session.query(Contact).filter(Contact.user_id == current_user.id).delete()
+    for i in range(5):
+        session.add(
+            Contact(
+                first_name=f"Name{i}",
+                last_name=f"Last{i}",
+                email=f"nobirthday{i}@example.com",
+                phone="1234567890",
+                birthday=date(1990, 1, 1) if i == 3 else None,
+                user_id=current_user.id,
+            )
+        )
+    session.commit()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "sort": "birthday"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(
+            "/api/contacts/", params=params, headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        seen.extend(item["email"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    # The contact with a birthday first, then the others by id, none skipped
+    assert seen == [f"nobirthday{i}@example.com" for i in (3, 0, 1, 2, 4)]
+
+    app.dependency_overrides = {}
+
+
+def test_read_one_contact(client, token, session, user, contact_data):
    
     mock_redis = AsyncMock()
     mock_redis.get.return_value = None
@@ -88,11 +185,7 @@ def test_read_one_contact(client, token, user, contact_data):
     auth_service.r = mock_redis
 
    
-    from src.database.db import get_db
-    from src.database.models import User
-
-    db = next(get_db())
-    current_user = db.query(User).filter(User.email == user["email"]).first()
+    current_user = session.query(User).filter(User.email == user["email"]).first()
 
    
     async def mock_get_current_user():
@@ -192,6 +285,63 @@ def test_update_contact(client, token):
         assert data["email"] == "updated@example.com"
 
 
+def test_patch_contact(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    contact_data = {
+        "first_name": "Patchy",
+        "last_name": "Before",
+        "email": "patchy@example.com",
+        "phone": "+1234567890",
+        "birthday": "1990-03-04",
+        "additional_info": "keep me",
+    }
+    created = client.post("/api/contacts/", json=contact_data, headers=headers)
+    assert created.status_code == 201
+    contact_id = created.json()["id"]
+
+    response = client.patch(
+        f"/api/contacts/{contact_id}",
+        json={"last_name": "After", "birthday": "1990-12-31"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["last_name"] == "After"
+    assert data["birthday"] == "1990-12-31"
+    assert data["first_name"] == "Patchy"
+    assert data["additional_info"] == "keep me"
+
+    response = client.patch(
+        f"/api/contacts/{contact_id}", json={"additional_info": None}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["additional_info"] is None
+
+    response = client.patch(f"/api/contacts/{contact_id}", json={}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["last_name"] == "After"
+
+    response = client.patch(
+        f"/api/contacts/{contact_id}", json={"first_name": None}, headers=headers
+    )
+    assert response.status_code == 422
+
+    upcoming = client.get(
+        "/api/contacts/birthdays/upcoming", params={"days": 366}, headers=headers
+    )
+    assert contact_id in [c["id"] for c in upcoming.json()]
+
+
+def test_patch_contact_not_found(client, token):
+    response = client.patch(
+        "/api/contacts/9999",
+        json={"first_name": "Nobody"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Contact not found"
+
+
 def test_update_contact_not_found(client, token):
     with patch.object(auth_service, "r") as r_mock:
         r_mock.get.return_value = None
@@ -278,3 +428,426 @@ def test_upcoming_birthdays(client, token):
         )
         assert response.status_code == 200
         assert isinstance(response.json(), list)
+
+
+def test_search_contacts_prefix_ranked(client, token, session, user):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+    for first, last, email in [
+        ("Johanna", "Smith", "jsmith@example.com"),
+        ("Peter", "Johnson", "peter@example.com"),
+        ("Alice", "Brown", "alice@example.com"),
+    ]:
+        session.add(
+            Contact(
+                first_name=first,
+                last_name=last,
+                email=email,
+                phone="1234567890",
+                birthday=date(1990, 1, 1),
+                user_id=current_user.id,
+            )
+        )
+    session.commit()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+
+    response = client.get(
+        "/api/contacts/search/joh", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    names = {item["first_name"] for item in response.json()}
+    assert names == {"Johanna", "Peter"}
+
+    response = client.get(
+        "/api/contacts/search/joh",
+        params={"limit": 1},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert len(response.json()) == 1
+
+    app.dependency_overrides = {}
+
+
+def test_upcoming_birthdays_window(client, token, session, user):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+    today = date.today()
+    for offset in (0, 3, 30):
+        birthday = today + timedelta(days=offset)
+        session.add(
+            Contact(
+                first_name=f"In{offset}",
+                last_name="Days",
+                email=f"bday{offset}@example.com",
+                phone="1234567890",
+                # Born in a leap year decades ago: only month and day matter
+                birthday=birthday.replace(year=1984),
+                user_id=current_user.id,
+            )
+        )
+    session.commit()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+
+    response = client.get(
+        "/api/contacts/birthdays/upcoming", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    assert [c["first_name"] for c in response.json()] == ["In0", "In3"]
+
+    response = client.get(
+        "/api/contacts/birthdays/upcoming",
+        params={"days": 31},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert [c["first_name"] for c in response.json()] == ["In0", "In3", "In30"]
+
+    app.dependency_overrides = {}
+
+
+def test_bulk_import_csv(client, token, session, user):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+
+    csv_body = (
+        "first_name,last_name,email,phone,birthday,additional_info\n"
+        "Ann,Lee,ann@example.com,123,1990-03-04,\n"
+        "Bob,Ray,not-an-email,123,1990-03-04,\n"
+        "Cid,Moe,cid@example.com,123,1991-12-31,friend\n"
+        "Ann,Again,ann@example.com,123,1990-03-04,\n"
+    )
+    response = client.post(
+        "/api/contacts/bulk",
+        files={"file": ("contacts.csv", csv_body, "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 4]
+
+    stored = session.query(Contact).filter(Contact.user_id == current_user.id).all()
+    assert {c.email for c in stored} == {"ann@example.com", "cid@example.com"}
+    assert {c.birthday_md for c in stored} == {304, 1231}
+    assert len({c.version for c in stored}) == 1
+
+    # One import is one version: a sync page never splits it
+    page = client.get(
+        "/api/contacts/changes",
+        params={"limit": 1},
+        headers={"Authorization": f"Bearer {token}"},
+    ).json()
+    assert len(page["changed"]) == 2
+    assert page["has_more"] is False
+
+    app.dependency_overrides = {}
+
+
+def test_bulk_import_jsonl_skips_existing(client, token, session, user):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+
+    row = {
+        "first_name": "Dee",
+        "last_name": "Fox",
+        "email": "dee@example.com",
+        "phone": "123",
+        "birthday": "1980-05-06",
+    }
+    body = json.dumps(row) + "\n\n[1, 2]\n"
+    for expected_inserted in (1, 0):
+        response = client.post(
+            "/api/contacts/bulk",
+            files={"file": ("contacts.jsonl", body, "application/x-ndjson")},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["inserted"] == expected_inserted
+
+    assert response.json()["errors"] == [
+        {"row": 1, "errors": ["Contact with this email already exists"]},
+        {"row": 3, "errors": ["Expected a JSON object"]},
+    ]
+
+    response = client.post(
+        "/api/contacts/bulk",
+        files={"file": ("contacts.txt", body, "text/plain")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 400
+
+    app.dependency_overrides = {}
+
+
+def test_export_contacts_csv_and_ndjson(client, token, session, user):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+
+    session.add_all(
+        Contact(
+            first_name=f"Exp{i}",
+            last_name="Ort",
+            email=f"exp{i}@example.com",
+            phone="123",
+            birthday=date(1990, 1, i + 1),
+            additional_info="a, \"quoted\" note" if i == 0 else None,
+            user_id=current_user.id,
+        )
+        for i in range(3)
+    )
+    session.commit()
+
+    response = client.get(
+        "/api/contacts/export",
+        params={"format": "csv"},
+        headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "content-encoding" not in response.headers
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == [
+        "id", "first_name", "last_name", "email", "phone", "birthday", "additional_info",
+    ]
+    assert [row[1] for row in rows[1:]] == ["Exp0", "Exp1", "Exp2"]
+    assert rows[1][6] == 'a, "quoted" note'
+
+    response = client.get(
+        "/api/contacts/export",
+        params={"format": "ndjson"},
+        headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-encoding"] == "gzip"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["email"] for line in lines] == [
+        "exp0@example.com", "exp1@example.com", "exp2@example.com",
+    ]
+    assert lines[2]["birthday"] == "1990-01-03"
+
+    response = client.get(
+        "/api/contacts/export",
+        params={"format": "csv"},
+        headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip;q=0, identity"},
+    )
+    assert response.status_code == 200, response.text
+    assert "content-encoding" not in response.headers
+
+    app.dependency_overrides = {}
+
+
+def test_create_contact_rate_limited(client, token, session, user, contact_data):
+    current_user = session.query(User).filter(User.email == user["email"]).first()
+
+    async def mock_get_current_user():
+        return current_user
+
+    app.dependency_overrides[auth_service.get_current_user] = mock_get_current_user
+    limiter.init(fakeredis.aioredis.FakeRedis(decode_responses=True))
+
+    statuses = []
+    for i in range(3):
+        response = client.post(
+            "/api/contacts/",
+            json={**contact_data, "email": f"limited{i}@example.com"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        statuses.append(response.status_code)
+
+    assert statuses == [201, 201, 429]
+    assert response.headers["RateLimit-Limit"] == "2"
+    assert response.headers["RateLimit-Remaining"] == "0"
+    assert 0 < int(response.headers["Retry-After"]) <= 150
+
+    app.dependency_overrides = {}
+
+
+def test_conditional_get(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post(
+        "/api/contacts/",
+        json={
+            "first_name": "Etag",
+            "last_name": "Owner",
+            "email": "etag@example.com",
+            "phone": "+1234567890",
+            "birthday": "1990-05-06",
+        },
+        headers=headers,
+    )
+    contact_id = created.json()["id"]
+    etag = created.headers["etag"]
+
+    response = client.get(f"/api/contacts/{contact_id}", headers=headers)
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "private, no-cache"
+    last_modified = response.headers["last-modified"]
+
+    response = client.get(f"/api/contacts/{contact_id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    response = client.get(
+        f"/api/contacts/{contact_id}", headers=headers | {"If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+
+    page = client.get("/api/contacts/", headers=headers)
+    collection_etag = page.headers["etag"]
+    response = client.get("/api/contacts/", headers=headers | {"If-None-Match": collection_etag})
+    assert response.status_code == 304
+
+    client.patch(f"/api/contacts/{contact_id}", json={"phone": "+1"}, headers=headers)
+
+    response = client.get(f"/api/contacts/{contact_id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    response = client.get("/api/contacts/", headers=headers | {"If-None-Match": collection_etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != collection_etag
+
+
+def test_if_match(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post(
+        "/api/contacts/",
+        json={
+            "first_name": "Match",
+            "last_name": "Owner",
+            "email": "ifmatch@example.com",
+            "phone": "+1234567890",
+            "birthday": "1990-05-06",
+        },
+        headers=headers,
+    )
+    contact_id = created.json()["id"]
+    etag = created.headers["etag"]
+
+    response = client.patch(
+        f"/api/contacts/{contact_id}",
+        json={"last_name": "First"},
+        headers=headers | {"If-Match": etag},
+    )
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+
+    # A second writer still holding the old ETag loses
+    response = client.patch(
+        f"/api/contacts/{contact_id}",
+        json={"last_name": "Second"},
+        headers=headers | {"If-Match": etag},
+    )
+    assert response.status_code == 412
+    response = client.delete(f"/api/contacts/{contact_id}", headers=headers | {"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/api/contacts/{contact_id}", headers=headers).json()["last_name"] == "First"
+
+    response = client.delete("/api/contacts/9999", headers=headers | {"If-Match": etag})
+    assert response.status_code == 404
+    response = client.delete(f"/api/contacts/{contact_id}", headers=headers | {"If-Match": new_etag})
+    assert response.status_code == 200
+
+
+def test_changes(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def create(name):
+        response = client.post(
+            "/api/contacts/",
+            json={
+                "first_name": name,
+                "last_name": "Sync",
+                "email": f"{name.lower()}@sync.example.com",
+                "phone": "+1234567890",
+                "birthday": "1990-05-06",
+            },
+            headers=headers,
+        )
+        return response.json()["id"]
+
+    first, second, third = create("One"), create("Two"), create("Three")
+
+    full = client.get("/api/contacts/changes", params={"limit": 2}, headers=headers).json()
+    assert [c["id"] for c in full["changed"]] == [first, second]
+    assert full["has_more"] is True
+    rest = client.get(
+        "/api/contacts/changes", params={"since": full["next_token"]}, headers=headers
+    ).json()
+    assert [c["id"] for c in rest["changed"]] == [third]
+    assert rest["deleted"] == [] and rest["has_more"] is False
+    sync_token = rest["next_token"]
+
+    unchanged = client.get("/api/contacts/changes", params={"since": sync_token}, headers=headers)
+    assert unchanged.json() == {"changed": [], "deleted": [], "next_token": sync_token, "has_more": False}
+
+    client.patch(f"/api/contacts/{second}", json={"last_name": "Edited"}, headers=headers)
+    client.delete(f"/api/contacts/{first}", headers=headers)
+
+    delta = client.get("/api/contacts/changes", params={"since": sync_token}, headers=headers).json()
+    assert [(c["id"], c["last_name"]) for c in delta["changed"]] == [(second, "Edited")]
+    assert delta["deleted"] == [first]
+    assert delta["next_token"] != sync_token
+
+    response = client.get("/api/contacts/changes", params={"since": "garbage"}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_changes_expired_token(client, token, session):
+    from src.database.models import User
+    from src.repository.contacts import encode_sync_token
+
+    headers = {"Authorization": f"Bearer {token}"}
+    user = session.query(User).first()
+    user.contacts_pruned_version = 5
+    session.commit()
+
+    response = client.get(
+        "/api/contacts/changes", params={"since": encode_sync_token(4)}, headers=headers
+    )
+    assert response.status_code == 410
+    response = client.get(
+        "/api/contacts/changes", params={"since": encode_sync_token(5)}, headers=headers
+    )
+    assert response.status_code == 200
+
+
+def test_cached_reads_follow_writes(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    body = {
+        "first_name": "Cachey",
+        "last_name": "Reader",
+        "email": "cachey@example.com",
+        "phone": "+1234567890",
+        "birthday": "1990-05-06",
+    }
+    assert client.get("/api/contacts/search/cach", headers=headers).json() == []
+    assert client.get("/api/contacts/", headers=headers).json()["items"] == []
+
+    contact_id = client.post("/api/contacts/", json=body, headers=headers).json()["id"]
+
+    found = client.get("/api/contacts/search/cach", headers=headers)
+    assert found.headers["content-type"] == "application/json"
+    assert [c["id"] for c in found.json()] == [contact_id]
+    assert [c["id"] for c in client.get("/api/contacts/", headers=headers).json()["items"]] == [contact_id]
+
+    client.delete(f"/api/contacts/{contact_id}", headers=headers)
+    assert client.get("/api/contacts/search/cach", headers=headers).json() == []
+    assert client.get("/api/contacts/", headers=headers).json()["items"] == []
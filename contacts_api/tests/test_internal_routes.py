@@ -0,0 +1,101 @@
+from collections import deque
+
+import pytest
+
+from src.conf.config import settings
+from src.services.sql_profiler import sql_profiler
+
+
+@pytest.fixture(autouse=True)
+def open_internal_api(monkeypatch):
+    monkeypatch.setattr(settings, "internal_api_open", True)
+
+
+def test_db_pool_stats(client):
+    response = client.get("/internal/db-pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert "checkedout" in data
+    assert "+Inf" in data["checkout_wait"]["buckets"]
+
+
+def test_db_pool_requires_key_when_configured(client, monkeypatch):
+    monkeypatch.setattr(settings, "internal_api_key", "s3cret")
+
+    assert client.get("/internal/db-pool").status_code == 403
+    response = client.get("/internal/db-pool", headers={"X-Internal-Key": "s3cret"})
+    assert response.status_code == 200
+
+
+def test_internal_endpoints_hidden_without_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "internal_api_open", False)
+
+    assert client.get("/internal/db-pool").status_code == 404
+    assert client.get("/internal/sql-profiles").status_code == 404
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics(client, session):
+    response = client.get("/api/contacts/1")
+    assert response.status_code == 403
+    assert "server-timing" not in response.headers
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert (
+        'http_requests_total{method="GET",route="/api/contacts/{contact_id}",status="403"}'
+        in body
+    )
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/contacts/{contact_id}",le="+Inf"}' in body
+    assert 'cache_requests_total{cache="token",result="miss"}' in body
+    assert "# TYPE db_pool_checkout_wait_seconds histogram" in body
+    assert "password_hash_pending" in body
+
+
+def test_server_timing_only_with_internal_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "internal_api_key", "s3cret")
+
+    assert "server-timing" not in client.get("/api/contacts/1").headers
+    assert "server-timing" not in client.get("/api/contacts/1", headers={"X-Internal-Key": "wrong"}).headers
+    response = client.get("/api/contacts/1", headers={"X-Internal-Key": "s3cret"})
+    assert response.headers["server-timing"].startswith('db;desc="')
+
+
+def test_metrics_count_sql_per_request(client, session):
+    def login_buckets():
+        body = client.get("/metrics").text
+        prefix = 'db_queries_per_request_bucket{route="/api/auth/login",le='
+        return body, [line for line in body.splitlines() if line.startswith(prefix)]
+
+    client.post("/api/auth/login", data={"username": "nobody@example.com", "password": "x" * 8})
+    _, before = login_buckets()
+    # Not negatively cached yet for this address: the lookup runs a query
+    client.post("/api/auth/login", data={"username": "nobody2@example.com", "password": "x" * 8})
+
+    body, after = login_buckets()
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in body
+    # The new attempt ran at least one query, so the 0 bucket did not move
+    assert after[0] == before[0]
+    assert after[-1] != before[-1]
+
+
+def test_sql_profiler(client, session, monkeypatch):
+    monkeypatch.setattr(sql_profiler, "enabled", True)
+    monkeypatch.setattr(sql_profiler, "profiles", deque(maxlen=10))
+
+    response = client.post("/api/auth/login", data={"username": "nobody@example.com", "password": "x" * 8})
+    header = response.headers["x-sql-profile"]
+    assert "queries=1;" in header and "repeated=0" in header
+
+    data = client.get("/internal/sql-profiles").json()
+    assert data["enabled"] is True
+    profile = data["profiles"][0]
+    assert profile["path"] == "/api/auth/login"
+    assert profile["status"] == response.status_code
+    assert "FROM users" in profile["statements"][0]["sql"]
+
+
+def test_sql_profiler_disabled_by_default(client):
+    assert "x-sql-profile" not in client.get("/internal/db-pool").headers
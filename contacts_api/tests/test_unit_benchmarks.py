@@ -0,0 +1,31 @@
+import unittest
+
+from benchmarks.suite import Result, compare, percentile
+
+
+def result(scenario="search", errors=0, p95_ms=10.0, rps=100.0) -> Result:
+    return Result(scenario, 100, errors, 5.0, p95_ms, 20.0, rps)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_compare_within_tolerance(self):
+        baseline = {"results": {"search": {"p95_ms": 10.0, "rps": 100.0}}}
+        self.assertEqual(compare([result(p95_ms=12.0, rps=80.0)], baseline, 0.25), [])
+
+    def test_compare_reports_regressions(self):
+        baseline = {"results": {"search": {"p95_ms": 10.0, "rps": 100.0}}}
+        messages = compare([result(p95_ms=13.0, rps=70.0, errors=2)], baseline, 0.25)
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(messages[0].startswith("search: p95_ms 13.0 > 10.0"))
+
+    def test_compare_ignores_unknown_scenarios(self):
+        self.assertEqual(compare([result("new")], {"results": {}}, 0.25), [])
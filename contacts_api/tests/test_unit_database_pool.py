@@ -0,0 +1,50 @@
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database import pool as pool_module
+from src.database.pool import InstrumentedQueuePool, WaitHistogram, pool_stats
+
+
+class TestWaitHistogram(unittest.TestCase):
+
+    def test_cumulative_buckets(self):
+        histogram = WaitHistogram(buckets=(0.01, 0.1))
+        for seconds in (0.001, 0.05, 0.05, 3):
+            histogram.observe(seconds)
+        histogram.timeout()
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["buckets"], {"0.01": 1, "0.1": 3, "+Inf": 4})
+        self.assertEqual(snapshot["count"], 4)
+        self.assertAlmostEqual(snapshot["sum"], 3.101)
+        self.assertEqual(snapshot["timeouts"], 1)
+
+
+class TestInstrumentedQueuePool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_checkouts_are_recorded(self):
+        original = pool_module.checkout_wait
+        pool_module.checkout_wait = WaitHistogram()
+        self.addCleanup(setattr, pool_module, "checkout_wait", original)
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///./test.db",
+            poolclass=InstrumentedQueuePool,
+            pool_size=2,
+            max_overflow=1,
+        )
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                stats = pool_stats(engine)
+                self.assertEqual(stats["checkedout"], 1)
+                self.assertEqual(stats["size"], 2)
+                self.assertEqual(stats["max_overflow"], 1)
+            self.assertEqual(pool_stats(engine)["checkout_wait"]["count"], 1)
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
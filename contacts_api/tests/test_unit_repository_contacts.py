@@ -1,9 +1,11 @@
 import unittest
-from unittest.mock import MagicMock
-from sqlalchemy.orm import Session
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import Contact, User
-from src.schemas.contacts import ContactCreate, ContactUpdate
+from src.database.search import build_search_statement
+from src.schemas.contacts import ContactCreate, ContactPatch, ContactUpdate
 from src.repository.contacts import (
     create_contact,
     get_contacts,
@@ -12,6 +14,12 @@ from src.repository.contacts import (
     delete_contact,
     search_contacts,
     upcoming_birthdays,
+    birthday_window,
+    encode_cursor,
+    decode_cursor,
+    encode_sync_token,
+    decode_sync_token,
+    TOMBSTONE_PRUNE_EVERY,
 )
 
 from datetime import date, timedelta
@@ -20,7 +28,9 @@ from datetime import date, timedelta
 class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = AsyncMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         self.user = User(id=1)
 
     async def test_create_contact(self):
@@ -32,30 +42,45 @@ class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
             birthday=date(1990, 1, 1),
             additional_info="Test info",
         )
-        result = create_contact(self.session, contact_data, self.user)
+        result = await create_contact(self.session, contact_data, self.user)
         self.assertEqual(result.user_id, self.user.id)
         self.assertEqual(result.first_name, contact_data.first_name)
 
     async def test_get_contacts(self):
         contacts = [Contact(), Contact()]
-        self.session.query().filter().all.return_value = contacts
-        result = get_contacts(self.session, self.user)
+        self.result.scalars().all.return_value = contacts
+        result, next_cursor = await get_contacts(self.session, self.user)
         self.assertEqual(result, contacts)
+        self.assertIsNone(next_cursor)
+
+    async def test_get_contacts_next_cursor(self):
+        contacts = [Contact(id=i, last_name=f"Doe{i}") for i in range(1, 4)]
+        self.result.scalars().all.return_value = contacts
+        result, next_cursor = await get_contacts(
+            self.session, self.user, limit=2, sort="last_name"
+        )
+        self.assertEqual(result, contacts[:2])
+        self.assertEqual(decode_cursor(next_cursor, "last_name"), ("Doe2", 2))
+
+    async def test_get_contacts_cursor_sort_mismatch(self):
+        cursor = encode_cursor("id", Contact(id=5))
+        with self.assertRaises(ValueError):
+            await get_contacts(self.session, self.user, cursor=cursor, sort="birthday")
 
     async def test_get_contact_by_id_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
-        result = get_contact_by_id(self.session, 1, self.user)
+        self.result.scalar_one_or_none.return_value = contact
+        result = await get_contact_by_id(self.session, 1, self.user)
         self.assertEqual(result, contact)
 
     async def test_get_contact_by_id_not_found(self):
-        self.session.query().filter().first.return_value = None
-        result = get_contact_by_id(self.session, 1, self.user)
+        self.result.scalar_one_or_none.return_value = None
+        result = await get_contact_by_id(self.session, 1, self.user)
         self.assertIsNone(result)
 
     async def test_update_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalar_one_or_none.return_value = contact
         contact_data = ContactUpdate(
             first_name="Updated",
             last_name="Name",
@@ -64,11 +89,11 @@ class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
             birthday=date(1991, 2, 2),
             additional_info="Updated info",
         )
-        result = update_contact(self.session, 1, contact_data, self.user)
+        result = await update_contact(self.session, 1, contact_data, self.user)
         self.assertEqual(result, contact)
 
     async def test_update_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalar_one_or_none.return_value = None
         contact_data = ContactUpdate(
             first_name="Updated",
             last_name="Name",
@@ -77,32 +102,146 @@ class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
             birthday=date(1991, 2, 2),
             additional_info="Updated info",
         )
-        result = update_contact(self.session, 1, contact_data, self.user)
+        result = await update_contact(self.session, 1, contact_data, self.user)
         self.assertIsNone(result)
 
     async def test_delete_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
-        result = delete_contact(self.session, 1, self.user)
+        self.result.scalar_one_or_none.return_value = contact
+        result = await delete_contact(self.session, 1, self.user)
         self.assertEqual(result, contact)
 
     async def test_delete_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
-        result = delete_contact(self.session, 1, self.user)
+        self.result.scalar_one_or_none.return_value = None
+        result = await delete_contact(self.session, 1, self.user)
+        self.assertIsNone(result)
+
+    async def test_update_contact_bumps_version_and_returns(self):
+        self.result.scalar_one.return_value = 8
+        self.result.scalar_one_or_none.return_value = Contact()
+        await update_contact(
+            self.session, 1, ContactPatch(birthday=date(1991, 2, 28)), self.user
+        )
+
+        bump, write = [call.args[0] for call in self.session.execute.await_args_list]
+        self.assertTrue(str(bump.compile()).startswith("UPDATE users SET contacts_version="))
+        sql = str(write.compile(dialect=postgresql.dialect()))
+        self.assertTrue(sql.startswith("UPDATE contacts SET birthday="))
+        self.assertIn("birthday_md=", sql)
+        self.assertNotIn("first_name=", sql)
+        self.assertIn("RETURNING", sql)
+        params = write.compile().params
+        self.assertEqual(params["birthday_md"], 228)
+        self.assertEqual(params["version"], 8)
+        self.session.commit.assert_awaited_once()
+
+    async def test_update_contact_if_match_rolls_back(self):
+        self.result.scalar_one_or_none.return_value = None
+        result = await update_contact(
+            self.session, 1, ContactPatch(first_name="New"), self.user, versions=[3]
+        )
+
         self.assertIsNone(result)
+        sql = str(self.session.execute.await_args.args[0].compile())
+        self.assertIn("contacts.version IN", sql)
+        self.session.rollback.assert_awaited_once()
+        self.session.commit.assert_not_awaited()
+
+    async def test_update_contact_empty_patch(self):
+        contact = Contact()
+        self.result.scalar_one_or_none.return_value = contact
+        result = await update_contact(self.session, 1, ContactPatch(), self.user)
+        self.assertEqual(result, contact)
+        self.session.commit.assert_not_awaited()
+
+    async def test_delete_contact_returning(self):
+        self.result.scalar_one_or_none.return_value = Contact()
+        await delete_contact(self.session, 1, self.user)
+
+        sql = str(self.session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertTrue(sql.startswith("DELETE FROM contacts WHERE"))
+        self.assertIn("RETURNING", sql)
+        self.session.commit.assert_awaited_once()
+
+    async def test_delete_contact_leaves_tombstone(self):
+        self.result.scalar_one.return_value = 7
+        self.result.scalar_one_or_none.return_value = Contact(id=3)
+        await delete_contact(self.session, 3, self.user)
+
+        tombstone = self.session.add.call_args.args[0]
+        self.assertEqual((tombstone.contact_id, tombstone.user_id, tombstone.version), (3, 1, 7))
+        self.assertEqual(self.session.execute.await_count, 2)
+
+    async def test_writes_prune_tombstones_periodically(self):
+        self.result.scalar_one.return_value = TOMBSTONE_PRUNE_EVERY * 3
+        self.result.scalar_one_or_none.return_value = Contact(id=3)
+        self.result.scalars().all.return_value = [40, 41]
+        writes = [
+            lambda: delete_contact(self.session, 3, self.user),
+            lambda: update_contact(self.session, 3, ContactPatch(first_name="New"), self.user),
+            lambda: create_contact(
+                self.session,
+                ContactCreate(first_name="A", last_name="B", email="a@example.com",
+                              phone="123456789", birthday=date(1990, 1, 1)),
+                self.user,
+            ),
+        ]
+        for write in writes:
+            self.session.execute.reset_mock()
+            await write()
+
+            statements = [call.args[0] for call in self.session.execute.await_args_list]
+            self.assertTrue(str(statements[1]).startswith("DELETE FROM contact_tombstones"))
+            self.assertEqual(statements[2].compile().params["contacts_pruned_version"], 41)
+
+    def test_sync_token_round_trip(self):
+        self.assertEqual(decode_sync_token(encode_sync_token(42)), 42)
+        with self.assertRaises(ValueError):
+            decode_sync_token(encode_cursor("id", Contact(id=5)))
 
     async def test_search_contacts(self):
         contacts = [Contact()]
-        self.session.query().filter().filter().all.return_value = contacts
-        result = search_contacts("john", self.session, self.user)
+        self.result.scalars().all.return_value = contacts
+        result = await search_contacts("john", self.session, self.user)
         self.assertEqual(result, contacts)
 
+    async def test_search_contacts_without_words(self):
+        result = await search_contacts("%%", self.session, self.user)
+        self.assertEqual(result, [])
+        self.session.execute.assert_not_called()
+
+    async def test_search_statement_postgresql(self):
+        stmt = build_search_statement("postgresql", "Jo Do", self.user.id, 20)
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.assertIn("to_tsvector('simple', coalesce(contacts.first_name", sql)
+        self.assertIn("lower(coalesce(contacts.first_name", sql)
+        self.assertEqual(
+            stmt.compile(dialect=postgresql.dialect()).params["to_tsquery_1"],
+            "jo:* & do:*",
+        )
+
     async def test_upcoming_birthdays(self):
         contacts = [Contact()]
-        self.session.query().filter().filter().all.return_value = contacts
-        result = upcoming_birthdays(self.session, self.user)
+        self.result.scalars().all.return_value = contacts
+        result = await upcoming_birthdays(self.session, self.user)
         self.assertEqual(result, contacts)
 
+    async def test_birthday_window_same_year(self):
+        self.assertEqual(birthday_window(date(2025, 6, 10), 7), (610, 617, False))
+
+    async def test_birthday_window_wraps_new_year(self):
+        self.assertEqual(birthday_window(date(2025, 12, 28), 7), (1228, 104, True))
+
+    async def test_birthday_window_feb_29_in_non_leap_year(self):
+        self.assertEqual(birthday_window(date(2025, 2, 21), 7), (221, 229, False))
+        self.assertEqual(birthday_window(date(2024, 2, 21), 7), (221, 228, False))
+
+    async def test_contact_birthday_md_follows_birthday(self):
+        contact = Contact(birthday=date(1992, 2, 29))
+        self.assertEqual(contact.birthday_md, 229)
+        contact.birthday = date(1992, 12, 1)
+        self.assertEqual(contact.birthday_md, 1201)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,113 @@
+import io
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from src.services.avatars import AvatarPipeline, CloudinaryStorage, LocalStorage, resize_avatar
+
+
+def image_bytes(size=(640, 480), mode="RGB", fmt="PNG", color="red") -> bytes:
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, fmt)
+    return out.getvalue()
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), size=len(data), filename="avatar.png")
+
+
+class TestResizeAvatar(unittest.TestCase):
+
+    def test_square_jpeg(self):
+        data = resize_avatar(io.BytesIO(image_bytes((640, 480))), 250)
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (250, 250))
+
+    def test_transparent_image_gets_white_background(self):
+        data = resize_avatar(io.BytesIO(image_bytes(mode="RGBA", color=(0, 0, 0, 0))), 50)
+        with Image.open(io.BytesIO(data)) as image:
+            red, green, blue = image.getpixel((25, 25))
+            self.assertGreater(min(red, green, blue), 240)
+
+    def test_not_an_image(self):
+        with self.assertRaises(ValueError):
+            resize_avatar(io.BytesIO(b"plain text"), 250)
+
+
+class TestAvatarPipeline(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.tmp.name, "/media")
+        self.pipeline = AvatarPipeline(self.storage, max_bytes=100_000, size=250)
+
+    def tearDown(self):
+        self.pipeline.shutdown()
+        self.tmp.cleanup()
+
+    async def test_store_writes_resized_avatar(self):
+        url = await self.pipeline.store(upload(image_bytes()))
+
+        self.assertTrue(url.startswith("/media/avatars/"))
+        key = url.removeprefix("/media/")
+        self.assertTrue(await self.storage.exists(key))
+        with Image.open(f"{self.tmp.name}/{key}") as image:
+            self.assertEqual(image.size, (250, 250))
+
+    async def test_same_content_is_processed_once(self):
+        data = image_bytes()
+        with patch("src.services.avatars.resize_avatar", wraps=resize_avatar) as resize:
+            first = await self.pipeline.store(upload(data))
+            # A fresh pipeline still finds the stored file
+            other = AvatarPipeline(self.storage, max_bytes=100_000, size=250)
+            second = await other.store(upload(data))
+            third = await self.pipeline.store(upload(data))
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+        self.assertEqual(resize.call_count, 1)
+
+    async def test_known_content_skips_storage_lookup(self):
+        data = image_bytes()
+        await self.pipeline.store(upload(data))
+        with patch.object(self.storage, "exists", AsyncMock()) as exists:
+            await self.pipeline.store(upload(data))
+        exists.assert_not_awaited()
+
+    async def test_too_large(self):
+        data = image_bytes((2000, 2000), fmt="BMP")
+        with self.assertRaises(HTTPException) as ctx:
+            await self.pipeline.store(upload(data))
+        self.assertEqual(ctx.exception.status_code, 413)
+
+        # Size unknown up front: the cap applies while reading
+        unsized = UploadFile(file=io.BytesIO(data), filename="avatar.bmp")
+        with self.assertRaises(HTTPException) as ctx:
+            await self.pipeline.store(unsized)
+        self.assertEqual(ctx.exception.status_code, 413)
+
+    async def test_invalid_image(self):
+        with self.assertRaises(HTTPException) as ctx:
+            await self.pipeline.store(upload(b"not an image"))
+        self.assertEqual(ctx.exception.status_code, 400)
+
+
+class TestCloudinaryStorage(unittest.IsolatedAsyncioTestCase):
+
+    async def test_upload_without_admin_api_lookup(self):
+        storage = CloudinaryStorage("cloud", "key", "secret")
+        pipeline = AvatarPipeline(storage, max_bytes=100_000, size=250)
+        self.addCleanup(pipeline.shutdown)
+
+        with patch("cloudinary.api.resource") as resource, \
+                patch("cloudinary.uploader.upload", return_value={"existing": True}) as upload_call:
+            url = await pipeline.store(upload(image_bytes()))
+            await pipeline.store(upload(image_bytes()))
+
+        resource.assert_not_called()
+        upload_call.assert_called_once()
+        self.assertFalse(upload_call.call_args.kwargs["overwrite"])
+        self.assertIn("ContactApp/avatars/", url)
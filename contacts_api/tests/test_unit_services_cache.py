@@ -0,0 +1,288 @@
+import asyncio
+import json
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import fakeredis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.revocation import token_revocations
+from src.services.cache import (
+    LRUCache,
+    ResponseCache,
+    USER_INVALIDATION_CHANNEL,
+    UserCache,
+    user_cache,
+    user_from_cache,
+    user_to_cache,
+)
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_entry_expires(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1, expires_at=time.time() - 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_default_ttl(self):
+        cache = LRUCache(maxsize=2, default_ttl=60)
+        cache.set("a", 1)
+        with patch("src.services.cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("a"))
+
+    def test_pop_and_counters(self):
+        cache = LRUCache()
+        cache.set("a", 1)
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.redis.get = AsyncMock(return_value=None)
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock()
+        self.redis.pipeline.return_value = self.pipe
+        self.cache = UserCache(maxsize=10, local_ttl=60)
+        self.cache.init(self.redis)
+        self.user = User(
+            id=1,
+            email="a@example.com",
+            confirmed=True,
+            avatar=None,
+            created_at=datetime(2025, 7, 1, 12, 0),
+        )
+
+    async def test_store_writes_through_and_publishes(self):
+        data = await self.cache.store(self.user)
+
+        self.assertEqual(await self.cache.get("a@example.com"), data)
+        self.redis.get.assert_not_awaited()
+        self.pipe.set.assert_called_once()
+        channel, message = self.pipe.publish.call_args.args
+        self.assertEqual(channel, USER_INVALIDATION_CHANNEL)
+        self.assertEqual(json.loads(message)["email"], "a@example.com")
+
+    async def test_get_falls_back_to_redis_and_fills_local(self):
+        self.redis.get.return_value = json.dumps(user_to_cache(self.user))
+
+        first = await self.cache.get("a@example.com")
+        second = await self.cache.get("a@example.com")
+
+        self.assertEqual(first["id"], 1)
+        self.assertEqual(second, first)
+        self.redis.get.assert_awaited_once()
+
+    async def test_message_from_other_worker_drops_local_entry(self):
+        await self.cache.store(self.user)
+        other = UserCache()
+        self.cache.handle_message(other._message("a@example.com"))
+        self.assertIsNone(self.cache.local.get("a@example.com"))
+
+    async def test_own_message_is_ignored(self):
+        await self.cache.store(self.user)
+        self.cache.handle_message(self.cache._message("a@example.com"))
+        self.assertIsNotNone(self.cache.local.get("a@example.com"))
+
+    async def test_malformed_messages_are_skipped(self):
+        await self.cache.store(self.user)
+        for raw in ("not json", '{"origin": "x"}', "[1]", "null"):
+            self.cache.handle_message(raw)
+        self.assertIsNotNone(self.cache.local.get("a@example.com"))
+
+    async def test_invalidate(self):
+        await self.cache.store(self.user)
+        await self.cache.invalidate("a@example.com")
+        self.assertIsNone(self.cache.local.get("a@example.com"))
+        self.pipe.delete.assert_called_once_with("user:a@example.com")
+
+    def test_user_round_trip(self):
+        user = user_from_cache(user_to_cache(self.user))
+        self.assertEqual(user.id, 1)
+        self.assertEqual(user.created_at, self.user.created_at)
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        pool = ConnectionPool(
+            connection_class=FakeAsyncRedisConnection,
+            server=fakeredis.FakeServer(),
+            decode_responses=True,
+        )
+        self.redis = Redis(connection_pool=pool)
+        self.cache = ResponseCache()
+        self.cache.init(self.redis)
+        self.changed = datetime(2026, 10, 18, 9, 0)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_version_loaded_once_then_from_redis(self):
+        load = AsyncMock(return_value=(4, self.changed))
+        self.assertEqual(await self.cache.version(1, load), (4, self.changed))
+        self.assertEqual(await self.cache.version(1, load), (4, self.changed))
+        load.assert_awaited_once()
+
+    async def test_version_never_moves_back(self):
+        later = datetime(2026, 10, 18, 9, 5)
+        await self.cache.set_version(1, 6, later)
+        await self.cache.set_version(1, 5, self.changed)
+        self.assertEqual(await self.cache.version(1, AsyncMock()), (6, later))
+
+    async def test_version_expires_with_responses(self):
+        await self.cache.set_version(1, 6, self.changed)
+        ttl = await self.redis.ttl("contacts:version:1")
+        self.assertTrue(0 < ttl <= self.cache.ttl)
+
+    async def test_failed_publish_drops_stale_version(self):
+        await self.cache.set_version(1, 6, self.changed)
+        with patch.object(self.cache, "_set_version", AsyncMock(side_effect=RedisError)):
+            await self.cache.set_version(1, 7, self.changed)
+
+        load = AsyncMock(return_value=(7, self.changed))
+        self.assertEqual(await self.cache.version(1, load), (7, self.changed))
+        load.assert_awaited_once()
+
+    async def test_key_depends_on_version_and_params(self):
+        key = self.cache.key(1, 3, "contacts:list", {"limit": 50, "sort": "id"})
+        self.assertEqual(key, self.cache.key(1, 3, "contacts:list", {"sort": "id", "limit": 50}))
+        self.assertNotEqual(key, self.cache.key(1, 4, "contacts:list", {"limit": 50, "sort": "id"}))
+        self.assertNotEqual(key, self.cache.key(1, 3, "contacts:list", {"limit": 10, "sort": "id"}))
+
+    async def test_render_once_for_concurrent_misses(self):
+        calls = 0
+
+        async def render():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return b'{"items":[]}'
+
+        bodies = await asyncio.gather(*(self.cache.get_or_render("k", render) for _ in range(10)))
+        self.assertEqual(bodies, [b'{"items":[]}'] * 10)
+        self.assertEqual(calls, 1)
+        self.assertEqual(await self.redis.get("k"), '{"items":[]}')
+
+    async def test_redis_tier_fills_local(self):
+        await self.redis.set("k", '{"a":1}')
+        render = AsyncMock()
+        self.assertEqual(await self.cache.get_or_render("k", render), b'{"a":1}')
+        render.assert_not_awaited()
+        self.assertEqual(self.cache.local.get("k"), b'{"a":1}')
+
+    async def test_render_error_is_shared_and_not_cached(self):
+        async def render():
+            await asyncio.sleep(0.01)
+            raise HTTPException(status_code=400)
+
+        results = await asyncio.gather(
+            *(self.cache.get_or_render("k", render) for _ in range(3)), return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(result, HTTPException) for result in results))
+        self.assertIsNone(self.cache.local.get("k"))
+        self.assertEqual(self.cache._inflight, {})
+
+
+class TestTokenCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        auth_service.token_cache.clear()
+        user_cache.local.clear()
+        self.user = User(
+            id=1, email="a@example.com", confirmed=True, created_at=datetime(2025, 7, 1)
+        )
+        self.get_user = AsyncMock(return_value=self.user)
+        patcher = patch("src.services.auth.repository_users.get_user_by_email", self.get_user)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        auth_service.token_cache.clear()
+        user_cache.local.clear()
+
+    async def test_second_call_skips_decode_and_db(self):
+        token = await auth_service.create_access_token({"sub": "a@example.com"})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        codec = auth_service.tokens
+        with patch.object(codec, "decode", wraps=codec.decode) as decode:
+            first = await auth_service.get_current_user(credentials, MagicMock())
+            second = await auth_service.get_current_user(credentials, MagicMock())
+
+        self.assertEqual((first.id, first.email), (1, "a@example.com"))
+        self.assertEqual(second.id, first.id)
+        decode.assert_called_once()
+        self.get_user.assert_awaited_once()
+
+    async def test_claims_come_from_the_same_cache_entry(self):
+        token = await auth_service.create_access_token({"sub": "a@example.com", "sid": "s1"})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        codec = auth_service.tokens
+        with patch.object(codec, "decode", wraps=codec.decode) as decode:
+            claims = await auth_service.get_token_claims(credentials)
+            await auth_service.get_current_user(credentials, MagicMock())
+
+        self.assertEqual((claims.email, claims.sid), ("a@example.com", "s1"))
+        self.assertIsNotNone(claims.jti)
+        decode.assert_called_once()
+
+    async def test_forget_token(self):
+        token = await auth_service.create_access_token({"sub": "a@example.com"})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        await auth_service.get_current_user(credentials, MagicMock())
+        auth_service.forget_token(token)
+        self.assertEqual(len(auth_service.token_cache), 0)
+
+    async def test_revoked_token_is_refused_even_when_cached(self):
+        token = await auth_service.create_access_token({"sub": "a@example.com"})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        await auth_service.get_current_user(credentials, MagicMock())
+
+        claims = auth_service.tokens.decode(token)
+        self.addCleanup(token_revocations.init, token_revocations.redis)
+        with patch.object(token_revocations, "redis", None):
+            await token_revocations.revoke(claims["jti"], claims["exp"])
+            with self.assertRaises(HTTPException) as ctx:
+                await auth_service.get_current_user(credentials, MagicMock())
+
+        self.assertEqual(ctx.exception.detail, "Token revoked")
+        self.assertEqual(len(auth_service.token_cache), 0)
+
+    async def test_refresh_token_is_not_cached(self):
+        token = await auth_service.create_refresh_token({"sub": "a@example.com"})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        with self.assertRaises(HTTPException):
+            await auth_service.get_current_user(credentials, MagicMock())
+        self.assertEqual(len(auth_service.token_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
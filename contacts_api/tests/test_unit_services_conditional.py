@@ -0,0 +1,45 @@
+import unittest
+from datetime import datetime
+
+from starlette.requests import Request
+
+from src.services.conditional import if_match_versions, not_modified, validators
+
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+class TestConditional(unittest.TestCase):
+
+    updated_at = datetime(2026, 10, 18, 12, 30, 15, 250000)
+
+    def test_validators(self):
+        headers = validators(7, self.updated_at)
+        self.assertEqual(headers["ETag"], '"7"')
+        self.assertEqual(headers["Last-Modified"], "Sun, 18 Oct 2026 12:30:15 GMT")
+
+    def test_if_none_match(self):
+        self.assertTrue(not_modified(make_request(if_none_match='"3", "7"'), 7, self.updated_at))
+        self.assertTrue(not_modified(make_request(if_none_match='W/"7"'), 7, self.updated_at))
+        self.assertTrue(not_modified(make_request(if_none_match="*"), 7, self.updated_at))
+        self.assertFalse(not_modified(make_request(if_none_match='"6"'), 7, self.updated_at))
+        self.assertFalse(not_modified(make_request(), 7, self.updated_at))
+
+    def test_if_none_match_takes_precedence(self):
+        request = make_request(if_none_match='"6"', if_modified_since="Sun, 18 Oct 2026 12:30:15 GMT")
+        self.assertFalse(not_modified(request, 7, self.updated_at))
+
+    def test_if_modified_since(self):
+        def check(value):
+            return not_modified(make_request(if_modified_since=value), 7, self.updated_at)
+
+        self.assertTrue(check("Sun, 18 Oct 2026 12:30:15 GMT"))
+        self.assertFalse(check("Sun, 18 Oct 2026 12:30:14 GMT"))
+        self.assertFalse(check("yesterday"))
+
+    def test_if_match_versions(self):
+        self.assertIsNone(if_match_versions(None))
+        self.assertIsNone(if_match_versions("*"))
+        self.assertEqual(if_match_versions('"4", W/"5", "x"'), [4])
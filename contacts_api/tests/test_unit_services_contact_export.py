@@ -0,0 +1,18 @@
+import unittest
+
+from src.services.contact_export import accepts_gzip
+
+
+class TestAcceptsGzip(unittest.TestCase):
+
+    def test_gzip_allowed(self):
+        for header in ("gzip", "deflate, gzip", "GZIP;q=0.5", "x-gzip", "*", "br, *;q=0.1"):
+            self.assertTrue(accepts_gzip(header), header)
+
+    def test_gzip_refused(self):
+        for header in ("", "identity", "gzip;q=0", "gzip; q=0.0, *", "*;q=0", "gzip;q=bad"):
+            self.assertFalse(accepts_gzip(header), header)
+
+
+if __name__ == "__main__":
+    unittest.main()
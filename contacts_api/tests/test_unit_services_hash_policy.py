@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import patch
+
+from passlib.context import CryptContext
+
+from src.services.hash_policy import (
+    ARGON2_MIN_MEMORY_KIB,
+    ARGON2_MAX_TIME_COST,
+    BCRYPT_MIN_ROUNDS,
+    HashPolicy,
+    floor_policy,
+    pinned_policy,
+    tune,
+)
+
+# Small costs keep the tests fast; production floors are enforced by floor_policy
+ARGON2 = HashPolicy("argon2", (("time_cost", 2), ("memory_cost", 1024), ("parallelism", 1)))
+BCRYPT = HashPolicy("bcrypt", (("rounds", 4),))
+
+
+class TestHashPolicy(unittest.TestCase):
+
+    def test_argon2id_hash(self):
+        hashed = ARGON2.context().hash("secret123")
+
+        self.assertTrue(hashed.startswith("$argon2id$v=19$m=1024,t=2,p=1$"))
+        self.assertTrue(ARGON2.context().verify("secret123", hashed))
+        self.assertFalse(ARGON2.context().needs_update(hashed))
+
+    def test_other_scheme_needs_update_but_verifies(self):
+        bcrypt_hash = BCRYPT.context().hash("secret123")
+
+        self.assertTrue(ARGON2.context().needs_update(bcrypt_hash))
+        valid, new_hash = ARGON2.context().verify_and_update("secret123", bcrypt_hash)
+        self.assertTrue(valid)
+        self.assertTrue(new_hash.startswith("$argon2id$"))
+        self.assertEqual(ARGON2.context().verify_and_update("wrong", bcrypt_hash), (False, None))
+
+    def test_lower_costs_need_update(self):
+        stronger_bcrypt = HashPolicy("bcrypt", (("rounds", 5),))
+
+        self.assertTrue(stronger_bcrypt.context().needs_update(BCRYPT.context().hash("x")))
+        stronger = HashPolicy("argon2", (("time_cost", 3), ("memory_cost", 1024), ("parallelism", 1)))
+        self.assertTrue(stronger.context().needs_update(ARGON2.context().hash("x")))
+
+    def test_higher_costs_are_kept(self):
+        # A restart tuned to a lower cost must not rewrite (and weaken) hashes
+        stronger = HashPolicy("argon2", (("time_cost", 3), ("memory_cost", 1024), ("parallelism", 1)))
+
+        self.assertFalse(ARGON2.context().needs_update(stronger.context().hash("x")))
+        self.assertFalse(BCRYPT.context().needs_update(HashPolicy("bcrypt", (("rounds", 5),)).context().hash("x")))
+
+    def test_legacy_bcrypt_hashes_verify(self):
+        legacy = CryptContext(schemes=["bcrypt"]).hash("secret123")
+
+        self.assertTrue(ARGON2.context().verify("secret123", legacy))
+
+    def test_floor_enforces_minimum_memory(self):
+        policy = floor_policy("argon2", memory_kib=1024)
+
+        self.assertEqual(dict(policy.params)["memory_cost"], ARGON2_MIN_MEMORY_KIB)
+        self.assertEqual(floor_policy("bcrypt").params, (("rounds", BCRYPT_MIN_ROUNDS),))
+        with self.assertRaises(ValueError):
+            floor_policy("md5")
+
+    def test_pinned_policy(self):
+        policy = pinned_policy("argon2", {"time_cost": 4}, memory_kib=32768)
+
+        self.assertEqual(dict(policy.params), {"time_cost": 4, "memory_cost": 32768, "parallelism": 1})
+        with self.assertRaises(ValueError):
+            pinned_policy("bcrypt", {"time_cost": 4})
+
+
+class TestTune(unittest.TestCase):
+
+    def test_bcrypt_rounds_double_per_step(self):
+        # Floor hashes in 50 ms; a 450 ms target fits three more rounds
+        with patch("src.services.hash_policy.measure", return_value=0.05):
+            policy = tune("bcrypt", target_ms=450)
+
+        self.assertEqual(policy.params, (("rounds", BCRYPT_MIN_ROUNDS + 3),))
+
+    def test_argon2_time_cost_scales_linearly(self):
+        with patch("src.services.hash_policy.measure", return_value=0.05):
+            policy = tune("argon2", target_ms=160, memory_kib=65536)
+
+        self.assertEqual(dict(policy.params)["time_cost"], 6)
+
+    def test_never_below_floor_or_above_ceiling(self):
+        with patch("src.services.hash_policy.measure", return_value=1.0):
+            self.assertEqual(tune("bcrypt", target_ms=100), floor_policy("bcrypt"))
+            self.assertEqual(tune("argon2", target_ms=100), floor_policy("argon2"))
+        with patch("src.services.hash_policy.measure", return_value=0.0001):
+            self.assertEqual(dict(tune("argon2", target_ms=1000).params)["time_cost"], ARGON2_MAX_TIME_COST)
+
+
+if __name__ == "__main__":
+    unittest.main()
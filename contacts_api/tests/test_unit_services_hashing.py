@@ -0,0 +1,66 @@
+import unittest
+
+from src.services.hash_policy import HashPolicy
+from src.services.hashing import HashingOverloaded, PasswordHasher
+
+ARGON2 = HashPolicy("argon2", (("time_cost", 2), ("memory_cost", 1024), ("parallelism", 1)))
+BCRYPT = HashPolicy("bcrypt", (("rounds", 4),))
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.hasher = PasswordHasher(kind="thread", workers=2, max_pending=4, policy=ARGON2)
+
+    def tearDown(self):
+        self.hasher.shutdown()
+
+    async def test_hash_and_verify(self):
+        hashed = await self.hasher.hash("secret123")
+        self.assertNotEqual(hashed, "secret123")
+        self.assertTrue(await self.hasher.verify("secret123", hashed))
+        self.assertFalse(await self.hasher.verify("wrong", hashed))
+
+        stats = self.hasher.stats()
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["pending"], 0)
+        self.assertGreater(stats["avg_run_seconds"], 0)
+
+    async def test_verify_and_update_after_policy_change(self):
+        self.hasher.policy = BCRYPT
+        hashed = await self.hasher.hash("secret123")
+        self.assertEqual(await self.hasher.verify_and_update("secret123", hashed), (True, None))
+
+        self.hasher.policy = ARGON2
+        valid, new_hash = await self.hasher.verify_and_update("secret123", hashed)
+        self.assertTrue(valid)
+        self.assertTrue(new_hash.startswith("$argon2id$"))
+        self.assertEqual(await self.hasher.verify_and_update("wrong", hashed), (False, None))
+
+    async def test_tune_with_fixed_params(self):
+        policy = await self.hasher.tune("bcrypt", 250, 65536, 1, {"rounds": 5})
+
+        self.assertEqual(policy, HashPolicy("bcrypt", (("rounds", 5),)))
+        self.assertIs(self.hasher.policy, policy)
+        self.assertTrue((await self.hasher.hash("x")).startswith("$2b$05$"))
+
+    async def test_process_pool_uses_policy(self):
+        hasher = PasswordHasher(kind="process", workers=1, max_pending=2, policy=BCRYPT)
+        try:
+            self.assertTrue((await hasher.hash("x")).startswith("$2b$04$"))
+        finally:
+            hasher.shutdown()
+
+    async def test_rejects_when_queue_is_full(self):
+        hasher = PasswordHasher(kind="thread", workers=1, max_pending=0)
+        with self.assertRaises(HashingOverloaded):
+            await hasher.hash("secret123")
+        self.assertEqual(hasher.stats()["rejected"], 1)
+
+    def test_unknown_pool_kind(self):
+        with self.assertRaises(ValueError):
+            PasswordHasher(kind="fibers")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from fastapi import HTTPException
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import ConnectionError
+
+from src.services.login_guard import FAILURES_KEY, LOCK_KEY, LoginGuard
+
+
+class TestLoginGuard(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = Redis(connection_pool=ConnectionPool(
+            connection_class=FakeAsyncRedisConnection,
+            server=fakeredis.FakeServer(),
+            decode_responses=True,
+        ))
+        self.guard = LoginGuard(
+            email_threshold=3, ip_threshold=5, window=60, lockout_base=2, lockout_max=10
+        )
+        self.guard.init(self.redis)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def lock_ms(self, scope: str, subject: str) -> int:
+        return await self.redis.pttl(LOCK_KEY.format(scope=scope, subject=subject))
+
+    async def test_email_locked_after_threshold(self):
+        for _ in range(2):
+            await self.guard.failure("a@example.com", "1.1.1.1")
+        await self.guard.check("a@example.com", "1.1.1.1")
+
+        await self.guard.failure("a@example.com", "1.1.1.1")
+
+        with self.assertRaises(HTTPException) as ctx:
+            await self.guard.check("a@example.com", "2.2.2.2")
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.headers["Retry-After"], "2")
+        # Other accounts from the same IP are not locked yet
+        await self.guard.check("b@example.com", "1.1.1.1")
+        self.assertEqual(self.guard.locked, 1)
+
+    async def test_lockout_doubles_up_to_max(self):
+        locks = []
+        for _ in range(6):
+            await self.guard.failure("a@example.com", "1.1.1.1")
+            locks.append(await self.lock_ms("email", "a@example.com"))
+
+        self.assertEqual([-2, -2], locks[:2])
+        self.assertEqual([round(ms / 1000) for ms in locks[2:]], [2, 4, 8, 10])
+        # The counter outlives the longest lock
+        ttl = await self.redis.ttl(FAILURES_KEY.format(scope="email", subject="a@example.com"))
+        self.assertGreaterEqual(ttl, 60)
+
+    async def test_ip_locked_across_accounts(self):
+        for i in range(5):
+            await self.guard.failure(None if i % 2 else f"u{i}@example.com", "1.1.1.1")
+
+        with self.assertRaises(HTTPException):
+            await self.guard.check("new@example.com", "1.1.1.1")
+        await self.guard.check("new@example.com", "2.2.2.2")
+
+    async def test_unknown_email_only_charges_ip(self):
+        await self.guard.failure(None, "1.1.1.1")
+
+        self.assertFalse(await self.redis.exists(FAILURES_KEY.format(scope="email", subject="None")))
+        self.assertEqual(await self.redis.get(FAILURES_KEY.format(scope="ip", subject="1.1.1.1")), "1")
+
+    async def test_success_clears_email_but_not_ip(self):
+        for _ in range(3):
+            await self.guard.failure("a@example.com", "1.1.1.1")
+
+        await self.guard.success("a@example.com")
+
+        await self.guard.check("a@example.com", "2.2.2.2")
+        self.assertEqual(await self.redis.get(FAILURES_KEY.format(scope="ip", subject="1.1.1.1")), "3")
+
+    async def test_negative_cache(self):
+        self.assertFalse((await self.guard.check("ghost@example.com", "1.1.1.1")).unknown)
+
+        await self.guard.remember_unknown("ghost@example.com")
+        self.assertTrue((await self.guard.check("ghost@example.com", "1.1.1.1")).unknown)
+
+        await self.guard.forget_unknown("ghost@example.com")
+        self.assertFalse((await self.guard.check("ghost@example.com", "1.1.1.1")).unknown)
+
+    async def test_fails_open_without_redis(self):
+        self.guard.redis = MagicMock()
+        self.guard.redis.pipeline.return_value.execute = AsyncMock(side_effect=ConnectionError())
+        self.guard._record = AsyncMock(side_effect=ConnectionError())
+
+        self.assertFalse((await self.guard.check("a@example.com", "1.1.1.1")).unknown)
+        await self.guard.failure("a@example.com", "1.1.1.1")
+
+    async def test_disabled(self):
+        guard = LoginGuard(enabled=False)
+        guard.init(self.redis)
+
+        await guard.failure("a@example.com", "1.1.1.1")
+
+        self.assertEqual(await self.redis.keys("login:*"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
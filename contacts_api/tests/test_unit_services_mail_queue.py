@@ -0,0 +1,204 @@
+import json
+import socket
+import unittest
+from unittest.mock import patch
+
+import aiosmtplib
+import fakeredis.aioredis
+from aiosmtpd.controller import Controller
+
+from src.services.mail_queue import (
+    DEAD_KEY,
+    DELAYED_KEY,
+    PROCESSING_KEY,
+    QUEUE_KEY,
+    MailQueue,
+    MailQueueUnavailable,
+    MailWorker,
+    SMTPSender,
+    is_permanent,
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """aiosmtpd handler keeping delivered messages and counting sessions."""
+
+    def __init__(self, reject: set[str] = frozenset()):
+        self.reject = reject
+        self.messages = []
+        self.sessions = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.reject:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 Message accepted"
+
+
+class TestMailQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        self.queue = MailQueue(max_attempts=3, backoff_base=2, backoff_max=5)
+        self.queue.init(self.redis)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_enqueue_requires_redis(self):
+        with self.assertRaises(MailQueueUnavailable):
+            await MailQueue().enqueue("a@example.com", "s", "<p>x</p>")
+
+    async def test_fetch_is_fifo_and_moves_to_processing(self):
+        for i in range(3):
+            await self.queue.enqueue(f"u{i}@example.com", "s", "<p>x</p>")
+
+        jobs = await self.queue.fetch("w1", batch_size=2, timeout=0.1)
+
+        self.assertEqual([json.loads(raw)["to"] for raw in jobs], ["u0@example.com", "u1@example.com"])
+        self.assertEqual(await self.redis.llen(QUEUE_KEY), 1)
+        self.assertEqual(await self.redis.llen(PROCESSING_KEY.format(worker="w1")), 2)
+
+        await self.queue.ack("w1", jobs[0])
+        self.assertEqual(await self.redis.llen(PROCESSING_KEY.format(worker="w1")), 1)
+
+    async def test_fetch_empty_queue(self):
+        self.assertEqual(await self.queue.fetch("w1", batch_size=5, timeout=0.01), [])
+
+    async def test_backoff_doubles_up_to_max(self):
+        self.assertEqual([self.queue.backoff(n) for n in (1, 2, 3, 4)], [2, 4, 5, 5])
+
+    async def test_retry_then_dead_letter(self):
+        await self.queue.enqueue("a@example.com", "s", "<p>x</p>")
+        for attempt in (1, 2):
+            await self.queue.promote_due(now=float("inf"))
+            [raw] = await self.queue.fetch("w1", batch_size=1, timeout=0.1)
+            self.assertFalse(await self.queue.fail("w1", raw, "timeout"))
+            self.assertEqual(await self.redis.zcard(DELAYED_KEY), 1)
+
+        # Not due yet
+        self.assertEqual(await self.queue.promote_due(), 0)
+        self.assertEqual(await self.queue.promote_due(now=float("inf")), 1)
+        [raw] = await self.queue.fetch("w1", batch_size=1, timeout=0.1)
+        self.assertTrue(await self.queue.fail("w1", raw, "timeout"))
+
+        [dead] = await self.redis.lrange(DEAD_KEY, 0, -1)
+        self.assertEqual(json.loads(dead)["attempts"], 3)
+        self.assertEqual(
+            await self.queue.stats(), {"queued": 0, "delayed": 0, "dead": 1}
+        )
+        self.assertEqual(await self.redis.llen(PROCESSING_KEY.format(worker="w1")), 0)
+
+    async def test_recover_requeues_in_original_order(self):
+        for i in range(3):
+            await self.queue.enqueue(f"u{i}@example.com", "s", "<p>x</p>")
+        await self.queue.fetch("w1", batch_size=2, timeout=0.1)
+
+        self.assertEqual(await self.queue.recover("w1"), 2)
+
+        jobs = await self.queue.fetch("w2", batch_size=3, timeout=0.1)
+        self.assertEqual(
+            [json.loads(raw)["to"] for raw in jobs],
+            ["u0@example.com", "u1@example.com", "u2@example.com"],
+        )
+
+
+class TestMailWorker(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.handler = RecordingHandler(reject={"gone@example.com"})
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=free_port())
+        self.controller.start()
+        self.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        self.queue = MailQueue(max_attempts=3)
+        self.queue.init(self.redis)
+        self.sender = SMTPSender(
+            hostname="127.0.0.1", port=self.controller.port, start_tls=False
+        )
+        self.worker = MailWorker(
+            self.queue,
+            self.sender,
+            name="test",
+            batch_size=10,
+            poll_timeout=0.1,
+            from_address="Contacts <noreply@example.com>",
+        )
+
+    async def asyncTearDown(self):
+        await self.sender.close()
+        await self.redis.aclose()
+        self.controller.stop()
+
+    async def test_batch_is_sent_over_one_connection(self):
+        for i in range(5):
+            await self.queue.enqueue(f"u{i}@example.com", "Hello", f"<p>{i}</p>")
+
+        self.assertEqual(await self.worker.run_once(), 5)
+
+        self.assertEqual(len(self.handler.messages), 5)
+        self.assertEqual(self.handler.sessions, 1)
+        self.assertEqual(self.sender.connections, 1)
+        self.assertIn("Subject: Hello", self.handler.messages[0][1])
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "delayed": 0, "dead": 0})
+
+        # The connection stays open for the next batch
+        await self.queue.enqueue("u5@example.com", "Hello", "<p>5</p>")
+        await self.worker.run_once()
+        self.assertEqual(self.sender.connections, 1)
+
+    async def test_rejected_recipient_is_dead_lettered(self):
+        await self.queue.enqueue("gone@example.com", "Hello", "<p>x</p>")
+        await self.queue.enqueue("ok@example.com", "Hello", "<p>x</p>")
+
+        await self.worker.run_once()
+
+        self.assertEqual([to for to, _ in self.handler.messages], [["ok@example.com"]])
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "delayed": 0, "dead": 1})
+
+    async def test_transient_failure_is_retried(self):
+        await self.queue.enqueue("u@example.com", "Hello", "<p>x</p>")
+        error = aiosmtplib.SMTPResponseException(451, "Try again later")
+        with patch.object(self.sender, "_send", side_effect=error):
+            await self.worker.run_once()
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "delayed": 1, "dead": 0})
+
+        with patch("src.services.mail_queue.time.time", return_value=10**10):
+            await self.worker.run_once()
+        self.assertEqual(len(self.handler.messages), 1)
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "delayed": 0, "dead": 0})
+
+
+    async def test_malformed_jobs_are_dead_lettered_raw(self):
+        for raw in ("not json", json.dumps({"to": "a@b.c"}), "[1]"):
+            await self.redis.lpush(QUEUE_KEY, raw)
+
+        self.assertEqual(await self.worker.run_once(), 3)
+
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "delayed": 0, "dead": 3})
+        self.assertEqual(await self.queue.recover("test"), 0)
+        dead = [json.loads(entry) for entry in await self.redis.lrange(DEAD_KEY, 0, -1)]
+        self.assertEqual({entry["raw"] for entry in dead}, {"not json", '{"to": "a@b.c"}', "[1]"})
+        self.assertTrue(all(entry["last_error"].startswith("Malformed job") for entry in dead))
+
+
+class TestIsPermanent(unittest.TestCase):
+
+    def test_codes(self):
+        self.assertTrue(is_permanent(aiosmtplib.SMTPResponseException(550, "no")))
+        self.assertFalse(is_permanent(aiosmtplib.SMTPResponseException(421, "busy")))
+        self.assertFalse(is_permanent(aiosmtplib.SMTPServerDisconnected("gone")))
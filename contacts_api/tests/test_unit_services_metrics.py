@@ -0,0 +1,76 @@
+import unittest
+
+import fakeredis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from redis.asyncio import ConnectionPool
+
+from src.services.metrics import (
+    Counter,
+    Histogram,
+    InstrumentedRedis,
+    RequestStats,
+    Registry,
+    current_request,
+    redis_commands,
+)
+
+
+class TestMetricTypes(unittest.TestCase):
+
+    def test_counter_render(self):
+        registry = Registry()
+        counter = registry.register(Counter("hits_total", "Hits.", ("route",)))
+        counter.inc('/a "b"')
+        counter.inc('/a "b"', amount=2)
+
+        self.assertEqual(
+            registry.render(),
+            '# HELP hits_total Hits.\n# TYPE hits_total counter\n'
+            'hits_total{route="/a \\"b\\""} 3\n',
+        )
+
+    def test_histogram_is_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.5, 3):
+            histogram.observe(value)
+
+        self.assertEqual(
+            histogram.samples(),
+            [
+                'latency_seconds_bucket{le="0.1"} 1',
+                'latency_seconds_bucket{le="1"} 3',
+                'latency_seconds_bucket{le="+Inf"} 4',
+                "latency_seconds_sum 4.05",
+                "latency_seconds_count 4",
+            ],
+        )
+
+    def test_collectors_are_rendered(self):
+        registry = Registry()
+        registry.collector(lambda: [("up", "gauge", "Up.", ["up 1"])])
+        self.assertIn("# TYPE up gauge\nup 1\n", registry.render())
+
+
+class TestInstrumentedRedis(unittest.IsolatedAsyncioTestCase):
+
+    async def test_commands_and_pipelines_are_timed(self):
+        pool = ConnectionPool(
+            connection_class=FakeAsyncRedisConnection, server=fakeredis.FakeServer(), decode_responses=True
+        )
+        client = InstrumentedRedis(connection_pool=pool)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        before_set, before_pipe = redis_commands.count("SET"), redis_commands.count("PIPELINE")
+        try:
+            await client.set("k", "v")
+            pipe = client.pipeline(transaction=False)
+            pipe.get("k")
+            pipe.get("missing")
+            self.assertEqual(await pipe.execute(), ["v", None])
+        finally:
+            current_request.reset(token)
+            await client.aclose()
+
+        self.assertEqual(redis_commands.count("SET"), before_set + 1)
+        self.assertEqual(redis_commands.count("PIPELINE"), before_pipe + 1)
+        self.assertEqual(stats.redis_commands, 2)
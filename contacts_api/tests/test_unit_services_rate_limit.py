@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import fakeredis.aioredis
+from redis.exceptions import ConnectionError
+
+from src.services.rate_limit import Decision, Limiter, Quota
+
+NOW = 1_700_000_000.0
+
+
+class TestQuota(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(Quota.parse("2/300"), Quota(2, 300.0))
+        self.assertEqual(Quota.parse("10/1.5").interval_ms, 150)
+        for value in ("0/60", "5/0", "five/60", "5"):
+            with self.assertRaises(ValueError):
+                Quota.parse(value)
+
+    def test_headers(self):
+        decision = Decision(False, Quota(2, 300), 0, 149.2, 299.5)
+        self.assertEqual(
+            decision.headers(),
+            {
+                "RateLimit-Limit": "2",
+                "RateLimit-Remaining": "0",
+                "RateLimit-Reset": "300",
+                "RateLimit-Policy": "2;w=300",
+                "Retry-After": "150",
+            },
+        )
+
+
+class TestLimiter(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        self.limiter = Limiter()
+        self.limiter.init(self.redis)
+        self.now = NOW
+        patcher = patch("src.services.rate_limit.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_burst_then_refuse_then_refill(self):
+        quota = [Quota(2, 10)]
+        first = await self.limiter.hit(["k"], quota)
+        second = await self.limiter.hit(["k"], quota)
+        third = await self.limiter.hit(["k"], quota)
+
+        self.assertEqual((first.allowed, first.remaining), (True, 1))
+        self.assertEqual((second.allowed, second.remaining), (True, 0))
+        self.assertFalse(third.allowed)
+        self.assertAlmostEqual(third.retry_after, 5, places=2)
+
+        # One emission interval later exactly one more request fits
+        self.now += 5
+        self.assertTrue((await self.limiter.hit(["k"], quota)).allowed)
+        self.assertFalse((await self.limiter.hit(["k"], quota)).allowed)
+
+    async def test_all_quotas_must_allow_and_refusal_charges_nothing(self):
+        user, ip = Quota(1, 60), Quota(5, 60)
+        self.assertTrue((await self.limiter.hit(["user:1", "ip:a"], [user, ip])).allowed)
+
+        refused = await self.limiter.hit(["user:1", "ip:a"], [user, ip])
+        self.assertFalse(refused.allowed)
+        self.assertEqual(refused.quota, user)
+
+        # The refused request did not use up the shared IP quota
+        for other in range(2, 6):
+            keys = [f"user:{other}", "ip:a"]
+            self.assertTrue((await self.limiter.hit(keys, [user, ip])).allowed)
+        refused = await self.limiter.hit(["user:6", "ip:a"], [user, ip])
+        self.assertEqual(refused.quota, ip)
+
+    async def test_local_batch_reduces_redis_calls(self):
+        quota = [Quota(10, 60)]
+        decisions = [await self.limiter.hit(["hot"], quota, batch=5) for _ in range(10)]
+
+        self.assertTrue(all(d.allowed for d in decisions))
+        self.assertEqual(self.limiter.calls, 2)
+        self.assertEqual([d.remaining for d in decisions[:5]], [9, 8, 7, 6, 5])
+        self.assertFalse((await self.limiter.hit(["hot"], quota, batch=5)).allowed)
+
+    async def test_batch_is_capped_by_available_tokens(self):
+        quota = [Quota(3, 60)]
+        decisions = [await self.limiter.hit(["k"], quota, batch=5) for _ in range(4)]
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+
+    async def test_fails_open_without_redis(self):
+        self.assertIsNone(await Limiter().hit(["k"], [Quota(1, 60)]))
+
+        self.limiter._script = AsyncMock(side_effect=ConnectionError())
+        self.assertIsNone(await self.limiter.hit(["k"], [Quota(1, 60)]))
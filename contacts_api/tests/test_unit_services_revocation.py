@@ -0,0 +1,123 @@
+import time
+import unittest
+from unittest.mock import AsyncMock
+
+import fakeredis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import ConnectionError
+
+from src.services.revocation import (
+    REVOKED_INDEX_KEY,
+    REVOKED_KEY,
+    BloomFilter,
+    TokenRevocations,
+)
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+        items = [f"jti-{i}" for i in range(1_000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+        self.assertEqual(bloom.count, 1_000)
+
+    def test_false_positive_rate_near_target(self):
+        bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+        for i in range(1_000):
+            bloom.add(f"jti-{i}")
+
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives, 300)
+
+
+class TestTokenRevocations(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.redis = self._client()
+        self.revocations = TokenRevocations(capacity=100, error_rate=0.01)
+        self.revocations.init(self.redis)
+
+    def _client(self):
+        return Redis(connection_pool=ConnectionPool(
+            connection_class=FakeAsyncRedisConnection,
+            server=self.server,
+            decode_responses=True,
+        ))
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_revoke_stores_id_until_expiry(self):
+        await self.revocations.revoke("a", time.time() + 60)
+
+        self.assertTrue(0 < await self.redis.ttl(REVOKED_KEY.format(jti="a")) <= 60)
+        self.assertEqual(await self.redis.zrange(REVOKED_INDEX_KEY, 0, -1), ["a"])
+        self.assertTrue(await self.revocations.is_revoked("a"))
+
+    async def test_expired_token_is_not_stored(self):
+        await self.revocations.revoke("a", time.time() - 1)
+
+        self.assertFalse(await self.redis.exists(REVOKED_KEY.format(jti="a")))
+        self.assertFalse(await self.revocations.is_revoked("a"))
+
+    async def test_clear_token_needs_no_redis(self):
+        self.revocations.redis = AsyncMock()
+
+        self.assertFalse(await self.revocations.is_revoked("never-revoked"))
+        self.assertFalse(await self.revocations.is_revoked(None))
+        self.assertEqual(self.revocations.redis.mock_calls, [])
+
+    async def test_false_positive_is_confirmed_in_redis(self):
+        self.revocations.bloom.add("not-revoked")
+
+        self.assertFalse(await self.revocations.is_revoked("not-revoked"))
+        self.assertEqual((self.revocations.positives, self.revocations.revoked), (1, 0))
+
+    async def test_redis_error_on_confirm_fails_closed(self):
+        self.revocations.bloom.add("maybe")
+        self.revocations.redis = AsyncMock()
+        self.revocations.redis.exists.side_effect = ConnectionError()
+
+        self.assertTrue(await self.revocations.is_revoked("maybe"))
+
+    async def test_sync_picks_up_other_workers(self):
+        other = TokenRevocations(capacity=100, error_rate=0.01)
+        other.init(self._client())
+        await other.revoke("elsewhere", time.time() + 60)
+
+        self.assertFalse(await self.revocations.is_revoked("elsewhere"))
+        await self.revocations.sync()
+        self.assertTrue(await self.revocations.is_revoked("elsewhere"))
+        await other.redis.aclose()
+
+    async def test_sync_drops_expired_and_keeps_local(self):
+        await self.redis.zadd(REVOKED_INDEX_KEY, {"old": time.time() - 1})
+        await self.redis.incr("revoked:generation")
+        await self.revocations.revoke("mine", time.time() + 60)
+        # As if a concurrent sync had read Redis before "mine" was written
+        await self.redis.zrem(REVOKED_INDEX_KEY, "mine")
+
+        await self.revocations.sync()
+
+        self.assertNotIn("old", self.revocations.bloom)
+        self.assertIn("mine", self.revocations.bloom)
+        self.assertEqual(await self.redis.zrange(REVOKED_INDEX_KEY, 0, -1), [])
+
+    async def test_sync_skipped_when_generation_unchanged(self):
+        await self.revocations.revoke("a", time.time() + 60)
+        await self.revocations.sync()
+        bloom = self.revocations.bloom
+
+        await self.revocations.sync()
+
+        self.assertIs(self.revocations.bloom, bloom)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from fastapi import HTTPException
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import ConnectionError
+
+from src.services.sessions import SESSION_KEY, USER_SESSIONS_KEY, SessionRegistry
+
+
+class TestSessionRegistry(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        pool = ConnectionPool(
+            connection_class=FakeAsyncRedisConnection,
+            server=fakeredis.FakeServer(),
+            decode_responses=True,
+        )
+        self.redis = Redis(connection_pool=pool)
+        self.registry = SessionRegistry(ttl=3600, grace=10)
+        self.registry.init(self.redis)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_create_stores_session_with_ttl(self):
+        sid, jti = await self.registry.create("a@example.com", "curl/8.0")
+
+        session = await self.redis.hgetall(SESSION_KEY.format(sid=sid))
+        self.assertEqual(session["email"], "a@example.com")
+        self.assertEqual(session["device"], "curl/8.0")
+        self.assertEqual(session["jti"], jti)
+        self.assertTrue(0 < await self.redis.ttl(SESSION_KEY.format(sid=sid)) <= 3600)
+        self.assertEqual(
+            await self.redis.smembers(USER_SESSIONS_KEY.format(email="a@example.com")), {sid}
+        )
+
+    async def test_rotate_replaces_jti(self):
+        sid, jti = await self.registry.create("a@example.com", None)
+
+        new_jti = await self.registry.rotate("a@example.com", sid, jti)
+
+        self.assertNotEqual(new_jti, jti)
+        session = await self.redis.hgetall(SESSION_KEY.format(sid=sid))
+        self.assertEqual((session["jti"], session["previous"]), (new_jti, jti))
+
+    async def test_previous_token_within_grace_keeps_session(self):
+        sid, jti = await self.registry.create("a@example.com", None)
+        new_jti = await self.registry.rotate("a@example.com", sid, jti)
+
+        with self.assertRaises(HTTPException) as ctx:
+            await self.registry.rotate("a@example.com", sid, jti)
+
+        self.assertEqual(ctx.exception.detail, "Refresh token already used")
+        self.assertTrue(await self.registry.rotate("a@example.com", sid, new_jti))
+
+    async def test_reuse_after_grace_revokes_session(self):
+        sid, jti = await self.registry.create("a@example.com", None)
+        with patch("src.services.sessions.time.time", return_value=1_000):
+            new_jti = await self.registry.rotate("a@example.com", sid, jti)
+
+        with patch("src.services.sessions.time.time", return_value=1_100):
+            with self.assertRaises(HTTPException) as ctx:
+                await self.registry.rotate("a@example.com", sid, jti)
+        self.assertEqual(ctx.exception.detail, "Refresh token reuse detected")
+
+        # The legitimate holder is signed out as well
+        with self.assertRaises(HTTPException) as ctx:
+            await self.registry.rotate("a@example.com", sid, new_jti)
+        self.assertEqual(ctx.exception.detail, "Invalid refresh token")
+        self.assertEqual(await self.registry.list("a@example.com"), [])
+
+    async def test_forged_jti_revokes_session(self):
+        sid, _ = await self.registry.create("a@example.com", None)
+
+        with self.assertRaises(HTTPException):
+            await self.registry.rotate("a@example.com", sid, "forged")
+
+        self.assertFalse(await self.redis.exists(SESSION_KEY.format(sid=sid)))
+
+    async def test_list_is_per_user_and_drops_expired(self):
+        first, _ = await self.registry.create("a@example.com", "phone")
+        second, _ = await self.registry.create("a@example.com", "laptop")
+        await self.registry.create("b@example.com", "tablet")
+        await self.redis.delete(SESSION_KEY.format(sid=first))
+
+        sessions = await self.registry.list("a@example.com")
+
+        self.assertEqual([s["sid"] for s in sessions], [second])
+        self.assertEqual(sessions[0]["device"], "laptop")
+        self.assertEqual(
+            await self.redis.smembers(USER_SESSIONS_KEY.format(email="a@example.com")), {second}
+        )
+
+    async def test_revoke_only_own_session(self):
+        sid, _ = await self.registry.create("a@example.com", None)
+
+        self.assertFalse(await self.registry.revoke("b@example.com", sid))
+        self.assertTrue(await self.registry.revoke("a@example.com", sid))
+        self.assertFalse(await self.redis.exists(SESSION_KEY.format(sid=sid)))
+
+    async def test_revoke_all(self):
+        for device in ("phone", "laptop"):
+            await self.registry.create("a@example.com", device)
+        other, _ = await self.registry.create("b@example.com", None)
+
+        self.assertEqual(await self.registry.revoke_all("a@example.com"), 2)
+        self.assertEqual(await self.registry.list("a@example.com"), [])
+        self.assertEqual([s["sid"] for s in await self.registry.list("b@example.com")], [other])
+
+    async def test_unavailable_without_redis(self):
+        with self.assertRaises(HTTPException) as ctx:
+            await SessionRegistry().create("a@example.com", None)
+        self.assertEqual(ctx.exception.status_code, 503)
+
+    async def test_redis_error_is_503(self):
+        self.registry._rotate = AsyncMock(side_effect=ConnectionError())
+
+        with self.assertRaises(HTTPException) as ctx:
+            await self.registry.rotate("a@example.com", "sid", "jti")
+
+        self.assertEqual(ctx.exception.status_code, 503)
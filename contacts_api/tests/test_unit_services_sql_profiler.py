@@ -0,0 +1,102 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from src.services.sql_profiler import (
+    RequestProfile,
+    SQLProfiler,
+    StatementRecord,
+    current_profile,
+    describe_parameters,
+)
+
+
+class TestRequestProfile(unittest.TestCase):
+
+    def test_summary_groups_repeated_statements(self):
+        profile = RequestProfile("GET", "/api/contacts/")
+        profile.statements = [
+            StatementRecord("SELECT users", "(1,)", 0.001),
+            StatementRecord("SELECT contacts WHERE user_id = ?", "(1,)", 0.002),
+            StatementRecord("SELECT contacts WHERE user_id = ?", "(2,)", 0.002),
+            StatementRecord("SELECT contacts WHERE user_id = ?", "(3,)", 0.080, ["SCAN contacts"]),
+        ]
+
+        summary = profile.summary(slow_seconds=0.05, repeat_threshold=3)
+
+        self.assertEqual(summary["queries"], 4)
+        self.assertEqual(summary["time_ms"], 85.0)
+        self.assertEqual(
+            summary["repeated"],
+            [{"sql": "SELECT contacts WHERE user_id = ?", "count": 3, "total_ms": 84.0}],
+        )
+        self.assertEqual(len(summary["slow"]), 1)
+        self.assertEqual(summary["slow"][0]["plan"], ["SCAN contacts"])
+        self.assertNotIn("plan", summary["statements"][0])
+
+    def test_no_repeats_below_threshold(self):
+        profile = RequestProfile("GET", "/")
+        profile.statements = [StatementRecord("SELECT 1", "()", 0.001)] * 2
+
+        self.assertEqual(profile.repeated(3), [])
+
+
+class TestDescribeParameters(unittest.TestCase):
+
+    def test_values_are_not_included(self):
+        self.assertEqual(describe_parameters(("a@example.com", 1)), "2 parameters (str, int)")
+        self.assertEqual(describe_parameters({"hash": "$argon2id$..."}), "1 parameters (str)")
+        self.assertEqual(describe_parameters([("x", None)] * 3, executemany=True), "3 rows of 2 parameters (str, NoneType)")
+        self.assertEqual(describe_parameters(None), "0 parameters ()")
+
+
+class TestSQLProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = SQLProfiler(enabled=True, slow_ms=0, repeat_threshold=2)
+        self.engine = create_engine("sqlite://")
+        self.profiler.install(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, owner INTEGER)"))
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_records_statements_with_plans(self):
+        profile = RequestProfile("GET", "/items")
+        token = current_profile.set(profile)
+        try:
+            with self.engine.connect() as conn:
+                for owner in (1, 2):
+                    rows = conn.execute(text("SELECT id FROM items WHERE owner = :o"), {"o": owner})
+                    self.assertEqual(rows.all(), [])
+        finally:
+            current_profile.reset(token)
+
+        with self.assertLogs("src.services.sql_profiler", level="WARNING") as logs:
+            summary = self.profiler.finish(profile)
+
+        self.assertEqual(summary["queries"], 2)
+        self.assertEqual(summary["repeated"][0]["count"], 2)
+        self.assertTrue(any("SCAN items" in line for line in summary["slow"][0]["plan"]))
+        self.assertIn("Possible N+1", logs.output[0])
+        self.assertEqual(list(self.profiler.profiles), [summary])
+        self.assertEqual(summary["statements"][0]["parameters"], "1 parameters (int)")
+
+    def test_parameter_values_only_when_enabled(self):
+        self.profiler.record_parameters = True
+        profile = RequestProfile("GET", "/items")
+        token = current_profile.set(profile)
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT id FROM items WHERE owner = :o"), {"o": 42})
+        finally:
+            current_profile.reset(token)
+
+        self.assertIn("42", profile.statements[0].parameters)
+
+    def test_ignores_statements_outside_requests(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        self.assertEqual(len(self.profiler.profiles), 0)
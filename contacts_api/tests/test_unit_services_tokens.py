@@ -0,0 +1,180 @@
+import time
+import unittest
+from datetime import datetime, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jose import jwt
+
+from src.services.tokens import (
+    EdDSAKey,
+    ES256Key,
+    HMACKey,
+    SigningKey,
+    TokenCodec,
+    TokenError,
+    b64decode,
+    b64encode,
+    build_codec,
+    load_key,
+)
+
+
+def pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def public_pem(private_key) -> str:
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+
+
+class TestHMACCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = TokenCodec([HMACKey("secret")])
+
+    def test_round_trip(self):
+        token = self.codec.encode({"sub": "a@example.com", "exp": int(time.time()) + 60})
+        self.assertEqual(self.codec.decode(token)["sub"], "a@example.com")
+
+    def test_compatible_with_python_jose(self):
+        claims = {"sub": "a@example.com", "exp": int(time.time()) + 60}
+
+        self.assertEqual(jwt.decode(self.codec.encode(claims), "secret", algorithms=["HS256"]), claims)
+        self.assertEqual(self.codec.decode(jwt.encode(claims, "secret", algorithm="HS256")), claims)
+
+    def test_rejects_tampered_payload(self):
+        header, _, signature = self.codec.encode({"sub": "a@example.com"}).split(".")
+        forged = b64encode(b'{"sub":"admin@example.com"}')
+
+        with self.assertRaises(TokenError):
+            self.codec.decode(f"{header}.{forged}.{signature}")
+
+    def test_rejects_expired(self):
+        token = self.codec.encode({"sub": "a@example.com", "exp": int(time.time()) - 5})
+
+        with self.assertRaises(TokenError):
+            self.codec.decode(token)
+        self.assertEqual(self.codec.decode(token, leeway=30)["sub"], "a@example.com")
+
+    def test_rejects_alg_none_and_garbage(self):
+        unsigned = jwt.encode({"sub": "a"}, "secret", algorithm="HS256").rsplit(".", 1)[0]
+        header = b64encode(b'{"alg":"none","typ":"JWT"}')
+
+        for token in ("", "abc", "a.b", "a.b.c.d", f"{header}.{unsigned.split('.')[1]}.", unsigned + ".!!"):
+            with self.assertRaises(TokenError):
+                self.codec.decode(token)
+
+    def test_datetimes_become_timestamps(self):
+        exp = datetime(2100, 1, 1, tzinfo=timezone.utc)
+
+        self.assertEqual(self.codec.decode(self.codec.encode({"exp": exp}))["exp"], int(exp.timestamp()))
+
+
+class TestKeyRotation(unittest.TestCase):
+
+    def test_retired_key_still_verifies(self):
+        old = TokenCodec([HMACKey("old-secret", kid="2026-09")])
+        token = old.encode({"sub": "a@example.com"})
+        ring = [HMACKey("new-secret", kid="2026-10"), HMACKey("old-secret", kid="2026-09")]
+        rotated = TokenCodec(ring, active_kid="2026-10")
+
+        self.assertEqual(rotated.decode(token)["sub"], "a@example.com")
+        header = rotated.encode({"sub": "a@example.com"}).split(".")[0]
+        self.assertEqual(b64decode(header), b'{"alg":"HS256","typ":"JWT","kid":"2026-10"}')
+
+    def test_unknown_kid_rejected(self):
+        token = TokenCodec([HMACKey("secret", kid="gone")]).encode({"sub": "a"})
+
+        with self.assertRaises(TokenError):
+            TokenCodec([HMACKey("secret", kid="current")]).decode(token)
+
+    def test_alg_must_match_key(self):
+        # An HS256 token signed with the public key of an EdDSA kid must not pass
+        private = ed25519.Ed25519PrivateKey.generate()
+        codec = TokenCodec([EdDSAKey(private, kid="ed")])
+        forged = TokenCodec([HMACKey(public_pem(private), kid="ed")]).encode({"sub": "a"})
+
+        with self.assertRaises(TokenError):
+            codec.decode(forged)
+
+    def test_build_codec_keeps_secret_for_old_tokens(self):
+        legacy = jwt.encode({"sub": "a@example.com"}, "secret", algorithm="HS256")
+        private = ed25519.Ed25519PrivateKey.generate()
+        codec = build_codec("secret", "HS256", [{"kid": "ed-1", "alg": "EdDSA", "private_key": pem(private)}], None)
+
+        self.assertEqual(codec.active.kid, "ed-1")
+        self.assertEqual(codec.decode(legacy)["sub"], "a@example.com")
+        self.assertEqual([key["kid"] for key in codec.jwks()["keys"]], ["ed-1"])
+
+    def test_legacy_secret_can_be_retired(self):
+        legacy = jwt.encode({"sub": "a@example.com"}, "secret", algorithm="HS256")
+        private = ed25519.Ed25519PrivateKey.generate()
+        keys = [{"kid": "ed-1", "alg": "EdDSA", "private_key": pem(private)}]
+        codec = build_codec("secret", "HS256", keys, None, accept_legacy_secret=False)
+
+        self.assertEqual(list(codec.keys), ["ed-1"])
+        with self.assertRaises(TokenError):
+            codec.decode(legacy)
+        # Without configured keys the secret is all there is to sign with
+        self.assertEqual(build_codec("secret", "HS256", [], None, accept_legacy_secret=False).decode(legacy)["sub"],
+                         "a@example.com")
+
+    def test_signing_key_is_abstract(self):
+        with self.assertRaises(TypeError):
+            SigningKey()
+
+    def test_configured_keys_need_kid(self):
+        with self.assertRaises(ValueError):
+            build_codec("secret", "HS256", [{"alg": "HS256", "secret": "x"}], None)
+
+
+class TestAsymmetricKeys(unittest.TestCase):
+
+    def test_eddsa_verifies_with_public_key_only(self):
+        private = ed25519.Ed25519PrivateKey.generate()
+        signer = TokenCodec([load_key({"kid": "ed", "alg": "EdDSA", "private_key": pem(private)})])
+        verifier = TokenCodec([load_key({"kid": "ed", "alg": "EdDSA", "public_key": public_pem(private)})])
+
+        token = signer.encode({"sub": "a@example.com"})
+
+        self.assertEqual(verifier.decode(token)["sub"], "a@example.com")
+        with self.assertRaises(TokenError):
+            verifier.encode({"sub": "a@example.com"})
+        jwk = signer.jwks()["keys"][0]
+        self.assertEqual((jwk["kty"], jwk["crv"], jwk["kid"]), ("OKP", "Ed25519", "ed"))
+
+    def test_es256_interoperates_with_python_jose(self):
+        private = ec.generate_private_key(ec.SECP256R1())
+        codec = TokenCodec([ES256Key(private, kid="ec")])
+
+        token = codec.encode({"sub": "a@example.com"})
+
+        self.assertEqual(jwt.decode(token, public_pem(private), algorithms=["ES256"])["sub"], "a@example.com")
+        foreign = jwt.encode({"sub": "b@example.com"}, pem(private), algorithm="ES256", headers={"kid": "ec"})
+        self.assertEqual(codec.decode(foreign)["sub"], "b@example.com")
+        self.assertEqual(set(codec.jwks()["keys"][0]), {"kty", "crv", "x", "y", "kid", "alg", "use"})
+
+    def test_es256_rejects_wrong_key(self):
+        token = TokenCodec([ES256Key(ec.generate_private_key(ec.SECP256R1()), kid="ec")]).encode({"sub": "a"})
+        other = TokenCodec([ES256Key(ec.generate_private_key(ec.SECP256R1()), kid="ec")])
+
+        with self.assertRaises(TokenError):
+            other.decode(token)
+
+    def test_key_type_must_match_alg(self):
+        private = ed25519.Ed25519PrivateKey.generate()
+
+        with self.assertRaises(ValueError):
+            load_key({"kid": "x", "alg": "ES256", "private_key": pem(private)})
+
+
+if __name__ == "__main__":
+    unittest.main()